@@ -1,5 +1,6 @@
-import json
+import itertools
 import os
+import threading
 
 from flask import Flask
 from flask_socketio import SocketIO
@@ -8,6 +9,11 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 socketio = SocketIO()
 
+SEED_CHUNK = 1000
+
+_rebuild_lock = threading.Lock()
+_players_version = None     # shared refresh token our indexes were built after
+
 
 def create_app(config_overrides: dict = None):
     app = Flask(
@@ -20,82 +26,221 @@ def create_app(config_overrides: dict = None):
     if config_overrides:
         app.config.update(config_overrides)
 
+    from . import db_pool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **db_pool.engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+    async_mode = app.config['SOCKETIO_ASYNC_MODE']
+    if async_mode == 'gevent' and app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        db_pool.make_psycopg2_cooperative()
     db.init_app(app)
-    socketio.init_app(app, cors_allowed_origins='*', async_mode='gevent')
+    from . import locks, offload, sharding, user_cache, wire
+    wire.set_encoder(app.config['JSON_ENCODER'])
+    offload.configure(app.config['OFFLOAD_THREADS'], cooperative=async_mode == 'gevent')
+    locks.configure(locks.wanted(app.config['GAME_LOCKS'], async_mode))
+    sharding.configure(app.config['SHARD_ID'], app.config['SHARD_COUNT'],
+                       app.config['DIRECTORY_INTERVAL'])
+    user_cache.configure(app.config['USER_CACHE_SIZE'])
+    # Import handlers before init_app so they are queued on the SocketIO
+    # object and re-registered on every server it creates (e.g. restarts).
+    from . import sockets  # noqa
+    socketio.init_app(app, cors_allowed_origins='*', async_mode=async_mode, json=wire)
+    from . import rate_limit
+    rate_limit.configure(app.config['RATE_LIMITS'], app.config['RATE_LIMIT_MAX_KEYS'])
+    rate_limit.limit_send_queues(socketio.server.eio, app.config['SEND_QUEUE_LIMIT'])
 
     with app.app_context():
-        from .models import User, Player, Game, GamePlayer  # noqa
+        db_pool.instrument(db.engine)
+        from .models import (User, Player, Game, GameEventBatch, GamePlayer,  # noqa
+                             ShardGame, ShardState)
         db.create_all()
-
-        # Mark stale games abandoned so the lobby starts clean
-        Game.query.filter(Game.status.in_(['waiting', 'active'])).update(
-            {'status': 'abandoned'}, synchronize_session=False
-        )
-        db.session.commit()
-
-        # Seed players on first boot
-        if Player.query.count() == 0:
-            _seed_players()
-
-        # Build in-memory indexes and prompt pool
-        _rebuild_indexes(app)
-
-        # Register routes and socket handlers
+        from .migrations import ensure_schema
+        ensure_schema()
+
+        # Seed players on first boot, building the index straight from the
+        # seeded records instead of reading them back
+        seeded = None
+        if db.session.query(Player.id).first() is None:
+            seeded = _seed_players()
+
+        # Build in-memory indexes and prompt pool. The refresh token is read
+        # first: a refresh landing during the build only causes a rebuild.
+        global _players_version
+        _players_version = sharding.players_version()
+        _rebuild_indexes(app, seeded)
+
+        # Register routes
         from . import routes  # noqa
-        from . import sockets  # noqa
         app.register_blueprint(routes.bp)
+        if app.config['STATIC_FINGERPRINT']:
+            from . import assets
+            assets.init_app(app)
+
+        # Rebuild in-flight games from their event logs; abandon the rest
+        _restore_live_games(app)
+
+    socketio.start_background_task(sockets._reap_idle_games, app)
+    socketio.start_background_task(sockets._match_waiting, app)
+    if sharding.enabled():
+        socketio.start_background_task(sockets._sync_directory, app)
 
     return app
 
 
-def _seed_players():
+def _seed_players() -> list:
+    """Stream the bundled dataset into the players table with chunked Core
+    executemany inserts. Returns the records so the index can be built
+    without reading them back."""
+    from .dataset import iter_players
     from .models import Player
-    from .game_logic import clean_player_record
 
-    data_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), 'data', 'players_pl.json'
+    columns = ('name', 'name_key', 'country', 'positions', 'clubs', 'apps')
+    insert = Player.__table__.insert()
+    players, chunk = [], []
+    for record in iter_players():
+        players.append(record)
+        chunk.append({c: record[c] for c in columns})
+        if len(chunk) == SEED_CHUNK:
+            db.session.execute(insert, chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(insert, chunk)
+    db.session.commit()
+    return players
+
+
+def _restore_live_games(app):
+    """Replay the event log of every waiting/active game back into GAMES.
+
+    One streamed query walks all live games with their event batches in
+    order. A game is abandoned if its log is missing, has a gap, or does
+    not replay to a live session (e.g. rows written before event logging).
+    In a sharded deployment only the games this worker owns are touched.
+    """
+    from datetime import datetime
+    from .models import Game, GameEventBatch
+    from . import sharding
+    from .event_log import CREATE, iter_events, replay
+    from .game_manager import register_game
+    from .sockets import resume_game
+
+    rows = (
+        db.session.query(Game.id, Game.code, GameEventBatch.first_seq,
+                         GameEventBatch.count, GameEventBatch.payload)
+        .outerjoin(GameEventBatch, GameEventBatch.game_id == Game.id)
+        .filter(Game.status.in_(['waiting', 'active']))
+        .order_by(Game.id, GameEventBatch.first_seq)
+        .execution_options(yield_per=500)
     )
-    if not os.path.exists(data_path):
-        return
-
-    with open(data_path, 'r', encoding='utf-8') as f:
-        raw_players = json.load(f)
-
-    rows = []
-    for raw in raw_players:
-        c = clean_player_record(raw)
-        rows.append(Player(
-            name=c['name'],
-            name_key=c['name_key'],
-            country=c['country'],
-            positions=c['positions'],
-            clubs=c['clubs'],
-            apps=c['apps'],
-        ))
-    db.session.bulk_save_objects(rows)
+
+    restored, failed = [], []
+    for (game_id, code), batches in itertools.groupby(rows, key=lambda r: (r[0], r[1])):
+        if not sharding.owns(code):
+            continue
+        expected, chunks = 0, []
+        for row in batches:
+            if row.first_seq != expected:
+                break
+            expected += row.count
+            chunks.append(row.payload)
+        else:
+            try:
+                events = list(iter_events(chunks))
+                if events and events[0][0] == CREATE:
+                    game = replay(code, events)
+                    if game.status in ('waiting', 'active'):
+                        game.events_flushed = expected
+                        for seat in game.seats:
+                            seat.connected = seat.is_cpu
+                        restored.append(game)
+                        continue
+            except Exception:
+                app.logger.exception('Could not replay game %s', code)
+        failed.append(game_id)
+
+    for i in range(0, len(failed), 500):
+        Game.query.filter(Game.id.in_(failed[i:i + 500])).update(
+            {'status': 'abandoned', 'finished_at': datetime.utcnow()},
+            synchronize_session=False,
+        )
     db.session.commit()
 
+    for game in restored:
+        register_game(game)
+        resume_game(game, app)
+    if restored or failed:
+        app.logger.info(f'Restored {len(restored)} live games, abandoned {len(failed)}')
+
 
-def _rebuild_indexes(app):
+def _rebuild_indexes(app, player_dicts: list = None):
+    import json
+    from . import offload
     from .models import Player
-    from .game_logic import build_indexes, build_prompt_pool
-    from .game_manager import set_player_index
-
-    players = Player.query.all()
-    player_dicts = [
-        {
-            'name': p.name,
-            'name_key': p.name_key,
-            'country': p.country or '',
-            'positions': p.positions or '',
-            'clubs': p.clubs or '',
-            'apps': p.apps or 0,
-        }
-        for p in players
-    ]
-
-    idx = build_indexes(player_dicts)
-    pool = build_prompt_pool(idx)
+    from .game_logic import (apply_prompt_weights, build_indexes,
+                             build_name_dictionary, build_prompt_pool,
+                             weight_by_winnability)
+    from .game_manager import set_name_dictionary, set_player_index
+
+    if player_dicts is None:
+        rows = db.session.query(Player.name, Player.name_key, Player.country,
+                                Player.positions, Player.clubs, Player.apps)
+        player_dicts = [
+            {
+                'name': name,
+                'name_key': name_key,
+                'country': country or '',
+                'positions': positions or '',
+                'clubs': clubs or '',
+                'apps': apps or 0,
+            }
+            for name, name_key, country, positions, clubs, apps in rows
+        ]
+
+    # Index building is pure CPU work; keep it off the hub so sockets and
+    # turn timers keep running during an admin refresh.
+    idx = offload.run(build_indexes, player_dicts)
+    pool = offload.run(build_prompt_pool, idx)
+    built = len(pool)
+    pool = offload.run(weight_by_winnability, pool, idx, app.config['START_SCORE'],
+                       app.config['PROMPT_MIN_REACHABILITY'])
+    weights_path = app.config['PROMPT_WEIGHTS_FILE']
+    if weights_path and os.path.exists(weights_path):
+        with open(weights_path, encoding='utf-8') as f:
+            pool = apply_prompt_weights(pool, json.load(f))
     set_player_index(idx, pool)
-
-    app.logger.info(f'Player index built: {len(player_dicts)} players, {len(pool)} prompts in pool')
+    set_name_dictionary(*offload.run(build_name_dictionary, idx))
+
+    app.logger.info(f'Player index built: {len(player_dicts)} players, {len(pool)} prompts in pool '
+                    f'({built - len(pool)} pruned)')
+
+
+def _announce_players_refresh() -> None:
+    """Sharded only: after rebuilding from a refreshed players table, give
+    the other shards a new refresh token to catch up to. A fresh token per
+    refresh, since the name-dictionary version misses apps, clubs and
+    position changes."""
+    import secrets
+    from . import sharding
+    global _players_version
+    if sharding.enabled():
+        _players_version = secrets.token_hex(8)
+        sharding.set_players_version(_players_version)
+
+
+def _catch_up_players(app) -> bool:
+    """Sharded only: rebuild the indexes if an admin refresh on another
+    shard changed the players table since ours were built. Returns True
+    if they were rebuilt."""
+    from . import sharding
+    global _players_version
+
+    wanted = sharding.players_version()
+    if wanted is None or wanted == _players_version:
+        return False
+    with _rebuild_lock:
+        if wanted == _players_version:
+            return False        # rebuilt while we waited
+        _rebuild_indexes(app)
+        _players_version = wanted
+    return True
@@ -9,5 +9,61 @@ class Config:
         _db_url = _db_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = _db_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool (ignored for in-memory SQLite); see app.db_pool
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', '10'))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '15000'))
     START_SCORE = int(os.environ.get('START_SCORE', '501'))
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', '')
+    MAX_SPECTATORS = int(os.environ.get('MAX_SPECTATORS', '500'))
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'json')  # json | orjson
+    # Event log flush: every turn boundary, or sooner once this many events pile up
+    EVENT_FLUSH_BATCH = int(os.environ.get('EVENT_FLUSH_BATCH', '8'))
+    # Idle TTL (seconds since last player action) per session status
+    SESSION_TTLS = {
+        'waiting': int(os.environ.get('SESSION_TTL_WAITING', '900')),
+        'active': int(os.environ.get('SESSION_TTL_ACTIVE', '600')),
+        'finished': int(os.environ.get('SESSION_TTL_FINISHED', '120')),
+        'abandoned': int(os.environ.get('SESSION_TTL_ABANDONED', '60')),
+    }
+    REAPER_INTERVAL = int(os.environ.get('REAPER_INTERVAL', '15'))
+    MAX_LIVE_SESSIONS = int(os.environ.get('MAX_LIVE_SESSIONS', '20000'))
+    SESSION_EVICT_MIN_IDLE = int(os.environ.get('SESSION_EVICT_MIN_IDLE', '60'))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+    OFFLOAD_THREADS = int(os.environ.get('OFFLOAD_THREADS', '2'))
+    # Token buckets per user: action -> (tokens per second, burst)
+    RATE_LIMITS = {
+        'submit_player': (float(os.environ.get('SUBMIT_RATE', '2')),
+                          int(os.environ.get('SUBMIT_BURST', '5'))),
+        'player_search': (float(os.environ.get('SEARCH_RATE', '5')),
+                          int(os.environ.get('SEARCH_BURST', '15'))),
+    }
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '50000'))
+    SEND_QUEUE_LIMIT = int(os.environ.get('SEND_QUEUE_LIMIT', '256'))
+    # Serve static files under content-hashed names (restart to pick up edits)
+    STATIC_FINGERPRINT = os.environ.get('STATIC_FINGERPRINT', '1') == '1'
+    # {prompt key: weight} from scripts/simulate.py --weights; 0 drops a prompt
+    PROMPT_WEIGHTS_FILE = os.environ.get('PROMPT_WEIGHTS_FILE', '')
+    # Drop prompts whose endgame is winnable from fewer than this share of
+    # scores once answers run low (see game_logic.analyse_prompt)
+    PROMPT_MIN_REACHABILITY = float(os.environ.get('PROMPT_MIN_REACHABILITY', '0.2'))
+    # Emit turn_result / game_over / game_state separately instead of one
+    # game_update per action, for clients that predate game_update
+    LEGACY_SOCKET_EVENTS = os.environ.get('LEGACY_SOCKET_EVENTS', '0') == '1'
+    # Seconds between quick-match sweeps re-pairing players as their gap widens
+    MATCH_SWEEP_INTERVAL = float(os.environ.get('MATCH_SWEEP_INTERVAL', '1'))
+    # gevent (default, needs monkey-patching in run.py / wsgi.py) or threading
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'gevent')
+    # Per-game locks around session mutations: 1, 0 or auto (on unless the
+    # handlers are gevent greenlets under the GIL); see app.locks
+    GAME_LOCKS = os.environ.get('GAME_LOCKS', 'auto')
+    # Sharded deployment (scripts/run_shards.py): this worker's id and the
+    # number of workers. 0 workers = a single unsharded process
+    SHARD_COUNT = int(os.environ.get('SHARD_COUNT', '0'))
+    SHARD_ID = int(os.environ.get('SHARD_ID', '0'))
+    # Seconds between directory heartbeats / cross-shard lobby refreshes
+    DIRECTORY_INTERVAL = float(os.environ.get('DIRECTORY_INTERVAL', '2'))
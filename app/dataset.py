@@ -0,0 +1,71 @@
+"""Bundled player dataset: packed line-delimited format and streaming reader.
+
+The packed file (``players_pl.jsonl``) holds already-cleaned records. The
+first line is a header naming the columns; every following line is one
+compact JSON array in that column order:
+
+    {"format":"players/1","columns":["name","country","positions","clubs","apps"]}
+    ["Gareth Barry","ENG","MF","Aston Villa,Manchester City,Everton,West Brom",653]
+
+``name_key`` is not stored; readers derive it with ``normalize_name_key``
+so the packed file never goes stale when normalisation changes.
+"""
+import json
+import os
+
+from .game_logic import clean_player_record, normalize_name_key
+
+FORMAT = 'players/1'
+COLUMNS = ('name', 'country', 'positions', 'clubs', 'apps')
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+PACKED_PATH = os.path.join(DATA_DIR, 'players_pl.jsonl')
+JSON_PATH = os.path.join(DATA_DIR, 'players_pl.json')
+
+
+def write_packed(records, path: str) -> int:
+    """Write cleaned records (dicts with COLUMNS) to ``path``; returns count."""
+    n = 0
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'format': FORMAT, 'columns': COLUMNS},
+                           separators=(',', ':')) + '\n')
+        for r in records:
+            f.write(json.dumps([r[c] for c in COLUMNS], ensure_ascii=False,
+                               separators=(',', ':')) + '\n')
+            n += 1
+    os.replace(tmp, path)
+    return n
+
+
+def iter_packed(path: str):
+    """Yield cleaned player dicts from a packed file, one line at a time."""
+    with open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != FORMAT:
+            raise ValueError(f'{path}: unsupported dataset format {header.get("format")!r}')
+        columns = header['columns']
+        for line in f:
+            if line.strip():
+                record = dict(zip(columns, json.loads(line)))
+                record['name_key'] = normalize_name_key(record['name'])
+                yield record
+
+
+def iter_json(path: str):
+    """Yield cleaned player dicts from a raw JSON array (scraper/upload format)."""
+    with open(path, encoding='utf-8') as f:
+        raw_players = json.load(f)
+    for raw in raw_players:
+        yield clean_player_record(raw)
+
+
+def iter_players(path: str = None):
+    """Stream the bundled dataset, preferring the packed file."""
+    if path is None:
+        path = PACKED_PATH if os.path.exists(PACKED_PATH) else JSON_PATH
+    if not os.path.exists(path):
+        return iter(())
+    if path.endswith('.jsonl'):
+        return iter_packed(path)
+    return iter_json(path)
@@ -0,0 +1,108 @@
+"""Connection pool setup: cooperative psycopg2 and pool metrics.
+
+psycopg2 talks to the server from C, so under gevent a slow query would
+block the hub and every other greenlet with it. ``make_psycopg2_cooperative``
+installs a wait callback that puts connections in async mode and parks
+the calling greenlet on the socket instead.
+"""
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from . import metrics
+
+
+# ---------------------------------------------------------------------------
+# Cooperative psycopg2
+# ---------------------------------------------------------------------------
+
+def gevent_wait_callback(conn, timeout=None) -> None:
+    """psycopg2 wait callback that yields to the gevent hub while waiting."""
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f'Bad result from poll: {state!r}')
+
+
+def make_psycopg2_cooperative() -> bool:
+    """Install the gevent wait callback. Returns False without psycopg2."""
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Pool configuration and metrics
+# ---------------------------------------------------------------------------
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a slot."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe('db_pool.checkout_wait', time.perf_counter() - t0)
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ('sqlite://', 'sqlite:///:memory:')
+
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URL."""
+    url = config['SQLALCHEMY_DATABASE_URI']
+    if _is_memory_sqlite(url):
+        return {}  # a single shared connection; pool settings don't apply
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if url.startswith('postgresql'):
+        options['connect_args'] = {
+            'connect_timeout': config['DB_CONNECT_TIMEOUT'],
+            'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}",
+        }
+    return options
+
+
+def instrument(engine) -> None:
+    """Track connections in use and opened on ``engine``'s pool."""
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_conn, record):
+        metrics.incr('db_pool.connections_opened')
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_conn, record, proxy):
+        metrics.gauge_add('db_pool.in_use', 1)
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(dbapi_conn, record):
+        metrics.gauge_add('db_pool.in_use', -1)
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(),
+                      overflow=pool.overflow(), idle=pool.checkedin())
+    return status
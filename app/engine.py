@@ -0,0 +1,148 @@
+"""Headless game state machine — no Flask, socket or DB imports.
+
+``GameEngine`` applies one command (start, submit, cpu_move, timeout,
+leave) to a GameSession, records it in the event log and returns what
+happened as a list of short tuples. The socket layer turns those into
+emits, timers and persistence; simulations and tests just read them.
+
+    (TURN, seat, outcome, name, points, player)
+    (NEXT_TURN, seat, turn_seq)
+    (GAME_OVER, winner_seat, abandoned)
+    (ABANDONED,)
+
+``name`` is the submitted text (or 'Timeout' / '—'), ``player`` the
+matched player dict or None.
+"""
+import time
+
+from . import event_log
+from .game_logic import Outcome, cpu_pick, evaluate_submission
+from .game_manager import TURN_SECONDS, start_turn_timer
+
+TURN = 'turn'
+NEXT_TURN = 'next_turn'
+GAME_OVER = 'game_over'
+ABANDONED = 'abandoned'
+
+FORFEITS = frozenset({Outcome.NOT_FOUND, Outcome.NOT_MATCHING, Outcome.OVER_180,
+                      Outcome.INVALID_DART_SCORE, Outcome.ALREADY_USED})
+
+
+class MoveError(Exception):
+    """A command that isn't legal in the game's current state."""
+
+
+class GameEngine:
+    """Rules for one player index. Holds no per-game state, so one engine
+    can drive any number of sessions. ``clock`` stamps turn deadlines."""
+    __slots__ = ('index', 'pick', 'clock')
+
+    def __init__(self, index, pick=cpu_pick, clock=time.time):
+        self.index = index
+        self.pick = pick
+        self.clock = clock
+
+    def start(self, game) -> list:
+        """Move a seated game to active and open the first turn."""
+        game.status = 'active'
+        start_turn_timer(game)
+        return [(NEXT_TURN, game.current_turn, game.turn_seq)]
+
+    def submit(self, game, seat_idx: int, name: str) -> list:
+        if game.status != 'active':
+            raise MoveError('Game not active.')
+        if seat_idx != game.current_turn:
+            raise MoveError("It's not your turn.")
+
+        seat = game.seats[seat_idx]
+        outcome, points, player = evaluate_submission(
+            seat.score, name, game.used_players, game.prompt, self.index
+        )
+        if outcome in FORFEITS:
+            seat.take_turn(name, 'X')
+            game.log(event_log.SUBMIT, seat_idx, outcome, name, 'X', None)
+        elif outcome == Outcome.BUST:
+            seat.take_turn(player['name'], 'BUST')
+            game.log(event_log.SUBMIT, seat_idx, outcome, player['name'], 'BUST',
+                     player['name_key'])
+        else:
+            game.use_player(player['name_key'], points)
+            seat.take_turn(player['name'], points)
+            game.log(event_log.SUBMIT, seat_idx, outcome, player['name'], points,
+                     player['name_key'])
+
+        turn = (TURN, seat_idx, outcome, name, points, player)
+        if outcome == Outcome.WIN:
+            return [turn, self._finish(game, seat_idx)]
+        return [turn, self._advance(game)]
+
+    def cpu_move(self, game, turn_seq: int = None) -> list:
+        """Play the current CPU seat. A no-op (``[]``) unless the game is
+        active, it is a CPU's turn and ``turn_seq`` (if given) is current."""
+        if not self._is_current(game, turn_seq):
+            return []
+        seat_idx = game.current_turn
+        seat = game.seats[seat_idx]
+        if not seat.is_cpu:
+            return []
+
+        player = self.pick(seat.score, game.used_players, game.prompt, self.index,
+                           seat.cpu_difficulty)
+        if player is None:
+            seat.take_turn('—', 'X')
+            game.log(event_log.CPU_MOVE, seat_idx, '—', 'X', None)
+            return [(TURN, seat_idx, Outcome.NO_PICK, '—', 0, None), self._advance(game)]
+
+        apps = player['apps']
+        game.use_player(player['name_key'], apps)
+        seat.take_turn(player['name'], apps)
+        game.log(event_log.CPU_MOVE, seat_idx, player['name'], apps, player['name_key'])
+        if -20 <= seat.score <= 0:
+            return [(TURN, seat_idx, Outcome.WIN, player['name'], apps, player),
+                    self._finish(game, seat_idx)]
+        return [(TURN, seat_idx, Outcome.SCORED, player['name'], apps, player),
+                self._advance(game)]
+
+    def timeout(self, game, turn_seq: int = None) -> list:
+        """Forfeit the current human turn. A no-op when the turn has moved
+        on since ``turn_seq`` or belongs to a CPU."""
+        if not self._is_current(game, turn_seq):
+            return []
+        seat_idx = game.current_turn
+        seat = game.seats[seat_idx]
+        if seat.is_cpu:
+            return []
+
+        seat.take_turn('Timeout', 'X')
+        game.log(event_log.TIMEOUT, seat_idx)
+        return [(TURN, seat_idx, Outcome.TIMEOUT, 'Timeout', 0, None), self._advance(game)]
+
+    def leave(self, game, seat_idx: int) -> list:
+        """A seated player quits. Multiplayer opponents win by forfeit; a solo
+        or not-yet-started game is abandoned."""
+        game.log(event_log.LEAVE, seat_idx)
+        if game.status == 'waiting' or (game.status == 'active' and game.is_solo):
+            game.end('abandoned')
+            return [(ABANDONED,)]
+        if game.status == 'active':
+            winner = 1 - seat_idx
+            if winner < len(game.seats):
+                # Credit the win: _record_game_players reads it from the score
+                game.seats[winner].score = 0
+                return [self._finish(game, winner, abandoned=True)]
+        return []
+
+    # -- internals ----------------------------------------------------------
+
+    @staticmethod
+    def _is_current(game, turn_seq) -> bool:
+        return game.status == 'active' and (turn_seq is None or turn_seq == game.turn_seq)
+
+    def _advance(self, game) -> tuple:
+        game.advance_turn(self.clock() + TURN_SECONDS)
+        return (NEXT_TURN, game.current_turn, game.turn_seq)
+
+    @staticmethod
+    def _finish(game, winner_seat: int, abandoned: bool = False) -> tuple:
+        game.end('finished')
+        return (GAME_OVER, winner_seat, abandoned)
@@ -0,0 +1,95 @@
+"""Append-only per-game event log — no Flask or DB imports.
+
+Every change to a GameSession is recorded as a short tuple whose first
+element is the event kind. Batches are stored as newline-delimited compact
+JSON arrays, and ``replay`` rebuilds a session snapshot from them.
+
+    (CREATE, code)
+    (PROMPT, {type, club, club_key, country, position, text, answer_count})
+    (JOIN, user_id, username, score, is_cpu, cpu_difficulty)
+    (TURN, turn_seq, deadline_epoch)
+    (SUBMIT, seat, outcome, name, result, name_key)
+    (CPU_MOVE, seat, name, result, name_key)
+    (TIMEOUT, seat)
+    (LEAVE, seat)
+    (END, status, final_scores)
+
+``result`` is the history value: points, 'X' or 'BUST'.
+"""
+import json
+
+CREATE = 'c'
+PROMPT = 'p'
+JOIN = 'j'
+TURN = 't'
+SUBMIT = 's'
+CPU_MOVE = 'm'
+TIMEOUT = 'o'
+LEAVE = 'l'
+END = 'e'
+
+
+def encode_batch(events) -> str:
+    return '\n'.join(json.dumps(list(e), ensure_ascii=False, separators=(',', ':'))
+                     for e in events)
+
+
+def iter_events(chunks):
+    """Yield decoded events from an iterable of encoded batches."""
+    for chunk in chunks:
+        for line in chunk.split('\n'):
+            if line:
+                yield json.loads(line)
+
+
+def _score_turn(game, seat_idx: int, name: str, result, name_key) -> None:
+    seat = game.seats[seat_idx]
+    if result not in ('X', 'BUST'):
+        game.use_player(name_key, result)
+    seat.take_turn(name, result)
+    if seat.score > 0 or result in ('X', 'BUST'):
+        game.current_turn = (game.current_turn + 1) % 2
+
+
+def apply(game, event) -> None:
+    """Apply one decoded event to ``game``."""
+    from .game_logic import Prompt
+    from .game_manager import Seat
+
+    kind = event[0]
+    if kind == PROMPT:
+        game.prompt = Prompt(**event[1])
+    elif kind == JOIN:
+        _, user_id, username, score, is_cpu, difficulty = event
+        game.seats.append(Seat(user_id=user_id, username=username, score=score,
+                               is_cpu=is_cpu, cpu_difficulty=difficulty))
+        if is_cpu:
+            game.is_solo = True
+        if len(game.seats) == 2:
+            game.status = 'active'
+    elif kind == TURN:
+        game.turn_seq, game.deadline_epoch = event[1], event[2]
+    elif kind == SUBMIT:
+        _, seat_idx, _outcome, name, result, name_key = event
+        _score_turn(game, seat_idx, name, result, name_key)
+    elif kind == CPU_MOVE:
+        _, seat_idx, name, result, name_key = event
+        _score_turn(game, seat_idx, name, result, name_key)
+    elif kind == TIMEOUT:
+        _score_turn(game, event[1], 'Timeout', 'X', None)
+    elif kind == END:
+        game.status = event[1]
+        game.deadline_epoch = 0.0
+        for seat, score in zip(game.seats, event[2]):
+            seat.score = score
+    # CREATE and LEAVE carry no state beyond what follows them
+
+
+def replay(code: str, events):
+    """Rebuild a GameSession from decoded events, without registering it."""
+    from .game_manager import GameSession
+
+    game = GameSession(code=code)
+    for event in events:
+        apply(game, event)
+    return game
@@ -1,8 +1,12 @@
 """Pure game logic — no Flask or DB imports."""
+import gzip
+import hashlib
+import json
 import random
 import unicodedata
-import re
+from bisect import bisect_right
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 
 
@@ -14,15 +18,12 @@ def _build_valid_dart_scores() -> frozenset:
     singles = list(range(21)) + [25]
     doubles = [2 * n for n in range(1, 21)] + [50]
     triples = [3 * n for n in range(1, 21)]
-    all_values = singles + doubles + triples
-    valid = set()
-    for a in all_values:
-        for b in all_values:
-            for c in all_values:
-                t = a + b + c
-                if t <= 180:
-                    valid.add(t)
-    return frozenset(valid)
+    darts = set(singles + doubles + triples)
+    # Add one dart at a time over the distinct totals reached so far
+    totals = {0}
+    for _ in range(3):
+        totals = {t + d for t in totals for d in darts if t + d <= 180}
+    return frozenset(totals)
 
 
 VALID_DART_SCORES: frozenset = _build_valid_dart_scores()
@@ -59,10 +60,33 @@ VALID_POSITIONS = frozenset(POSITION_NAMES.keys())
 # Name normalisation
 # ---------------------------------------------------------------------------
 
+# Letters NFKD does not decompose, which would otherwise be dropped by the
+# ASCII step ("Ødegaard" -> "degaard"), plus typographic punctuation.
+_TRANSLIT_MAP = {
+    'Ø': 'O', 'ø': 'o', 'Ł': 'L', 'ł': 'l', 'Đ': 'D', 'đ': 'd', 'Ð': 'D', 'ð': 'd',
+    'Þ': 'Th', 'þ': 'th', 'Æ': 'AE', 'æ': 'ae', 'Œ': 'OE', 'œ': 'oe', 'ß': 'ss',
+    'ẞ': 'SS', 'Ħ': 'H', 'ħ': 'h', 'Ŧ': 'T', 'ŧ': 't', 'Ŋ': 'N', 'ŋ': 'n',
+    'ı': 'i', 'ĸ': 'k', 'ſ': 's', 'Ŀ': 'L', 'ŀ': 'l', 'Ĳ': 'IJ', 'ĳ': 'ij',
+    'Ə': 'E', 'ə': 'e', 'Ɖ': 'D', 'ɖ': 'd', 'Ƒ': 'F', 'ƒ': 'f',
+    '‘': "'", '’': "'", 'ʼ': "'", '`': "'", '´': "'",
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-',
+}
+_TRANSLIT = str.maketrans(_TRANSLIT_MAP)
+# The ASCII entries ("`"), so pure-ASCII names fold the same punctuation
+_ASCII_FOLD = str.maketrans({c: r for c, r in _TRANSLIT_MAP.items() if c.isascii()})
+
+NAME_KEY_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=NAME_KEY_CACHE_SIZE)
 def normalize_name_key(name: str) -> str:
-    nfkd = unicodedata.normalize('NFKD', name)
-    ascii_str = nfkd.encode('ASCII', 'ignore').decode('ASCII')
-    return re.sub(r'\s+', ' ', ascii_str).strip().lower()
+    """Case-, accent- and whitespace-insensitive key for a player name."""
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name).translate(_TRANSLIT)
+        name = name.encode('ASCII', 'ignore').decode('ASCII')
+    else:
+        name = name.translate(_ASCII_FOLD)
+    return ' '.join(name.split()).lower()
 
 
 # ---------------------------------------------------------------------------
@@ -95,6 +119,10 @@ def clean_player_record(raw: dict) -> dict:
     }
 
 
+def clean_player_records(raws: list) -> list:
+    return [clean_player_record(raw) for raw in raws]
+
+
 # ---------------------------------------------------------------------------
 # Indexes
 # ---------------------------------------------------------------------------
@@ -107,6 +135,9 @@ class PlayerIndex:
     by_position: dict    # position -> set of name_keys
     playable: frozenset  # name_keys with apps<=180 and in VALID_DART_SCORES
     club_display: dict   # club_lower -> display name
+    answers: dict = field(default_factory=dict)   # prompt key -> prompt_answers()
+    playable_answers: dict = field(default_factory=dict)  # -> playable_answers()
+    analysis: dict = field(default_factory=dict)  # (prompt key, start) -> PromptAnalysis
 
 
 def build_indexes(players: list) -> PlayerIndex:
@@ -118,7 +149,11 @@ def build_indexes(players: list) -> PlayerIndex:
     club_display: dict = {}
 
     for p in players:
-        nk = p['name_key']
+        # Stored keys may predate the current normaliser; re-derive them so
+        # lookups and the index always agree.
+        nk = normalize_name_key(p['name'])
+        if p.get('name_key') != nk:
+            p = {**p, 'name_key': nk}
         by_name_key[nk] = p
 
         for club in p['clubs'].split(','):
@@ -144,6 +179,22 @@ def build_indexes(players: list) -> PlayerIndex:
                        frozenset(playable), club_display)
 
 
+# ---------------------------------------------------------------------------
+# Client name dictionary
+# ---------------------------------------------------------------------------
+
+def build_name_dictionary(index: PlayerIndex) -> tuple:
+    """Gzipped JSON list of every player name, for client-side autocomplete.
+
+    Returns ``(version, body)``; the version is a hash of the body, so it
+    changes exactly when the names do and can key an immutable URL.
+    """
+    names = sorted(p['name'] for p in index.by_name_key.values())
+    raw = json.dumps(names, ensure_ascii=False, separators=(',', ':')).encode()
+    body = gzip.compress(raw, compresslevel=9, mtime=0)
+    return hashlib.sha256(raw).hexdigest()[:16], body
+
+
 # ---------------------------------------------------------------------------
 # Prompt pool
 # ---------------------------------------------------------------------------
@@ -157,20 +208,46 @@ class Prompt:
     position: str    # GK/DF/MF/FW or ''
     text: str        # human-readable prompt text
     answer_count: int
+    weight: float = 1.0  # relative chance assign_prompt picks it
 
+    @property
+    def key(self) -> str:
+        """Stable identifier, used by simulation reports and weight files."""
+        return f'{self.type}:{self.club_key}:{self.country}:{self.position}'
 
-def _valid_answer_count(index: PlayerIndex, ptype: str, club_key: str,
-                        country: str, position: str) -> int:
+
+def _candidates(index: PlayerIndex, ptype: str, club_key: str,
+                country: str, position: str) -> set:
     if ptype == 'club_position':
-        candidates = (index.by_club.get(club_key, set())
-                      & index.by_position.get(position, set()))
+        return (index.by_club.get(club_key, set())
+                & index.by_position.get(position, set()))
     elif ptype == 'country_position':
-        candidates = (index.by_country.get(country, set())
-                      & index.by_position.get(position, set()))
+        return (index.by_country.get(country, set())
+                & index.by_position.get(position, set()))
     else:  # country_club
-        candidates = (index.by_country.get(country, set())
-                      & index.by_club.get(club_key, set()))
-    return len(candidates & index.playable)
+        return (index.by_country.get(country, set())
+                & index.by_club.get(club_key, set()))
+
+
+def _valid_answer_count(index: PlayerIndex, ptype: str, club_key: str,
+                        country: str, position: str) -> int:
+    return len(_candidates(index, ptype, club_key, country, position) & index.playable)
+
+
+def prompt_answers(index: PlayerIndex, prompt: Prompt) -> dict:
+    """name_key -> player for every player matching ``prompt`` (playable or
+    not), in index order. Built once per prompt and cached on the index."""
+    answers = index.answers.get(prompt.key)
+    if answers is None:
+        # The set indexes also hold keys of same-named players that
+        # by_name_key shadows, so confirm each candidate against its record.
+        keys = _candidates(index, prompt.type, prompt.club_key, prompt.country,
+                           prompt.position)
+        answers = index.answers[prompt.key] = {
+            nk: p for nk, p in index.by_name_key.items()
+            if nk in keys and matches_prompt(p, prompt)
+        }
+    return answers
 
 
 def build_prompt_pool(index: PlayerIndex, min_answers: int = 30) -> list:
@@ -222,6 +299,19 @@ def build_prompt_pool(index: PlayerIndex, min_answers: int = 30) -> list:
     return pool
 
 
+def apply_prompt_weights(pool: list, weights: dict) -> list:
+    """Set each prompt's weight from ``{prompt.key: weight}`` (e.g. written
+    by scripts/simulate.py). Prompts weighted 0 are dropped; prompts not
+    listed keep their weight."""
+    weighted = []
+    for p in pool:
+        w = float(weights.get(p.key, p.weight))
+        if w > 0:
+            p.weight = w
+            weighted.append(p)
+    return weighted
+
+
 # ---------------------------------------------------------------------------
 # Submission evaluation
 # ---------------------------------------------------------------------------
@@ -235,6 +325,9 @@ class Outcome:
     BUST = 'bust'
     SCORED = 'scored'
     WIN = 'win'
+    # Turn outcomes that don't come from a submission
+    TIMEOUT = 'timeout'
+    NO_PICK = 'forfeit'    # CPU had no valid answer
 
 
 def matches_prompt(player: dict, prompt: Prompt) -> bool:
@@ -261,7 +354,7 @@ def evaluate_submission(current_score: int, name: str, used: set,
     if name_key in used:
         return Outcome.ALREADY_USED, 0, player
 
-    if not matches_prompt(player, prompt):
+    if name_key not in prompt_answers(index, prompt):
         return Outcome.NOT_MATCHING, 0, player
 
     apps = player['apps']
@@ -281,36 +374,152 @@ def evaluate_submission(current_score: int, name: str, used: set,
     return Outcome.SCORED, apps, player
 
 
+def playable_answers(index: PlayerIndex, prompt: Prompt) -> tuple:
+    """``(apps, players)``: the prompt's answers with a valid dart score,
+    sorted by apps (ties in index order), plus their apps as a parallel
+    list for bisecting. Cached on the index."""
+    cached = index.playable_answers.get(prompt.key)
+    if cached is None:
+        players = sorted((p for p in prompt_answers(index, prompt).values()
+                          if p['apps'] <= 180 and p['apps'] in VALID_DART_SCORES),
+                         key=lambda p: p['apps'])
+        cached = index.playable_answers[prompt.key] = ([p['apps'] for p in players],
+                                                       players)
+    return cached
+
+
 # ---------------------------------------------------------------------------
 # CPU opponent
 # ---------------------------------------------------------------------------
 
 def cpu_pick(current_score: int, used: set, prompt: Prompt,
-             index: PlayerIndex, difficulty: str):
-    """Pick a valid player for the CPU. Returns player dict or None (no valid pick)."""
-    candidates = []
-    for player in index.by_name_key.values():
-        if player['name_key'] in used:
-            continue
-        if player['apps'] > 180 or player['apps'] not in VALID_DART_SCORES:
-            continue
-        if not matches_prompt(player, prompt):
-            continue
-        if current_score - player['apps'] < -20:
-            continue  # would bust
-        candidates.append(player)
+             index: PlayerIndex, difficulty: str, rng=random):
+    """Pick a valid player for the CPU. Returns player dict or None (no valid pick).
+    Pass a seeded ``random.Random`` as ``rng`` for reproducible play."""
+    apps, players = playable_answers(index, prompt)
+    # Sorted by apps, so the answers that don't bust are a prefix
+    end = bisect_right(apps, current_score + 20)
+    candidates = [players[i] for i in range(end) if players[i]['name_key'] not in used]
 
     if not candidates:
         return None
 
     if difficulty == 'easy':
         # Pick randomly from the lower-apps half — slow, beatable progress
-        candidates.sort(key=lambda p: p['apps'])
         pool = candidates[:max(1, len(candidates) // 2)]
-        return random.choice(pool)
+        return rng.choice(pool)
 
     # hard: win immediately if possible, otherwise take the biggest chunk
     winning = [p for p in candidates if -20 <= current_score - p['apps'] <= 0]
     if winning:
         return min(winning, key=lambda p: abs(current_score - p['apps']))
     return max(candidates, key=lambda p: p['apps'])
+
+
+# ---------------------------------------------------------------------------
+# Winnability analysis
+# ---------------------------------------------------------------------------
+
+ENDGAME = 60  # remaining scores the analysis treats as the endgame
+
+
+def winnable_scores(apps, limit: int) -> int:
+    """Bitset of remaining scores: bit ``s`` is set when some subset of
+    ``apps`` (each answer usable once) sums to s..s+20, i.e. a player on
+    ``s`` can still land in the −20..0 window. Covers scores up to ``limit``.
+
+    Subset-sum DP on a Python int: bit n of ``sums`` means n is reachable.
+    """
+    mask = (1 << (limit + 21)) - 1
+    sums = 1
+    for a in apps:
+        sums = (sums | (sums << a)) & mask
+    # Fold each bit down over the 21 scores it can finish from
+    for shift in (1, 2, 4, 8, 5):
+        sums |= sums >> shift
+    return sums & ~1  # a score of 0 has already finished
+
+
+@dataclass(frozen=True)
+class PromptAnalysis:
+    winnable: int   # winnable_scores() over the prompt's playable answers
+    depleted: int   # the same once a typical game's answers are used up
+    endgame: float  # share of scores 1..ENDGAME still winnable when depleted
+
+
+def analyse_prompt(index: PlayerIndex, prompt: Prompt, start_score: int,
+                   used: set = None) -> PromptAnalysis:
+    """Winnability of ``prompt`` with the answers in ``used`` excluded.
+
+    Answers get used up as a game goes on, and low-apps ones (the endgame
+    finishers) go first. ``depleted`` models that by dropping the smallest
+    answers until both seats could have scored down to ENDGAME. Results
+    for ``used=None`` are cached on the index.
+    """
+    cache_key = (prompt.key, start_score)
+    if not used and cache_key in index.analysis:
+        return index.analysis[cache_key]
+
+    apps, players = playable_answers(index, prompt)
+    if used:
+        apps = [a for a, p in zip(apps, players) if p['name_key'] not in used]
+
+    spent, k = 2 * max(0, start_score - ENDGAME), 0
+    while spent > 0 and k < len(apps):
+        spent -= apps[k]
+        k += 1
+    depleted = winnable_scores(apps[k:], start_score)
+    endgame = bin(depleted & ((1 << (ENDGAME + 1)) - 1)).count('1') / ENDGAME
+    result = PromptAnalysis(winnable_scores(apps, start_score), depleted, endgame)
+    if not used:
+        index.analysis[cache_key] = result
+    return result
+
+
+def weight_by_winnability(pool: list, index: PlayerIndex, start_score: int,
+                          min_endgame: float) -> list:
+    """Scale each prompt's weight by its endgame winnability and drop those
+    below ``min_endgame``, so prompts that stall endgames come up rarely
+    or not at all."""
+    kept = []
+    for p in pool:
+        endgame = analyse_prompt(index, p, start_score).endgame
+        if endgame >= min_endgame:
+            p.weight *= endgame
+            kept.append(p)
+    return kept
+
+
+# ---------------------------------------------------------------------------
+# Remaining answers
+# ---------------------------------------------------------------------------
+
+class AnswerCounter:
+    """Apps histogram of a game's unused playable answers.
+
+    Built once per game from the prompt's answers and decremented as
+    players are used, so both counts below are cheap to read per broadcast.
+    """
+    __slots__ = ('hist', 'total')
+
+    def __init__(self, apps):
+        self.hist = [0] * 181
+        for a in apps:
+            self.hist[a] += 1
+        self.total = sum(self.hist)
+
+    @classmethod
+    def for_prompt(cls, index: PlayerIndex, prompt: Prompt, used=()) -> 'AnswerCounter':
+        apps, players = playable_answers(index, prompt)
+        return cls(a for a, p in zip(apps, players) if p['name_key'] not in used)
+
+    def remove(self, apps: int) -> None:
+        if 0 <= apps <= 180 and self.hist[apps]:
+            self.hist[apps] -= 1
+            self.total -= 1
+
+    def finishing(self, score: int) -> int:
+        """Unused answers that take ``score`` into the −20..0 window."""
+        if score <= 0:
+            return 0
+        return sum(self.hist[score:score + 21])
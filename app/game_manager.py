@@ -1,18 +1,27 @@
 """In-memory game session management. Single-worker safe."""
+import itertools
 import random
+import sys
 import time
 import uuid
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+from . import event_log, locks, sharding, wire
+
 _player_index = None
 _prompt_pool: list = []
+_prompt_cum_weights: list = []
+_name_dictionary: tuple = ('', b'')  # (version, gzipped JSON names)
 
 
 def set_player_index(index, pool: list) -> None:
-    global _player_index, _prompt_pool
+    global _player_index, _prompt_pool, _prompt_cum_weights
     _player_index = index
     _prompt_pool = pool
+    _prompt_cum_weights = list(itertools.accumulate(p.weight for p in pool))
 
 
 def get_player_index():
@@ -23,6 +32,107 @@ def get_prompt_pool() -> list:
     return _prompt_pool
 
 
+def set_name_dictionary(version: str, body: bytes) -> None:
+    global _name_dictionary
+    _name_dictionary = (version, body)
+
+
+def get_name_dictionary() -> tuple:
+    return _name_dictionary
+
+
+# ---------------------------------------------------------------------------
+# Seat history
+# ---------------------------------------------------------------------------
+
+# Result codes: 0..180 are points scored, negatives are non-scoring turns.
+RESULT_X = -1
+RESULT_BUST = -2
+RESULT_TIMEOUT = -3
+
+_CODE_RESULTS = {RESULT_X: 'X', RESULT_BUST: 'BUST', RESULT_TIMEOUT: 'X'}
+
+# Process-wide intern table for player names. Only names that scored or bust
+# (i.e. real players) are added, so it is bounded by the player dataset;
+# free-text forfeits stay local to their history.
+_NAMES: list = ['Timeout', '—']
+_NAME_IDS: dict = {'Timeout': 0, '—': 1}
+
+# Shared wire dicts for (name_id, code) pairs of interned names. Consumers
+# only ever serialise these, never mutate them.
+_ENTRIES: dict = {}
+
+
+def _intern(name: str) -> int:
+    nid = _NAME_IDS.get(name)
+    if nid is None:
+        with locks.registry():
+            nid = _NAME_IDS.get(name)
+            if nid is None:
+                nid = _NAME_IDS[name] = len(_NAMES)
+                _NAMES.append(name)
+    return nid
+
+
+class SeatHistory:
+    """Compact per-seat turn history.
+
+    Stored as two parallel arrays (name id, result code) instead of a list
+    of dicts. Negative name ids index a small per-history list of free-text
+    names. The wire format (``[{'name': ..., 'result': ...}]``) is
+    materialised lazily: entries added since the last call are appended to
+    a list, and the tuple handed out is frozen from it once per length.
+    """
+    __slots__ = ('_names', '_codes', '_extra', '_entries', '_wire')
+
+    def __init__(self):
+        self._names = array('i')
+        self._codes = array('h')
+        self._extra = None
+        self._entries = []
+        self._wire = ()
+
+    def append(self, name: str, result) -> None:
+        if result == 'X':
+            code = RESULT_TIMEOUT if name == 'Timeout' else RESULT_X
+            nid = _NAME_IDS.get(name)
+            if nid is None:
+                if self._extra is None:
+                    self._extra = []
+                self._extra.append(name)
+                nid = -len(self._extra)
+        else:
+            code = RESULT_BUST if result == 'BUST' else int(result)
+            nid = _intern(name)
+        self._names.append(nid)
+        self._codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __iter__(self):
+        return iter(self.to_wire())
+
+    def _entry(self, nid: int, code: int) -> dict:
+        if nid < 0:
+            return {'name': self._extra[-nid - 1], 'result': _CODE_RESULTS[code]}
+        entry = _ENTRIES.get((nid, code))
+        if entry is None:
+            entry = _ENTRIES[(nid, code)] = {
+                'name': _NAMES[nid],
+                'result': _CODE_RESULTS.get(code, code),
+            }
+        return entry
+
+    def to_wire(self) -> tuple:
+        entries = self._entries
+        if len(entries) < len(self._codes):
+            entries.extend(self._entry(self._names[i], self._codes[i])
+                           for i in range(len(entries), len(self._codes)))
+            self._wire = tuple(entries)
+        return self._wire
+
+
 # ---------------------------------------------------------------------------
 # Data structures
 # ---------------------------------------------------------------------------
@@ -35,10 +145,38 @@ class Seat:
     turns_taken: int = 0
     forfeit_count: int = 0
     connected: bool = True
-    history: list = field(default_factory=list)
+    history: SeatHistory = field(default_factory=SeatHistory)
     is_cpu: bool = False
     cpu_difficulty: Optional[str] = None  # 'easy' | 'hard' | None
 
+    _version = 0  # bumped on every public attribute write
+
+    def __setattr__(self, name, value):
+        # Plain fields, no descriptors: writing __dict__ directly halves the
+        # cost of the hot-path score/turn updates.
+        d = self.__dict__
+        d[name] = value
+        if name[0] != '_':
+            d['_version'] = self._version + 1
+
+    def record(self, name: str, result) -> None:
+        """Append a turn to the history. Use this rather than mutating
+        ``history`` directly so cached game snapshots are invalidated."""
+        self.history.append(name, result)
+        self.__dict__['_version'] = self._version + 1
+
+    def take_turn(self, name: str, result) -> None:
+        """Count and record one turn. ``result`` is the points scored (taken
+        off the score) or 'X' / 'BUST' for a forfeit. One version bump."""
+        d = self.__dict__
+        d['turns_taken'] = self.turns_taken + 1
+        if result == 'X' or result == 'BUST':
+            d['forfeit_count'] = self.forfeit_count + 1
+        else:
+            d['score'] = self.score - result
+        self.history.append(name, result)
+        d['_version'] = self._version + 1
+
 
 @dataclass
 class GameSession:
@@ -47,13 +185,54 @@ class GameSession:
     current_turn: int = 0
     status: str = 'waiting'   # waiting | active | finished | abandoned
     prompt = None
+    answers = None   # AnswerCounter over the prompt's unused answers, see count_answers
     used_players: set = field(default_factory=set)
     turn_seq: int = 0
     deadline_epoch: float = 0.0
     disconnect_seq: Dict[int, int] = field(default_factory=dict)  # seat -> seq
     is_solo: bool = False
+    spectators: set = field(default_factory=set)  # socket sids, read-only
+    pending_events: list = field(default_factory=list)  # not yet flushed
+    events_flushed: int = 0
+
+    # Snapshot cache, keyed on the game and seat versions. Underscored
+    # attributes and _UNVERSIONED fields are not part of the wire state and
+    # never bump the version.
+    _UNVERSIONED = frozenset({'spectators', 'pending_events', 'events_flushed'})
+    _version = 0
+    _snapshot_key = None
+    _snapshot = None
+    _encoded_key = None
+    _encoded = None
+    _activity_status = None  # bucket this game sits in within _ACTIVITY
+
+    def __setattr__(self, name, value):
+        d = self.__dict__
+        d[name] = value
+        if name[0] != '_' and name not in self._UNVERSIONED:
+            d['_version'] = self._version + 1
+
+    def _state_key(self) -> tuple:
+        return (self._version,) + tuple(s._version for s in self.seats)
 
     def to_dict(self) -> dict:
+        """Wire snapshot of the game. Cached until the next mutation, so
+        callers must treat the returned dict as read-only."""
+        key = self._state_key()
+        if self._snapshot_key != key:
+            self._snapshot = self._build_dict()
+            self._snapshot_key = key
+        return self._snapshot
+
+    def encoded_state(self) -> wire.RawJSON:
+        """``to_dict()`` pre-encoded as JSON, shared by every consumer."""
+        key = self._state_key()
+        if self._encoded_key != key:
+            self._encoded = wire.encode(self.to_dict())
+            self._encoded_key = key
+        return self._encoded
+
+    def _build_dict(self) -> dict:
         return {
             'code': self.code,
             'status': self.status,
@@ -64,7 +243,7 @@ class GameSession:
                     'seat': i,
                     'score': s.score,
                     'connected': s.connected,
-                    'history': list(s.history),
+                    'history': s.history.to_wire(),
                     'is_cpu': s.is_cpu,
                 }
                 for i, s in enumerate(self.seats)
@@ -79,35 +258,220 @@ class GameSession:
             } if self.prompt else None,
             'deadline_epoch': self.deadline_epoch,
             'turn_seq': self.turn_seq,
+            **self._answer_hints(),
         }
 
+    def _answer_hints(self) -> dict:
+        # Only meaningful mid-game; replays and finished games carry None
+        answers = self.answers
+        if answers is None or self.status != 'active':
+            return {'answers_left': None, 'finishing_answers': None}
+        return {'answers_left': answers.total,
+                'finishing_answers': answers.finishing(self.seats[self.current_turn].score)}
+
     def seat_for_user(self, user_id: int) -> Optional[int]:
         for i, s in enumerate(self.seats):
             if s.user_id == user_id:
                 return i
         return None
 
+    def use_player(self, name_key: str, apps: int) -> None:
+        """Mark a scoring player as used for the rest of the game."""
+        self.used_players.add(name_key)
+        if self.answers is not None:
+            self.answers.remove(apps)
+
+    def log(self, *event) -> None:
+        """Append an event (see event_log) to the unflushed buffer."""
+        self.pending_events.append(event)
+
+    def take_pending_events(self):
+        """Detach the unflushed events. Returns (first_seq, events)."""
+        events = self.pending_events[:]
+        self.pending_events.clear()
+        first_seq = self.events_flushed
+        self.events_flushed += len(events)
+        return first_seq, events
+
+    def add_seat(self, seat: Seat) -> int:
+        self.seats.append(seat)
+        self.log(event_log.JOIN, seat.user_id, seat.username, seat.score,
+                 seat.is_cpu, seat.cpu_difficulty)
+        return len(self.seats) - 1
+
+    def advance_turn(self, deadline_epoch: float) -> None:
+        """Hand the turn to the other seat and start its timer (see
+        start_turn_timer), with a single version bump."""
+        d = self.__dict__
+        d['current_turn'] = (self.current_turn + 1) % 2
+        d['turn_seq'] = seq = self.turn_seq + 1
+        d['deadline_epoch'] = deadline_epoch
+        d['_version'] = self._version + 1
+        self.log(event_log.TURN, seq, deadline_epoch)
+
+    def end(self, status: str) -> None:
+        """Move to a terminal status ('finished' or 'abandoned')."""
+        self.status = status
+        self.deadline_epoch = 0.0
+        self.log(event_log.END, status, [s.score for s in self.seats])
+
 
 # ---------------------------------------------------------------------------
 # Global store
 # ---------------------------------------------------------------------------
 
 GAMES: Dict[str, GameSession] = {}
+_SPECTATING: Dict[str, str] = {}  # sid -> game code
+
+# Last-activity index: per status, game code -> last activity time, kept in
+# activity order (oldest first) so the reaper only looks at the front.
+_ACTIVITY: Dict[str, OrderedDict] = {}
+
+
+class SessionLimitError(Exception):
+    """Raised when the live-session cap is hit and nothing can be evicted."""
 
 
 def create_game(start_score: int = 501) -> GameSession:
+    # Sharded: mint only codes this worker owns, so routing needs no lookup
     code = uuid.uuid4().hex[:8].upper()
+    while not sharding.owns(code):
+        code = uuid.uuid4().hex[:8].upper()
     game = GameSession(code=code)
-    GAMES[code] = game
+    game.log(event_log.CREATE, code)
+    with locks.registry():
+        GAMES[code] = game
+        touch(game)
     return game
 
 
+def register_game(game: GameSession) -> None:
+    """Add an externally built session (e.g. restored from the DB) to GAMES."""
+    count_answers(game)
+    with locks.registry():
+        GAMES[game.code] = game
+        touch(game)
+
+
 def get_game(code: str) -> Optional[GameSession]:
     return GAMES.get(code)
 
 
+def remove_game(code: str) -> Optional[GameSession]:
+    with locks.registry():
+        game = GAMES.pop(code, None)
+        if game:
+            for sid in game.spectators:
+                _SPECTATING.pop(sid, None)
+            game.spectators.clear()
+            if game._activity_status is not None:
+                _ACTIVITY[game._activity_status].pop(code, None)
+                game._activity_status = None
+    return game
+
+
+# ---------------------------------------------------------------------------
+# Idle eviction
+# ---------------------------------------------------------------------------
+
+def touch(game: GameSession, now: float = None) -> None:
+    """Record player activity on ``game`` (timer-driven turns don't count)."""
+    with locks.registry():
+        if game._activity_status is not None:
+            _ACTIVITY[game._activity_status].pop(game.code, None)
+        bucket = _ACTIVITY.setdefault(game.status, OrderedDict())
+        bucket[game.code] = time.time() if now is None else now
+        game._activity_status = game.status
+
+
+def last_activity(game: GameSession) -> Optional[float]:
+    bucket = _ACTIVITY.get(game._activity_status)
+    return bucket.get(game.code) if bucket is not None else None
+
+
+def expired_games(ttls: Dict[str, float], now: float = None) -> List[GameSession]:
+    """Games idle for longer than the TTL of their status, oldest first.
+
+    Only the expired prefix of each status bucket is visited. A game found
+    in a stale bucket (its status changed since it was last touched) is
+    re-filed under its current status instead of being returned.
+    """
+    now = time.time() if now is None else now
+    expired = []
+    with locks.registry():
+        for status, ttl in ttls.items():
+            bucket = _ACTIVITY.get(status)
+            while bucket:
+                code, ts = next(iter(bucket.items()))
+                if now - ts < ttl:
+                    break
+                game = GAMES.get(code)
+                if game is None:
+                    bucket.pop(code)
+                elif game.status != status:
+                    touch(game, now)
+                else:
+                    bucket.pop(code)
+                    game._activity_status = None
+                    expired.append(game)
+    return expired
+
+
+def make_room(limit: int, min_idle: float, now: float = None) -> List[GameSession]:
+    """Enforce the live-session cap ahead of a create_game call.
+
+    Evicts least-recently-active waiting games idle for at least
+    ``min_idle`` seconds, removing them from GAMES. Returns the evicted
+    games, still live, for the caller to end and sync (sockets._evict_game).
+    Raises SessionLimitError if the cap can't be met.
+    """
+    now = time.time() if now is None else now
+    evicted = []
+    with locks.registry():
+        waiting = _ACTIVITY.get('waiting', OrderedDict())
+        while len(GAMES) >= limit:
+            oldest = next(iter(waiting.items()), None)
+            if oldest is None or now - oldest[1] < min_idle:
+                raise SessionLimitError(f'{len(GAMES)} live sessions')
+            game = remove_game(oldest[0])
+            if game is None:
+                waiting.pop(oldest[0], None)
+                continue
+            evicted.append(game)
+    return evicted
+
+
+def estimate_session_bytes(game: GameSession) -> int:
+    """Approximate retained size of one session (shallow, no shared data)."""
+    size = sys.getsizeof(game) + sys.getsizeof(game.__dict__)
+    size += sys.getsizeof(game.seats) + sys.getsizeof(game.used_players)
+    size += sum(sys.getsizeof(k) for k in game.used_players)
+    size += sys.getsizeof(game.spectators) + sys.getsizeof(game.pending_events)
+    size += sum(sys.getsizeof(e) for e in game.pending_events)
+    if game._encoded is not None:
+        size += sys.getsizeof(game._encoded)
+    if game.answers is not None:
+        size += sys.getsizeof(game.answers) + sys.getsizeof(game.answers.hist)
+    for seat in game.seats:
+        h = seat.history
+        size += sys.getsizeof(seat) + sys.getsizeof(seat.__dict__)
+        size += sys.getsizeof(h._names) + sys.getsizeof(h._codes)
+        size += sys.getsizeof(h._entries) + sys.getsizeof(h._wire)
+        size += sys.getsizeof(h._extra or ())
+    return size
+
+
+def memory_stats() -> dict:
+    by_status: Dict[str, int] = {}
+    total = 0
+    for game in list(GAMES.values()):
+        by_status[game.status] = by_status.get(game.status, 0) + 1
+        total += estimate_session_bytes(game)
+    return {'sessions': len(GAMES), 'by_status': by_status, 'approx_bytes': total}
+
+
 def get_game_for_user(user_id: int) -> Optional[GameSession]:
-    for game in GAMES.values():
+    for game in list(GAMES.values()):
         if game.status in ('waiting', 'active'):
             seat_idx = game.seat_for_user(user_id)
             if seat_idx is not None:
@@ -118,12 +482,58 @@ def get_game_for_user(user_id: int) -> Optional[GameSession]:
 def assign_prompt(game: GameSession) -> None:
     pool = get_prompt_pool()
     if pool:
-        game.prompt = random.choice(pool)
+        game.prompt = p = random.choices(pool, cum_weights=_prompt_cum_weights)[0]
+        game.log(event_log.PROMPT, {
+            'type': p.type, 'club': p.club, 'club_key': p.club_key,
+            'country': p.country, 'position': p.position, 'text': p.text,
+            'answer_count': p.answer_count,
+        })
+        count_answers(game)
+
+
+def count_answers(game: GameSession) -> None:
+    """Attach the remaining-answers counter for the game's prompt."""
+    if game.prompt is not None and _player_index is not None:
+        from .game_logic import AnswerCounter
+        game.answers = AnswerCounter.for_prompt(_player_index, game.prompt,
+                                                game.used_players)
+
+
+TURN_SECONDS = 60
 
 
 def start_turn_timer(game: GameSession) -> None:
     game.turn_seq += 1
-    game.deadline_epoch = time.time() + 60
+    game.deadline_epoch = time.time() + TURN_SECONDS
+    game.log(event_log.TURN, game.turn_seq, game.deadline_epoch)
+
+
+def add_spectator(game: GameSession, sid: str, limit: int) -> bool:
+    """Register a read-only viewer. Returns False when the game is at its cap."""
+    with locks.game_lock(game.code):
+        if sid in game.spectators:
+            return True
+        if len(game.spectators) >= limit:
+            return False
+        remove_spectator(sid)  # one game per connection
+        with locks.registry():
+            game.spectators.add(sid)
+            _SPECTATING[sid] = game.code
+    return True
+
+
+def spectating(sid: str) -> Optional[str]:
+    """Code of the game ``sid`` is watching, if any."""
+    return _SPECTATING.get(sid)
+
+
+def remove_spectator(sid: str) -> Optional[str]:
+    with locks.registry():
+        code = _SPECTATING.pop(sid, None)
+        game = GAMES.get(code) if code else None
+        if game:
+            game.spectators.discard(sid)
+    return code
 
 
 def lobby_sessions() -> list:
@@ -132,8 +542,9 @@ def lobby_sessions() -> list:
             'code': g.code,
             'host': g.seats[0].username if g.seats else '?',
             'player_count': len(g.seats),
+            'spectator_count': len(g.spectators),
             'status': g.status,
         }
-        for g in GAMES.values()
+        for g in list(GAMES.values())
         if g.status in ('waiting', 'active')
     ]
@@ -0,0 +1,59 @@
+"""Optional locking for running the socket handlers on real threads.
+
+Under the default gevent worker, handlers only switch at I/O, and a
+GameSession is never mutated half-way through by another handler, so no
+locks are taken. With ``SOCKETIO_ASYNC_MODE=threading`` (or on a
+free-threaded Python) ``configure(True)`` enables:
+
+    game_lock(code)   a reentrant lock per game, picked from a fixed
+                      array of shards by a stable hash of the code
+    registry()        one lock for the shared tables in app.game_manager
+                      (GAMES, spectators, activity buckets)
+
+Ordering: a game lock may be held while taking the registry lock, never
+the other way round, and no code holds two game locks at once.
+"""
+import sys
+import threading
+import zlib
+from contextlib import nullcontext
+
+SHARDS = 64
+
+_NULL = nullcontext()
+_shards = None
+_registry = None
+
+
+def configure(enabled: bool, shards: int = SHARDS) -> None:
+    global _shards, _registry
+    if enabled:
+        _shards = [threading.RLock() for _ in range(shards)]
+        _registry = threading.RLock()
+    else:
+        _shards = _registry = None
+
+
+def wanted(setting: str, async_mode: str) -> bool:
+    """Resolve the GAME_LOCKS setting: '1', '0' or 'auto' (on unless the
+    handlers run as gevent greenlets under the GIL)."""
+    if setting != 'auto':
+        return setting == '1'
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    return async_mode != 'gevent' or not gil
+
+
+def enabled() -> bool:
+    return _shards is not None
+
+
+def game_lock(code: str):
+    """Context manager serialising every mutation of game ``code``."""
+    if _shards is None:
+        return _NULL
+    return _shards[zlib.crc32(code.encode()) % len(_shards)]
+
+
+def registry():
+    """Context manager guarding app.game_manager's shared tables."""
+    return _NULL if _registry is None else _registry
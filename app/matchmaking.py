@@ -0,0 +1,248 @@
+"""Quick-match queue: pair waiting players of similar skill.
+
+Waiting players sit in a skip list ordered by (rating, ticket), so a new
+arrival finds its nearest-rated neighbours in expected O(log n) and is
+paired with the closer one if the gap is acceptable. Joins and leaves are
+O(log n) as well; a plain sorted list would shift every later key. The acceptable gap widens
+with time spent waiting; ``sweep`` re-checks adjacent pairs as it does.
+No Flask or socket imports — app.sockets seats the pairs it returns.
+Queue operations hold a private lock, so handlers may run on real threads.
+"""
+import functools
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+
+BASE_GAP = 50          # rating gap accepted immediately
+GAP_PER_SECOND = 25    # extra gap per second waited
+MAX_GAP = 1000         # never match further apart than this
+
+
+def skill_rating(games_won: int, games_played: int) -> int:
+    """1000..2000 from a smoothed win rate; new players start at 1500."""
+    return round(1500 + 1000 * ((games_won + 1) / (games_played + 2) - 0.5))
+
+
+def _synchronized(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Ticket:
+    """One waiting player."""
+    __slots__ = ('user_id', 'username', 'rating', 'sid', 'joined_at', 'seq')
+
+    def __init__(self, user_id, username, rating, sid, joined_at, seq):
+        self.user_id = user_id
+        self.username = username
+        self.rating = rating
+        self.sid = sid
+        self.joined_at = joined_at
+        self.seq = seq
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return (self.rating, self.seq)
+
+
+class _Node:
+    __slots__ = ('key', 'next')
+
+    def __init__(self, key, height: int):
+        self.key = key
+        self.next = [None] * height
+
+
+class _SkipList:
+    """Sorted unique keys: insert, remove and neighbour lookup in expected
+    O(log n), iteration in order."""
+    MAX_HEIGHT = 32
+
+    def __init__(self):
+        self._random = random.Random(0)     # balance only; no need for entropy
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def clear(self) -> None:
+        self._head = _Node(None, self.MAX_HEIGHT)
+        self._height = 1
+        self._len = 0
+
+    def _path(self, key) -> list:
+        """The last node before ``key`` on every level."""
+        path = [self._head] * self.MAX_HEIGHT
+        node = self._head
+        for level in range(self._height - 1, -1, -1):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                node, nxt = nxt, nxt.next[level]
+            path[level] = node
+        return path
+
+    def around(self, key) -> Tuple[Optional[tuple], Optional[tuple]]:
+        """(greatest key below ``key``, least key not below it); None where
+        there is none."""
+        before = self._path(key)[0]
+        after = before.next[0]
+        return (None if before is self._head else before.key,
+                None if after is None else after.key)
+
+    def insert(self, key) -> None:
+        path = self._path(key)
+        height = 1
+        while height < self.MAX_HEIGHT and self._random.random() < 0.5:
+            height += 1
+        self._height = max(self._height, height)
+        node = _Node(key, height)
+        for level in range(height):
+            node.next[level] = path[level].next[level]
+            path[level].next[level] = node
+        self._len += 1
+
+    def remove(self, key) -> None:
+        path = self._path(key)
+        node = path[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            path[level].next[level] = node.next[level]
+        while self._height > 1 and self._head.next[self._height - 1] is None:
+            self._height -= 1
+        self._len -= 1
+
+
+class MatchQueue:
+    def __init__(self, base_gap: int = BASE_GAP, gap_per_second: float = GAP_PER_SECOND,
+                 max_gap: int = MAX_GAP, clock=time.time):
+        self.base_gap = base_gap
+        self.gap_per_second = gap_per_second
+        self.max_gap = max_gap
+        self.clock = clock
+        self._keys = _SkipList()                    # (rating, seq)
+        self._tickets: Dict[Tuple[int, int], Ticket] = {}
+        self._by_user: Dict[int, Ticket] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._by_user
+
+    def ticket(self, user_id) -> Optional[Ticket]:
+        return self._by_user.get(user_id)
+
+    def gap(self, ticket: Ticket, now: float) -> float:
+        """Rating difference ``ticket`` will accept after waiting until ``now``."""
+        waited = now - ticket.joined_at
+        return min(self.max_gap, self.base_gap + self.gap_per_second * waited)
+
+    def _acceptable(self, a: Ticket, b: Ticket, now: float) -> bool:
+        # The longer waiter's patience decides
+        return abs(a.rating - b.rating) <= max(self.gap(a, now), self.gap(b, now))
+
+    @_synchronized
+    def join(self, user_id, username: str, rating: int,
+             sid: str = None) -> Optional[Tuple[Ticket, Ticket]]:
+        """Queue a player, or pair them at once with the nearest-rated waiting
+        player within range. Returns ``(waiting, arriving)`` or None.
+        Re-joining replaces the player's ticket (e.g. from a new tab)."""
+        if user_id in self._by_user:
+            self._remove(self._by_user[user_id])
+        now = self.clock()
+        self._seq += 1
+        ticket = Ticket(user_id, username, rating, sid, now, self._seq)
+
+        best = None
+        for key in self._keys.around(ticket.key):
+            if key is not None:
+                other = self._tickets[key]
+                if self._acceptable(ticket, other, now) and (
+                        best is None or abs(other.rating - rating) < abs(best.rating - rating)):
+                    best = other
+        if best is not None:
+            self._remove(best)
+            self._matched(best, now)
+            self._matched(ticket, now)
+            return best, ticket
+
+        self._keys.insert(ticket.key)
+        self._tickets[ticket.key] = ticket
+        self._by_user[user_id] = ticket
+        metrics.gauge_set('matchmaking.queue_depth', len(self._keys))
+        return None
+
+    @_synchronized
+    def leave(self, user_id) -> Optional[Ticket]:
+        ticket = self._by_user.get(user_id)
+        if ticket is not None:
+            self._remove(ticket)
+            metrics.incr('matchmaking.cancelled')
+        return ticket
+
+    @_synchronized
+    def sweep(self) -> List[Tuple[Ticket, Ticket]]:
+        """Pair waiting neighbours whose gaps have widened enough. One pass
+        over the sorted keys; each player is matched at most once."""
+        now = self.clock()
+        pairs = []
+        prev = None
+        for key in self._keys:
+            ticket = self._tickets[key]
+            if prev is not None and self._acceptable(prev, ticket, now):
+                pairs.append((prev, ticket) if prev.seq < ticket.seq else (ticket, prev))
+                prev = None
+                continue
+            prev = ticket
+
+        if pairs:
+            for pair in pairs:
+                for ticket in pair:
+                    self._keys.remove(ticket.key)
+                    del self._tickets[ticket.key]
+                    del self._by_user[ticket.user_id]
+                    self._matched(ticket, now)
+            metrics.gauge_set('matchmaking.queue_depth', len(self._keys))
+        return pairs
+
+    @_synchronized
+    def stats(self) -> dict:
+        now = self.clock()
+        oldest = min((t.joined_at for t in self._by_user.values()), default=now)
+        return {'depth': len(self._keys), 'longest_wait': round(now - oldest, 1)}
+
+    @_synchronized
+    def clear(self) -> None:
+        self._keys.clear()
+        self._tickets.clear()
+        self._by_user.clear()
+
+    # -- internals ----------------------------------------------------------
+
+    def _remove(self, ticket: Ticket) -> None:
+        self._keys.remove(ticket.key)
+        del self._tickets[ticket.key]
+        del self._by_user[ticket.user_id]
+        metrics.gauge_set('matchmaking.queue_depth', len(self._keys))
+
+    @staticmethod
+    def _matched(ticket: Ticket, now: float) -> None:
+        metrics.observe('matchmaking.wait', now - ticket.joined_at)
+
+
+QUEUE = MatchQueue()
@@ -0,0 +1,53 @@
+"""In-process counters, gauges and timings, served by /admin/metrics.
+
+Values live in plain dicts: the app runs one gevent worker, so there is no
+cross-thread contention to guard against. Under SOCKETIO_ASYNC_MODE=threading
+concurrent updates may occasionally drop an increment; the numbers are
+diagnostic, so that is accepted rather than paying for a lock per call.
+"""
+from typing import Dict
+
+_COUNTERS: Dict[str, int] = {}
+_GAUGES: Dict[str, float] = {}
+_TIMINGS: Dict[str, list] = {}  # name -> [count, total_seconds, max_seconds]
+
+
+def incr(name: str, n: int = 1) -> None:
+    _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def gauge_add(name: str, delta: float) -> None:
+    _GAUGES[name] = _GAUGES.get(name, 0) + delta
+
+
+def gauge_set(name: str, value: float) -> None:
+    _GAUGES[name] = value
+
+
+def observe(name: str, seconds: float) -> None:
+    t = _TIMINGS.get(name)
+    if t is None:
+        _TIMINGS[name] = [1, seconds, seconds]
+    else:
+        t[0] += 1
+        t[1] += seconds
+        if seconds > t[2]:
+            t[2] = seconds
+
+
+def snapshot() -> dict:
+    return {
+        'counters': dict(_COUNTERS),
+        'gauges': dict(_GAUGES),
+        'timings': {
+            name: {'count': c, 'avg_ms': round(total / c * 1000, 3),
+                   'max_ms': round(peak * 1000, 3)}
+            for name, (c, total, peak) in _TIMINGS.items()
+        },
+    }
+
+
+def reset() -> None:
+    _COUNTERS.clear()
+    _GAUGES.clear()
+    _TIMINGS.clear()
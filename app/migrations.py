@@ -0,0 +1,97 @@
+"""In-place schema upgrades for databases created by older versions.
+
+``db.create_all`` only creates missing tables, so columns and indexes added
+to existing tables are applied here. Every step checks before it acts and
+uses SQL that SQLite and PostgreSQL both accept, so ``ensure_schema`` is
+safe to run on every boot.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from . import db
+
+log = logging.getLogger(__name__)
+
+BACKFILL_CHUNK = 5000
+
+
+def ensure_schema() -> None:
+    _add_username_key()
+    _add_history_indexes()
+
+
+def _columns(table: str) -> set:
+    return {c['name'] for c in inspect(db.engine).get_columns(table)}
+
+
+# ---------------------------------------------------------------------------
+# users.username_key
+# ---------------------------------------------------------------------------
+
+def _add_username_key() -> None:
+    if 'username_key' not in _columns('users'):
+        db.session.execute(text('ALTER TABLE users ADD COLUMN username_key VARCHAR(64)'))
+        db.session.commit()
+
+    if db.session.execute(
+            text('SELECT 1 FROM users WHERE username_key IS NULL LIMIT 1')).first():
+        _backfill_username_keys()
+
+    db.session.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username_key ON users (username_key)'
+    ))
+    db.session.commit()
+
+
+def _backfill_username_keys() -> None:
+    from .models import username_key
+
+    # Backfill in id order so the oldest of any case-variant duplicates keeps
+    # the plain key; later ones get "<key>#<id>" and can no longer log in.
+    taken = set(db.session.execute(
+        text('SELECT username_key FROM users WHERE username_key IS NOT NULL')
+    ).scalars())
+    last_id = 0
+    filled = 0
+    while True:
+        rows = db.session.execute(
+            text('SELECT id, username FROM users '
+                 'WHERE username_key IS NULL AND id > :last ORDER BY id LIMIT :n'),
+            {'last': last_id, 'n': BACKFILL_CHUNK},
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for uid, username in rows:
+            key = username_key(username)
+            if key in taken:
+                log.warning('Duplicate username %r (user %d) disabled for login',
+                            username, uid)
+                key = f'{key}#{uid}'
+            taken.add(key)
+            updates.append({'id': uid, 'key': key})
+        db.session.execute(
+            text('UPDATE users SET username_key = :key WHERE id = :id'), updates,
+        )
+        db.session.commit()
+        last_id = rows[-1][0]
+        filled += len(rows)
+    log.info('Backfilled username_key for %d users', filled)
+
+
+# ---------------------------------------------------------------------------
+# Match-history indexes
+# ---------------------------------------------------------------------------
+
+HISTORY_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS ix_games_finished ON games (status, finished_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_gp_user_game ON game_players (user_id, game_id)',
+    'CREATE INDEX IF NOT EXISTS ix_gp_game_user ON game_players (game_id, user_id)',
+)
+
+
+def _add_history_indexes() -> None:
+    for ddl in HISTORY_INDEXES:
+        db.session.execute(text(ddl))
+    db.session.commit()
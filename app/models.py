@@ -2,10 +2,22 @@ from datetime import datetime
 from . import db
 
 
+def username_key(username: str) -> str:
+    """Case-insensitive identity of a username (what login matches on)."""
+    return username.strip().casefold()
+
+
+def _default_username_key(context) -> str:
+    return username_key(context.get_current_parameters()['username'])
+
+
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(32), unique=True, nullable=False)
+    # Unique index ix_users_username_key; app.migrations adds it to old DBs
+    username_key = db.Column(db.String(64), unique=True, index=True,
+                             default=_default_username_key)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_admin = db.Column(db.Boolean, default=False)
 
@@ -32,6 +44,46 @@ class Game(db.Model):
     winner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     state_json = db.Column(db.JSON, nullable=True)
 
+    __table_args__ = (
+        # Match history: newest finished games first (stats.history_query)
+        db.Index('ix_games_finished', 'status', 'finished_at', 'id'),
+    )
+
+
+class ShardGame(db.Model):
+    """Directory row for a live game in a sharded deployment (app.sharding)."""
+    __tablename__ = 'shard_games'
+    code = db.Column(db.String(8), primary_key=True)
+    shard = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(12), nullable=False)
+    host = db.Column(db.String(32))
+    player_count = db.Column(db.Integer, nullable=False, default=0)
+    spectator_count = db.Column(db.Integer, nullable=False, default=0)
+    user0 = db.Column(db.Integer, index=True)
+    user1 = db.Column(db.Integer, index=True)
+    updated_at = db.Column(db.Float, nullable=False)  # epoch seconds (heartbeat)
+
+
+class ShardState(db.Model):
+    """A deployment-wide value every shard reads (app.sharding)."""
+    __tablename__ = 'shard_state'
+    key = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.String(64), nullable=False)
+
+
+class GameEventBatch(db.Model):
+    """A flushed run of a game's event log (see app.event_log)."""
+    __tablename__ = 'game_event_batches'
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    first_seq = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # newline-delimited JSON arrays
+
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'first_seq', name='uq_event_batch_seq'),
+    )
+
 
 class GamePlayer(db.Model):
     __tablename__ = 'game_players'
@@ -47,4 +99,6 @@ class GamePlayer(db.Model):
     __table_args__ = (
         db.UniqueConstraint('game_id', 'seat', name='uq_game_seat'),
         db.Index('ix_gp_user_id', 'user_id', 'id'),
+        db.Index('ix_gp_user_game', 'user_id', 'game_id'),
+        db.Index('ix_gp_game_user', 'game_id', 'user_id'),
     )
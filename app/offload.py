@@ -0,0 +1,47 @@
+"""Run bulk CPU-bound work off the gevent hub.
+
+``run`` executes a function on gevent's native thread pool and parks only
+the calling greenlet until it finishes; the hub keeps serving sockets and
+timers meanwhile. The result (or exception) is handed back to that
+greenlet by gevent, so callers use it as if the call were direct.
+
+Only pass pure functions (e.g. app.game_logic) — no Flask context, DB
+session or gevent objects may be touched from a pool thread.
+
+Outside gevent (``cooperative=False``) handlers already run on their own
+threads, so ``run`` simply calls the function.
+"""
+import time
+
+from . import metrics
+
+_pool = None
+_size = 2
+_cooperative = True
+
+
+def configure(size: int, cooperative: bool = True) -> None:
+    global _size, _cooperative
+    _size = size
+    _cooperative = cooperative
+    if _pool is not None:
+        _pool.maxsize = size
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        from gevent.threadpool import ThreadPool
+        _pool = ThreadPool(_size)
+    return _pool
+
+
+def run(fn, *args, **kwargs):
+    """Call ``fn(*args, **kwargs)`` on a worker thread and return its result."""
+    t0 = time.perf_counter()
+    try:
+        if not _cooperative:
+            return fn(*args, **kwargs)
+        return _get_pool().spawn(fn, *args, **kwargs).get()
+    finally:
+        metrics.observe(f'offload.{fn.__name__}', time.perf_counter() - t0)
@@ -0,0 +1,104 @@
+"""In-memory rate limiting and outbound backpressure.
+
+Each limited action has a ``TokenBucketLimiter`` keyed by user id. A check
+is O(1): refill the caller's bucket from the elapsed time and take a token.
+Buckets are kept in LRU order and the least recently used one is dropped
+once ``max_keys`` is reached; a bucket idle for ``burst / rate`` seconds
+is full again anyway, so dropping it loses nothing. Each limiter holds a
+lock around its bucket table, as handlers may run on real threads.
+
+``limit_send_queues`` caps the Engine.IO send queue of every client so a
+slow consumer can't make the server buffer without bound.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from . import metrics
+
+
+class TokenBucketLimiter:
+    __slots__ = ('rate', 'burst', 'max_keys', '_buckets', '_lock')
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def allow(self, key, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_LIMITERS: dict = {}
+
+
+def configure(limits: dict, max_keys: int) -> None:
+    """``limits`` maps action name -> (tokens per second, burst)."""
+    _LIMITERS.clear()
+    for action, (rate, burst) in limits.items():
+        _LIMITERS[action] = TokenBucketLimiter(rate, burst, max_keys)
+
+
+def allow(action: str, user_id) -> bool:
+    """Take a token for ``user_id``; count and refuse if none are left.
+    Actions without a configured limit are always allowed."""
+    limiter = _LIMITERS.get(action)
+    if limiter is None or limiter.allow(user_id):
+        return True
+    metrics.incr(f'rate_limit.rejected.{action}')
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Send-queue backpressure
+# ---------------------------------------------------------------------------
+
+def limit_send_queues(eio, max_queued: int) -> None:
+    """Wrap ``eio.send_packet`` so a client whose queue already holds
+    ``max_queued`` packets is disconnected instead of buffered further.
+
+    Every Socket.IO emit, room fan-out included, ends in send_packet. The
+    client reconnects and rejoins with a fresh game_state, so nothing is
+    lost by dropping its backlog. The disconnect runs as a separate task
+    because we may be inside a room broadcast loop.
+    """
+    send_packet = eio.send_packet
+    closing = set()
+
+    def _disconnect(sid):
+        try:
+            eio.disconnect(sid)
+        finally:
+            closing.discard(sid)
+
+    def limited_send_packet(sid, pkt):
+        socket = eio.sockets.get(sid)
+        if socket is not None and socket.queue.qsize() >= max_queued:
+            metrics.incr('backpressure.dropped_packets')
+            if sid not in closing:
+                closing.add(sid)
+                metrics.incr('backpressure.disconnects')
+                eio.start_background_task(_disconnect, sid)
+            return
+        send_packet(sid, pkt)
+
+    eio.send_packet = limited_send_packet
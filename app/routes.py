@@ -1,28 +1,36 @@
+import gzip
 import json
 import os
 
-from flask import (Blueprint, current_app, flash, jsonify, redirect,
-                   render_template, request, session, url_for)
-
-from . import db
-from .models import Game, GamePlayer, Player, User
-from .stats import ACHIEVEMENT_LABELS, compute_achievements, get_recent_games, get_user_stats
-from .game_manager import (create_game, get_game, get_game_for_user,
-                            assign_prompt, lobby_sessions, GAMES, Seat,
-                            start_turn_timer)
+from flask import (Blueprint, Response, current_app, flash, jsonify, redirect,
+                   render_template, request, session, stream_with_context, url_for)
+from sqlalchemy.exc import IntegrityError
+
+from . import _announce_players_refresh, _catch_up_players, db, locks
+from .models import Game, GameEventBatch, GamePlayer, Player, User, username_key
+from .user_cache import CachedUser, get_user, invalidate
+from .stats import (ACHIEVEMENT_LABELS, compute_achievements, decode_cursor,
+                    get_game_history, get_user_stats)
+from .game_manager import (create_game, get_game,
+                            assign_prompt, get_name_dictionary,
+                            GAMES, Seat, touch)
 from .game_logic import normalize_name_key
+from .sharding import lobby_sessions, publish, user_game_code
 
 bp = Blueprint('main', __name__)
 
+HISTORY_PAGE_SIZE = 10
+HISTORY_MAX_PAGE_SIZE = 50
+
 
 # ---------------------------------------------------------------------------
 # Auth helpers
 # ---------------------------------------------------------------------------
 
-def current_user() -> User | None:
+def current_user() -> CachedUser | None:
     uid = session.get('user_id')
     if uid:
-        return db.session.get(User, uid)
+        return get_user(uid)
     return None
 
 
@@ -47,9 +55,9 @@ def index():
     user = current_user()
     if not user:
         return redirect(url_for('main.login_page'))
-    existing = get_game_for_user(user.id)
+    existing = user_game_code(user.id)
     if existing:
-        return redirect(url_for('main.game_page', code=existing.code))
+        return redirect(url_for('main.game_page', code=existing))
     return redirect(url_for('main.lobby'))
 
 
@@ -67,15 +75,24 @@ def login():
         flash('Please enter a username (max 32 chars).')
         return redirect(url_for('main.login_page'))
 
-    username_lower = username.lower()
-    user = User.query.filter(db.func.lower(User.username) == username_lower).first()
+    key = username_key(username)
+    user = User.query.filter_by(username_key=key).first()
 
     if not user:
         is_admin = (username == current_app.config.get('ADMIN_USERNAME', ''))
-        user = User(username=username, is_admin=is_admin)
+        user = User(username=username, username_key=key, is_admin=is_admin)
         db.session.add(user)
-        db.session.commit()
-
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent login created the same (case-insensitive) name first
+            db.session.rollback()
+            user = User.query.filter_by(username_key=key).first()
+            if not user:
+                flash('That username is not available.')
+                return redirect(url_for('main.login_page'))
+
+    invalidate(user.id)
     session['user_id'] = user.id
     return redirect(url_for('main.lobby'))
 
@@ -108,18 +125,22 @@ def lobby():
 def create_game_route():
     user = current_user()
     # Don't let a user create a second game while already in one
-    existing = get_game_for_user(user.id)
+    existing = user_game_code(user.id)
     if existing:
-        return redirect(url_for('main.game_page', code=existing.code))
+        return redirect(url_for('main.game_page', code=existing))
+
+    from .sockets import reserve_session_slot
+    if not reserve_session_slot(current_app._get_current_object()):
+        flash('The server is full right now. Try again shortly.')
+        return redirect(url_for('main.lobby'))
 
     start_score = current_app.config['START_SCORE']
     game = create_game(start_score)
-    assign_prompt(game)
+    with locks.game_lock(game.code):
+        assign_prompt(game)
 
-    # Persist game row
-    db_game = Game(code=game.code, status='waiting')
-    db.session.add(db_game)
-    db.session.commit()
+    from .sockets import save_new_game
+    save_new_game(game, current_app._get_current_object(), 'waiting')
 
     return redirect(url_for('main.game_page', code=game.code))
 
@@ -135,9 +156,35 @@ def game_page(code):
         return redirect(url_for('main.lobby'))
 
     start_score = current_app.config['START_SCORE']
-    initial_state = json.dumps(game.to_dict())
+    spectate = request.args.get('spectate') == '1'
+    with locks.game_lock(game.code):
+        initial_state = game.encoded_state()
+    names_version = get_name_dictionary()[0]
+    names_url = url_for('main.player_names', version=names_version) if names_version else None
     return render_template('game.html', user=user, code=code,
-                           initial_state=initial_state, start_score=start_score)
+                           initial_state=initial_state, start_score=start_score,
+                           spectate=spectate, names_url=names_url)
+
+
+@bp.route('/game/<code>/replay')
+@login_required
+def game_replay(code):
+    """Stream a finished game's event log as NDJSON, one event per line."""
+    db_game = Game.query.filter_by(code=code.upper()).first()
+    if not db_game or db_game.status != 'finished':
+        return jsonify({'error': 'No replay available for that game.'}), 404
+
+    def generate():
+        batches = (
+            db.session.query(GameEventBatch.payload)
+            .filter(GameEventBatch.game_id == db_game.id)
+            .order_by(GameEventBatch.first_seq)
+            .execution_options(yield_per=16)
+        )
+        for (payload,) in batches:
+            yield payload + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 # ---------------------------------------------------------------------------
@@ -152,34 +199,35 @@ def create_solo_game():
     if difficulty not in ('easy', 'hard'):
         difficulty = 'easy'
 
-    existing = get_game_for_user(user.id)
+    existing = user_game_code(user.id)
     if existing:
-        return redirect(url_for('main.game_page', code=existing.code))
+        return redirect(url_for('main.game_page', code=existing))
+
+    from .sockets import reserve_session_slot
+    if not reserve_session_slot(current_app._get_current_object()):
+        flash('The server is full right now. Try again shortly.')
+        return redirect(url_for('main.lobby'))
 
     start_score = current_app.config['START_SCORE']
     game = create_game(start_score)
-    game.is_solo = True
-    assign_prompt(game)
-
-    game.seats.append(Seat(user_id=user.id, username=user.username, score=start_score))
-    cpu_label = f'CPU ({difficulty.capitalize()})'
-    game.seats.append(Seat(user_id=None, username=cpu_label, score=start_score,
+    from .sockets import save_new_game, start_game
+    with locks.game_lock(game.code):
+        game.is_solo = True
+        assign_prompt(game)
+
+        game.add_seat(Seat(user_id=user.id, username=user.username, score=start_score))
+        cpu_label = f'CPU ({difficulty.capitalize()})'
+        game.add_seat(Seat(user_id=None, username=cpu_label, score=start_score,
                            is_cpu=True, cpu_difficulty=difficulty))
 
-    game.status = 'active'
-    start_turn_timer(game)
+        # Activates the game and arms the opening-turn expiry (multiplayer does
+        # this in on_join_game). Without it, the human's first solo turn has a
+        # client countdown but no server forfeit, so it stalls at 0.
+        start_game(game, current_app._get_current_object())
+        touch(game)
 
-    db_game = Game(code=game.code, status='active')
-    db.session.add(db_game)
-    db.session.commit()
-
-    # Schedule the opening-turn expiry (multiplayer does this in on_join_game,
-    # rematch in on_rematch). Without it, the human's first solo turn has a
-    # client countdown but no server forfeit, so it stalls at 0.
-    from . import socketio
-    from .sockets import _expire_turn
-    socketio.start_background_task(_expire_turn, game.code, game.turn_seq,
-                                   current_app._get_current_object())
+    save_new_game(game, current_app._get_current_object(), 'active')
+    publish()  # seated already: other shards must see it before the next sync
 
     return redirect(url_for('main.game_page', code=game.code))
 
@@ -190,24 +238,49 @@ def profile():
     user = current_user()
     stats = get_user_stats(user.id)
     achievements = compute_achievements(stats)
-    recent = get_recent_games(user.id)
+    recent, next_cursor = get_game_history(user.id, HISTORY_PAGE_SIZE)
     achievement_details = [
         {'key': k, 'label': ACHIEVEMENT_LABELS[k][0], 'desc': ACHIEVEMENT_LABELS[k][1],
          'earned': k in achievements}
         for k in ACHIEVEMENT_LABELS
     ]
     return render_template('profile.html', user=user, stats=stats,
-                           achievements=achievement_details, recent_games=recent)
+                           achievements=achievement_details, recent_games=recent,
+                           next_cursor=next_cursor)
 
 
 # ---------------------------------------------------------------------------
 # API
 # ---------------------------------------------------------------------------
 
+@bp.route('/api/users/<int:user_id>/games')
+@login_required
+def user_games(user_id):
+    """One page of a user's finished games, newest first. Pass the returned
+    ``next_cursor`` back as ``cursor`` for the following page."""
+    if not get_user(user_id):
+        return jsonify({'error': 'User not found.'}), 404
+    limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1),
+                HISTORY_MAX_PAGE_SIZE)
+    before = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor.'}), 400
+    games, next_cursor = get_game_history(user_id, limit, before)
+    return jsonify({'games': games, 'next_cursor': next_cursor})
+
+
 @bp.route('/api/players/search')
 @login_required
 def search_players():
-    q = request.args.get('q', '').strip().lower()
+    from . import rate_limit
+    if not rate_limit.allow('player_search', session['user_id']):
+        return jsonify([]), 429, {'Retry-After': '1'}
+
+    q = normalize_name_key(request.args.get('q', ''))
     code = request.args.get('code', '')
     if len(q) < 2:
         return jsonify([])
@@ -230,6 +303,47 @@ def search_players():
     return jsonify(results)
 
 
+@bp.route('/api/players/names/<version>.json')
+@login_required
+def player_names(version):
+    """The gzipped player-name dictionary for client-side autocomplete.
+    The URL changes with every index rebuild, so responses never go stale."""
+    current, body = get_name_dictionary()
+    if version != current and _catch_up_players(current_app._get_current_object()):
+        current, body = get_name_dictionary()
+    if version != current:
+        return jsonify({'error': 'Unknown dictionary version.'}), 404
+
+    response = Response(mimetype='application/json')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_etag(current + '-gz')     # one ETag per encoding
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_etag(current)
+        response.set_data(gzip.decompress(body))
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+
+@bp.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    from . import db_pool, metrics
+    from .game_manager import memory_stats
+    from .matchmaking import QUEUE
+
+    if not current_user().is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify({
+        'db_pool': db_pool.pool_status(db.engine),
+        'sessions': memory_stats(),
+        'matchmaking': QUEUE.stats(),
+        **metrics.snapshot(),
+    })
+
+
 @bp.route('/admin/refresh-players', methods=['GET'])
 @login_required
 def admin_refresh_page():
@@ -242,8 +356,8 @@ def admin_refresh_page():
 @bp.route('/admin/refresh-players', methods=['POST'])
 @login_required
 def admin_refresh():
-    from . import _rebuild_indexes
-    from .game_logic import clean_player_record
+    from . import _rebuild_indexes, offload
+    from .game_logic import clean_player_records
     from .models import Player
     from datetime import datetime
 
@@ -257,25 +371,24 @@ def admin_refresh():
         return redirect(url_for('main.admin_refresh_page'))
 
     try:
-        raw_players = json.load(f)
+        raw_players = offload.run(json.loads, f.read())
         assert isinstance(raw_players, list)
     except Exception:
         flash('Invalid JSON file.')
         return redirect(url_for('main.admin_refresh_page'))
 
     now = datetime.utcnow()
-    rows = []
-    for raw in raw_players:
-        c = clean_player_record(raw)
-        rows.append(Player(
-            name=c['name'], name_key=c['name_key'], country=c['country'],
-            positions=c['positions'], clubs=c['clubs'], apps=c['apps'], updated_at=now,
-        ))
+    rows = [
+        Player(name=c['name'], name_key=c['name_key'], country=c['country'],
+               positions=c['positions'], clubs=c['clubs'], apps=c['apps'], updated_at=now)
+        for c in offload.run(clean_player_records, raw_players)
+    ]
 
     Player.query.delete()
     db.session.bulk_save_objects(rows)
     db.session.commit()
 
     _rebuild_indexes(current_app)
+    _announce_players_refresh()     # the other shards catch up
     flash(f'Player data refreshed: {len(rows)} players loaded.')
     return redirect(url_for('main.admin_refresh_page'))
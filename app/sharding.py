@@ -0,0 +1,242 @@
+"""Consistent-hash sharding of games across worker processes.
+
+In a sharded deployment (``SHARD_COUNT`` > 0, see scripts/run_shards.py)
+every game code belongs to one worker: the node a ``HashRing`` of the shard
+ids maps it to. Workers only mint codes they own, so the router in front of
+them can send ``/game/<code>``, ``/api/players/search?code=`` and the
+game's Socket.IO connection (``?code=``) straight to the owner with no
+lookup. Code-less Socket.IO traffic (lobby, quick match) goes to the owner
+of ``LOBBY_KEY``; other code-less requests may go to any worker.
+
+What a worker can't answer from its own GAMES — "is this user already in
+a game?" and the lobby list — goes through a small directory: the
+shard_games table in the shared database. Each worker writes its live
+games there when they change and heartbeats its rows; rows whose worker
+stopped heartbeating are ignored. The shard_state table holds values all
+workers must agree on, such as the player-data version of the last admin
+refresh, which each worker polls and catches up to.
+
+With sharding off every function here falls back to the local tables.
+"""
+import hashlib
+import threading
+import time
+from bisect import bisect
+from typing import Iterable, Optional
+from urllib.parse import parse_qs
+
+VNODES = 64
+LOBBY_KEY = 'lobby'
+LIVE = ('waiting', 'active')
+STALE_INTERVALS = 3     # directory rows older than this many intervals are dead
+PLAYERS_VERSION = 'players_version'
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Maps keys to nodes; adding or removing a node moves only ~1/N keys."""
+
+    def __init__(self, nodes: Iterable, vnodes: int = VNODES):
+        points = sorted((_hash(f'{node}#{i}'), node) for node in nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def node_for(self, key: str):
+        i = bisect(self._hashes, _hash(key))
+        return self._nodes[i % len(self._nodes)]
+
+
+def route_key(target: str) -> Optional[str]:
+    """The ring key for an HTTP request target (path + query), or None when
+    any worker can serve it."""
+    path, _, query = target.partition('?')
+    parts = path.split('/')
+    if len(parts) >= 3 and parts[1] == 'game' and len(parts[2]) == 8 and parts[2].isalnum():
+        return parts[2].upper()
+    if path.startswith('/socket.io/') or path == '/api/players/search':
+        code = parse_qs(query).get('code', [''])[0]
+        if code:
+            return code.upper()
+        if path.startswith('/socket.io/'):
+            return LOBBY_KEY
+    return None
+
+
+# ---------------------------------------------------------------------------
+# This worker
+# ---------------------------------------------------------------------------
+
+_ring: Optional[HashRing] = None
+_shard = 0
+_interval = 2.0
+_published = None       # code -> directory row last written; None: not yet
+_publish_lock = threading.Lock()
+
+
+def configure(shard_id: int, shard_count: int, interval: float = 2.0) -> None:
+    global _ring, _shard, _interval, _published
+    _ring = HashRing(range(shard_count)) if shard_count else None
+    _shard = shard_id
+    _interval = interval
+    _published = None
+
+
+def enabled() -> bool:
+    return _ring is not None
+
+
+def shard_id() -> int:
+    return _shard
+
+
+def owner(code: str) -> int:
+    return _ring.node_for(code) if _ring is not None else _shard
+
+
+def owns(code: str) -> bool:
+    return _ring is None or _ring.node_for(code) == _shard
+
+
+# ---------------------------------------------------------------------------
+# Directory
+# ---------------------------------------------------------------------------
+
+def _row(game) -> tuple:
+    seats = game.seats
+    return (game.status, seats[0].username if seats else '?', len(seats),
+            len(game.spectators), seats[0].user_id if seats else None,
+            seats[1].user_id if len(seats) > 1 else None)
+
+
+def publish() -> None:
+    """Write this worker's live games to the directory, touching only the
+    rows that changed since the last call. Needs an app context.
+
+    Calls are serialised: two overlapping diffs against the same
+    ``_published`` would both insert the changed rows."""
+    if _ring is None:
+        return
+    with _publish_lock:
+        _publish()
+
+
+def _publish() -> None:
+    global _published
+    from . import db
+    from .game_manager import GAMES
+    from .models import ShardGame
+
+    current = {g.code: _row(g) for g in list(GAMES.values()) if g.status in LIVE}
+    if _published is None:
+        stale = db.delete(ShardGame).where(ShardGame.shard == _shard)
+        changed = current
+    else:
+        changed = {c: r for c, r in current.items() if _published.get(c) != r}
+        gone = [c for c in _published if c not in current]
+        if not changed and not gone:
+            return
+        stale = db.delete(ShardGame).where(ShardGame.code.in_(gone + list(changed)))
+    try:
+        db.session.execute(stale)
+        if changed:
+            now = time.time()
+            db.session.execute(db.insert(ShardGame), [
+                {'code': code, 'shard': _shard, 'status': status, 'host': host,
+                 'player_count': players, 'spectator_count': spectators,
+                 'user0': user0, 'user1': user1, 'updated_at': now}
+                for code, (status, host, players, spectators, user0, user1) in changed.items()
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    _published = current
+
+
+def heartbeat() -> None:
+    """Keep this worker's directory rows fresh."""
+    if _ring is None:
+        return
+    from . import db
+    from .models import ShardGame
+    db.session.execute(db.update(ShardGame).where(ShardGame.shard == _shard)
+                       .values(updated_at=time.time()))
+    db.session.commit()
+
+
+def _fresh():
+    from .models import ShardGame
+    return ShardGame.updated_at >= time.time() - STALE_INTERVALS * _interval
+
+
+def lobby_sessions() -> list:
+    """Waiting and active games for the lobby, from every shard."""
+    from .game_manager import lobby_sessions as local_sessions
+    if _ring is None:
+        return local_sessions()
+    from . import db
+    from .models import ShardGame
+    rows = db.session.execute(
+        db.select(ShardGame.code, ShardGame.host, ShardGame.player_count,
+                  ShardGame.spectator_count, ShardGame.status)
+        .where(_fresh()).order_by(ShardGame.code)
+    )
+    return [{'code': code, 'host': host, 'player_count': players,
+             'spectator_count': spectators, 'status': status}
+            for code, host, players, spectators, status in rows]
+
+
+def user_game_code(user_id: int) -> Optional[str]:
+    """Code of the waiting/active game ``user_id`` is seated in, on any shard."""
+    from .game_manager import get_game_for_user
+    game = get_game_for_user(user_id)
+    if game is not None:
+        return game.code
+    if _ring is None:
+        return None
+    from . import db
+    from .models import ShardGame
+    return db.session.execute(
+        db.select(ShardGame.code)
+        .where(db.or_(ShardGame.user0 == user_id, ShardGame.user1 == user_id))
+        .where(ShardGame.status.in_(LIVE), _fresh())
+        .limit(1)
+    ).scalar()
+
+
+# ---------------------------------------------------------------------------
+# Shared state
+# ---------------------------------------------------------------------------
+
+def players_version() -> Optional[str]:
+    """Token of the last admin player refresh on any shard, or None when
+    unsharded or never refreshed."""
+    if _ring is None:
+        return None
+    from . import db
+    from .models import ShardState
+    return db.session.execute(
+        db.select(ShardState.value).where(ShardState.key == PLAYERS_VERSION)
+    ).scalar()
+
+
+def set_players_version(version: str) -> None:
+    """Announce a player refresh to every shard; each rebuilds its indexes
+    from the players table when it next sees a different token."""
+    if _ring is None:
+        return
+    from sqlalchemy.exc import IntegrityError
+    from . import db
+    from .models import ShardState
+    update = (db.update(ShardState).where(ShardState.key == PLAYERS_VERSION)
+              .values(value=version))
+    if db.session.execute(update).rowcount == 0:
+        try:
+            db.session.execute(db.insert(ShardState), [{'key': PLAYERS_VERSION, 'value': version}])
+        except IntegrityError:      # another shard inserted it first
+            db.session.rollback()
+            db.session.execute(update)
+    db.session.commit()
@@ -1,15 +1,22 @@
 """SocketIO event handlers."""
+import functools
 import time
 from datetime import datetime
 
-from flask import session
+from flask import request, session
 from flask_socketio import emit, join_room, leave_room
 
-from . import db, socketio
-from .models import Game, GamePlayer, User
-from .game_logic import Outcome, evaluate_submission, cpu_pick
-from .game_manager import (GAMES, assign_prompt, create_game, get_game,
-                            get_player_index, lobby_sessions, start_turn_timer)
+from . import (_catch_up_players, db, engine, event_log, locks, rate_limit, sharding,
+               socketio, wire)
+from .engine import GameEngine, MoveError
+from .models import Game, GameEventBatch, GamePlayer
+from .matchmaking import QUEUE, skill_rating
+from .user_cache import get_user
+from .game_logic import Outcome
+from .game_manager import (GAMES, SessionLimitError, add_spectator,
+                            assign_prompt, create_game, expired_games,
+                            get_game, get_player_index, make_room, memory_stats, remove_game,
+                            remove_spectator, spectating, start_turn_timer, touch)
 
 
 # ---------------------------------------------------------------------------
@@ -20,55 +27,95 @@ def _current_user_id() -> int | None:
     return session.get('user_id')
 
 
+def _current_username() -> str | None:
+    # Stored in the Socket.IO session on connect, so events need no DB read
+    return session.get('username')
+
+
 def _sync_game_db(game, app):
-    """Persist state_json snapshot and optionally mark finished."""
+    """Flush pending log events and, once the game is over, mark the row
+    finished/abandoned with a final state_json snapshot.
+
+    While a game is live its event log is the only durable record of it
+    (state_json is written once, at the end), so the log is flushed at
+    every turn boundary; see _maybe_flush_events."""
     with app.app_context():
         db_game = Game.query.filter_by(code=game.code).first()
         if not db_game:
-            return
-        db_game.state_json = game.to_dict()
-        if game.status == 'finished':
+            return  # row not written yet: the events stay pending for save_new_game
+        # Snapshot under the game lock; the DB round trips run without it
+        with locks.game_lock(game.code):
+            first_seq, events = game.take_pending_events()
+            status = game.status
+            state = game.to_dict() if status in ('finished', 'abandoned') else None
+            winner = next((s for s in game.seats if s.score <= 0), None)
+        if events:
+            db.session.add(GameEventBatch(
+                game_id=db_game.id, first_seq=first_seq, count=len(events),
+                payload=event_log.encode_batch(events),
+            ))
+        if state is not None:
+            db_game.state_json = state
+        if status == 'active':
+            db_game.status = 'active'
+        elif status == 'finished':
             db_game.status = 'finished'
             db_game.finished_at = datetime.utcnow()
-            if game.seats:
-                winner_seat = next(
-                    (i for i, s in enumerate(game.seats) if s.score <= 0), None
-                )
-                if winner_seat is not None:
-                    db_game.winner_id = game.seats[winner_seat].user_id
-        elif game.status == 'abandoned':
+            if winner is not None:
+                db_game.winner_id = winner.user_id
+        elif status == 'abandoned':
             db_game.status = 'abandoned'
             db_game.finished_at = datetime.utcnow()
         db.session.commit()
 
 
+def save_new_game(game, app, status: str) -> None:
+    """Write the row for a session just created in memory and flush its
+    log so far (create, prompt, seats), so a restart can restore it."""
+    with app.app_context():
+        db.session.add(Game(code=game.code, status=status))
+        db.session.commit()
+    _sync_game_db(game, app)
+
+
 def _record_game_players(game, app):
+    with locks.game_lock(game.code):
+        rows = [dict(seat=i, user_id=seat.user_id, final_score=seat.score,
+                     turns_taken=seat.turns_taken, won=seat.score <= 0,
+                     forfeit_count=seat.forfeit_count)
+                for i, seat in enumerate(game.seats)
+                if not seat.is_cpu]  # CPU has no DB user row
     with app.app_context():
         db_game = Game.query.filter_by(code=game.code).first()
         if not db_game:
             return
-        for i, seat in enumerate(game.seats):
-            if seat.is_cpu:
-                continue  # CPU has no DB user row
-            gp = GamePlayer(
-                game_id=db_game.id,
-                user_id=seat.user_id,
-                seat=i,
-                final_score=seat.score,
-                turns_taken=seat.turns_taken,
-                won=seat.score <= 0,
-                forfeit_count=seat.forfeit_count,
-            )
-            db.session.add(gp)
+        for row in rows:
+            db.session.add(GamePlayer(game_id=db_game.id, **row))
         try:
             db.session.commit()
         except Exception:
             db.session.rollback()
 
 
+def _emit_game(event: str, payload, code: str) -> None:
+    """Encode the payload once and fan it out to players and spectators."""
+    if not isinstance(payload, wire.RawJSON):
+        payload = wire.encode(payload)
+    socketio.emit(event, payload, room=code)
+
+
 def _broadcast_lobby(app):
+    """Publish this worker's games and push the lobby list. A directory
+    error is logged, not raised: callers are mid-way through game flow."""
     with app.app_context():
-        socketio.emit('lobby_update', {'sessions': lobby_sessions()}, room='lobby')
+        try:
+            sharding.publish()
+            sessions = sharding.lobby_sessions()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Lobby broadcast failed')
+            return
+        socketio.emit('lobby_update', {'sessions': sessions}, room='lobby')
 
 
 def _player_info_text(player: dict) -> str:
@@ -83,6 +130,133 @@ def _player_info_text(player: dict) -> str:
     )
 
 
+_FORFEIT_MESSAGES = {
+    Outcome.NOT_FOUND: '"{}" not found in the database.',
+    Outcome.NOT_MATCHING: '"{}" does not match the prompt.',
+    Outcome.OVER_180: '"{}" has more than 180 appearances.',
+    Outcome.INVALID_DART_SCORE: '"{}"\'s apps is not a valid dart score.',
+    Outcome.ALREADY_USED: '"{}" has already been used this game.',
+}
+
+
+def _turn_message(seat, outcome: str, name: str, points: int, player) -> str:
+    if outcome == Outcome.TIMEOUT:
+        return "Time's up! Turn forfeited."
+    if outcome == Outcome.NO_PICK:
+        return f'{seat.username} has no valid pick — turn skipped.'
+    if seat.is_cpu:
+        return f"{seat.username} plays: {player['name']} (−{points})"
+    if outcome in _FORFEIT_MESSAGES:
+        msg = _FORFEIT_MESSAGES[outcome].format(name)
+        return msg + '\n' + _player_info_text(player) if player else msg
+    if outcome == Outcome.BUST:
+        return f'BUST! Score would go below −20. Turn forfeited.\n{_player_info_text(player)}'
+    return f"{player['name']} accepted: −{points}\n{_player_info_text(player)}"
+
+
+def _engine() -> GameEngine:
+    # Built per action so an admin index refresh takes effect immediately
+    return GameEngine(get_player_index())
+
+
+def _game_frames(game, events: list, legacy: bool = False) -> list:
+    """The room emits for one engine command as ``(event, payload)`` pairs.
+
+    Normally a single ``game_update`` carrying the turn outcome, the new
+    state and, when the game ended, the result — one encode and one frame
+    per recipient. ``legacy`` splits it into the old turn_result /
+    game_over / game_state trio.
+    """
+    turn = over = None
+    for event in events:
+        kind = event[0]
+        if kind == engine.TURN:
+            _, seat_idx, outcome, name, points, player = event
+            turn = {
+                'outcome': outcome,
+                'message': _turn_message(game.seats[seat_idx], outcome, name,
+                                         points, player),
+                'forfeited': outcome not in (Outcome.SCORED, Outcome.WIN),
+            }
+        elif kind == engine.GAME_OVER:
+            _, winner, abandoned = event
+            over = {
+                'winner_seat': winner,
+                'winner_username': game.seats[winner].username,
+                'final_scores': [s.score for s in game.seats],
+            }
+            if abandoned:
+                over['abandoned'] = True
+
+    if turn is None and over is None:
+        return []
+    if legacy:
+        frames = []
+        if turn is not None:
+            frames.append(('turn_result', turn))
+        if over is not None:
+            frames.append(('game_over', over))
+        if turn is not None:
+            frames.append(('game_state', game.encoded_state()))
+        return frames
+
+    update = {'turn': turn} if turn is not None else {}
+    update['state'] = game.encoded_state()
+    if over is not None:
+        update['game_over'] = over
+    return [('game_update', wire.encode_object(update))]
+
+
+def _dispatch(game, events: list, app) -> None:
+    """Broadcast the events of one engine command, arm the timers they call
+    for, and persist the game when it ended."""
+    code = game.code
+    for name, payload in _game_frames(game, events, app.config['LEGACY_SOCKET_EVENTS']):
+        _emit_game(name, payload, code)
+
+    ended = finished = False
+    for event in events:
+        kind = event[0]
+        if kind == engine.NEXT_TURN:
+            _, seat_idx, turn_seq = event
+            socketio.start_background_task(_expire_turn, code, turn_seq, app)
+            if game.seats[seat_idx].is_cpu:
+                socketio.start_background_task(_cpu_take_turn, code, turn_seq, app)
+        elif kind == engine.GAME_OVER:
+            ended = finished = True
+        elif kind == engine.ABANDONED:
+            ended = True
+
+    if ended:
+        socketio.start_background_task(_persist_ended_game, game, finished, app)
+        socketio.start_background_task(_cleanup_game, code, app)
+    elif events:
+        _maybe_flush_events(game, events, app)
+
+
+def _persist_ended_game(game, finished: bool, app) -> None:
+    """Write a game that just ended and refresh the lobby. A task of its
+    own because _dispatch runs under the game lock."""
+    if finished:
+        _record_game_players(game, app)
+    _sync_game_db(game, app)
+    _broadcast_lobby(app)
+
+
+def start_game(game, app) -> None:
+    """Activate a game whose seats are filled and arm its first turn."""
+    _dispatch(game, _engine().start(game), app)
+
+
+def _game_locked(handler):
+    """Run a handler taking ``{'code': ...}`` under that game's lock."""
+    @functools.wraps(handler)
+    def wrapper(data):
+        with locks.game_lock(str(data.get('code', '')).upper()):
+            return handler(data)
+    return wrapper
+
+
 # ---------------------------------------------------------------------------
 # Connection / lobby
 # ---------------------------------------------------------------------------
@@ -90,14 +264,16 @@ def _player_info_text(player: dict) -> str:
 @socketio.on('connect')
 def on_connect():
     uid = _current_user_id()
-    if not uid:
+    user = get_user(uid) if uid else None
+    if not user:
         return False  # reject unauthenticated connections
+    session['username'] = user.username
 
 
 @socketio.on('join_lobby')
 def on_join_lobby():
     join_room('lobby')
-    emit('lobby_update', {'sessions': lobby_sessions()})
+    emit('lobby_update', {'sessions': sharding.lobby_sessions()})
 
 
 @socketio.on('leave_lobby')
@@ -105,11 +281,69 @@ def on_leave_lobby():
     leave_room('lobby')
 
 
+# ---------------------------------------------------------------------------
+# Quick match
+# ---------------------------------------------------------------------------
+
+@socketio.on('quick_match')
+def on_quick_match():
+    from flask import current_app
+    from .stats import get_user_stats
+    uid = _current_user_id()
+    username = _current_username()
+    if not uid or not username:
+        return
+
+    existing = sharding.user_game_code(uid)
+    if existing:
+        emit('match_found', {'code': existing})
+        return
+
+    stats = get_user_stats(uid)
+    rating = skill_rating(stats['games_won'], stats['games_played'])
+    pair = QUEUE.join(uid, username, rating, request.sid)
+    if pair is None:
+        emit('quick_match_waiting', QUEUE.stats())
+        return
+    _seat_match(pair, current_app._get_current_object())
+
+
+@socketio.on('cancel_quick_match')
+def on_cancel_quick_match():
+    uid = _current_user_id()
+    if uid:
+        QUEUE.leave(uid)
+
+
+def _seat_match(pair, app) -> None:
+    """Start a game for two matched tickets; the longer waiter moves first."""
+    if not reserve_session_slot(app):
+        for ticket in pair:
+            socketio.emit('error', {'message': 'The server is full right now. Try again shortly.'},
+                          to=ticket.sid)
+        return
+    from .game_manager import Seat
+    start_score = app.config['START_SCORE']
+    game = create_game(start_score)
+    with locks.game_lock(game.code):
+        assign_prompt(game)
+        for ticket in pair:
+            game.add_seat(Seat(user_id=ticket.user_id, username=ticket.username,
+                               score=start_score))
+        start_game(game, app)
+        touch(game)
+
+    save_new_game(game, app, 'active')
+    for ticket in pair:
+        socketio.emit('match_found', {'code': game.code}, to=ticket.sid)
+
+
 # ---------------------------------------------------------------------------
 # Game events
 # ---------------------------------------------------------------------------
 
 @socketio.on('request_state')
+@_game_locked
 def on_request_state(data):
     """Re-send the authoritative state to one client without reconnect side
     effects. Used by the client as a safety net when its turn timer hits 0."""
@@ -118,11 +352,13 @@ def on_request_state(data):
         return
     code = data.get('code', '').upper()
     game = get_game(code)
-    if game and game.seat_for_user(uid) is not None:
-        emit('game_state', game.to_dict())
+    if game and (game.seat_for_user(uid) is not None
+                 or request.sid in game.spectators):
+        emit('game_state', game.encoded_state())
 
 
 @socketio.on('join_game')
+@_game_locked
 def on_join_game(data):
     from flask import current_app
     uid = _current_user_id()
@@ -136,8 +372,8 @@ def on_join_game(data):
         return
 
     start_score = current_app.config['START_SCORE']
-    user = db.session.get(User, uid)
-    if not user:
+    username = _current_username()
+    if not username:
         return
 
     existing_seat = game.seat_for_user(uid)
@@ -146,45 +382,58 @@ def on_join_game(data):
         # Re-attach (reconnect) — bump disconnect_seq to cancel any pending timeout
         game.seats[existing_seat].connected = True
         game.disconnect_seq[existing_seat] = game.disconnect_seq.get(existing_seat, 0) + 1
+        touch(game)
         join_room(code)
-        emit('game_state', game.to_dict())
+        emit('game_state', game.encoded_state())
         socketio.emit('opponent_reconnected', {'seat': existing_seat},
                       room=code, include_self=False)
         return
 
-    if len(game.seats) >= 2:
-        emit('error', {'message': 'Game is full.'})
-        return
-
-    if game.status != 'waiting':
-        emit('error', {'message': 'Game already started.'})
+    if data.get('spectate') or len(game.seats) >= 2 or game.status != 'waiting':
+        _join_as_spectator(game, current_app.config['MAX_SPECTATORS'])
         return
 
     from .game_manager import Seat
-    game.seats.append(Seat(
+    game.add_seat(Seat(
         user_id=uid,
-        username=user.username,
+        username=username,
         score=start_score,
     ))
     join_room(code)
 
     if len(game.seats) == 2:
-        game.status = 'active'
-        start_turn_timer(game)
-        _sync_game_db_bg(game)
-        socketio.start_background_task(_expire_turn, code, game.turn_seq,
-                                       current_app._get_current_object())
+        start_game(game, current_app._get_current_object())
+    _sync_game_db_bg(game)  # the seat is durable even while the game waits
+    touch(game)
+
+    _emit_game('game_state', game.encoded_state(), code)
+    socketio.start_background_task(_broadcast_lobby, current_app._get_current_object())
+
 
-    socketio.emit('game_state', game.to_dict(), room=code)
-    _broadcast_lobby(current_app._get_current_object())
+def _join_as_spectator(game, limit: int) -> None:
+    if game.status != 'active':
+        emit('error', {'message': 'Only games in progress can be watched.'})
+        return
+    previous = spectating(request.sid)
+    if not add_spectator(game, request.sid, limit):
+        emit('spectate_full', {'message': 'This game has reached its spectator limit.'})
+        return
+    if previous and previous != game.code:
+        leave_room(previous)  # stop the old game's frames
+    join_room(game.code)
+    emit('game_state', game.encoded_state())
 
 
 @socketio.on('submit_player')
+@_game_locked
 def on_submit_player(data):
     from flask import current_app
     uid = _current_user_id()
     if not uid:
         return
+    if not rate_limit.allow('submit_player', uid):
+        emit('error', {'message': 'Too many submissions — slow down.'})
+        return
 
     code = data.get('code', '').upper()
     name = data.get('name', '').strip()
@@ -199,85 +448,17 @@ def on_submit_player(data):
         emit('error', {'message': 'You are not in this game.'})
         return
 
-    if seat_idx != game.current_turn:
-        emit('error', {'message': "It's not your turn."})
-        return
-
-    idx = get_player_index()
-    seat = game.seats[seat_idx]
-    outcome, points, player = evaluate_submission(
-        seat.score, name, game.used_players, game.prompt, idx
-    )
-
-    seat.turns_taken += 1
-
-    if outcome in (Outcome.NOT_FOUND, Outcome.NOT_MATCHING,
-                   Outcome.OVER_180, Outcome.INVALID_DART_SCORE,
-                   Outcome.ALREADY_USED):
-        seat.forfeit_count += 1
-        seat.history.append({'name': name, 'result': 'X'})
-        messages = {
-            Outcome.NOT_FOUND: f'"{name}" not found in the database.',
-            Outcome.NOT_MATCHING: f'"{name}" does not match the prompt.',
-            Outcome.OVER_180: f'"{name}" has more than 180 appearances.',
-            Outcome.INVALID_DART_SCORE: f'"{name}"\'s apps is not a valid dart score.',
-            Outcome.ALREADY_USED: f'"{name}" has already been used this game.',
-        }
-        msg = messages[outcome]
-        if player:
-            msg += '\n' + _player_info_text(player)
-        app = current_app._get_current_object()
-        _advance_turn(game)
-        _maybe_trigger_cpu(game, app)
-        socketio.emit('turn_result', {'outcome': outcome, 'message': msg,
-                                      'forfeited': True}, room=code)
-        socketio.emit('game_state', game.to_dict(), room=code)
+    try:
+        events = _engine().submit(game, seat_idx, name)
+    except MoveError as e:
+        emit('error', {'message': str(e)})
         return
-
-    if outcome == Outcome.BUST:
-        seat.forfeit_count += 1
-        seat.history.append({'name': player['name'], 'result': 'BUST'})
-        msg = f'BUST! Score would go below −20. Turn forfeited.\n{_player_info_text(player)}'
-        app = current_app._get_current_object()
-        _advance_turn(game)
-        _maybe_trigger_cpu(game, app)
-        socketio.emit('turn_result', {'outcome': outcome, 'message': msg,
-                                      'forfeited': True}, room=code)
-        socketio.emit('game_state', game.to_dict(), room=code)
-        return
-
-    # Valid score
-    game.used_players.add(player['name_key'])
-    seat.score -= points
-    seat.history.append({'name': player['name'], 'result': points})
-    msg = f"{player['name']} accepted: −{points}\n{_player_info_text(player)}"
-
-    if outcome == Outcome.WIN:
-        game.status = 'finished'
-        game.deadline_epoch = 0.0
-        socketio.emit('turn_result', {'outcome': outcome, 'message': msg,
-                                      'forfeited': False}, room=code)
-        socketio.emit('game_over', {
-            'winner_seat': seat_idx,
-            'winner_username': seat.username,
-            'final_scores': [s.score for s in game.seats],
-        }, room=code)
-        socketio.emit('game_state', game.to_dict(), room=code)
-        app = current_app._get_current_object()
-        _record_game_players(game, app)
-        _sync_game_db_bg(game)
-        _broadcast_lobby(app)
-        socketio.start_background_task(_cleanup_game, code, app)
-    else:
-        app = current_app._get_current_object()
-        _advance_turn(game)
-        _maybe_trigger_cpu(game, app)
-        socketio.emit('turn_result', {'outcome': outcome, 'message': msg,
-                                      'forfeited': False}, room=code)
-        socketio.emit('game_state', game.to_dict(), room=code)
+    touch(game)
+    _dispatch(game, events, current_app._get_current_object())
 
 
 @socketio.on('leave_game')
+@_game_locked
 def on_leave_game(data):
     from flask import current_app
     uid = _current_user_id()
@@ -289,36 +470,18 @@ def on_leave_game(data):
     if not game:
         return
 
+    if request.sid in game.spectators:
+        remove_spectator(request.sid)
+        leave_room(code)
+        return
+
     seat_idx = game.seat_for_user(uid)
     if seat_idx is None:
         return
 
     leave_room(code)
-    app = current_app._get_current_object()
-
-    if game.status == 'active':
-        if game.is_solo:
-            # No CPU "win" for abandonment — just close the game
-            game.status = 'abandoned'
-        else:
-            winner_seat = 1 - seat_idx
-            if winner_seat < len(game.seats):
-                game.status = 'finished'
-                game.seats[winner_seat].score = 0
-                socketio.emit('game_over', {
-                    'winner_seat': winner_seat,
-                    'winner_username': game.seats[winner_seat].username,
-                    'final_scores': [s.score for s in game.seats],
-                    'abandoned': True,
-                }, room=code)
-                _record_game_players(game, app)
-        _sync_game_db_bg(game)
-    elif game.status == 'waiting':
-        game.status = 'abandoned'
-        _sync_game_db_bg(game)
-
-    socketio.start_background_task(_cleanup_game, code, app)
-    _broadcast_lobby(app)
+    touch(game)
+    _dispatch(game, _engine().leave(game, seat_idx), current_app._get_current_object())
 
 
 @socketio.on('rematch')
@@ -330,49 +493,56 @@ def on_rematch(data):
 
     code = data.get('code', '').upper()
     old_game = get_game(code)
-    if not old_game or old_game.status != 'finished':
-        return
-
-    seat_idx = old_game.seat_for_user(uid)
-    if seat_idx is None:
+    if not old_game:
         return
 
     app = current_app._get_current_object()
     start_score = current_app.config['START_SCORE']
 
-    # Mark this seat as ready for rematch
-    if not hasattr(old_game, 'rematch_ready'):
-        old_game.rematch_ready = set()
-    old_game.rematch_ready.add(seat_idx)
+    with locks.game_lock(code):
+        if old_game.status != 'finished' or getattr(old_game, 'rematch_started', False):
+            return
+        seat_idx = old_game.seat_for_user(uid)
+        if seat_idx is None:
+            return
 
-    # For solo games, only the human needs to accept; for multiplayer, both must.
-    human_seat_count = sum(1 for s in old_game.seats if not s.is_cpu)
-    if len(old_game.rematch_ready) < human_seat_count:
-        emit('rematch_waiting', {'message': 'Waiting for opponent to accept rematch...'})
-        return
+        # Mark this seat as ready for rematch
+        if not hasattr(old_game, 'rematch_ready'):
+            old_game.rematch_ready = set()
+        old_game.rematch_ready.add(seat_idx)
 
-    # Ready — create a new game preserving seat types
+        # For solo games, only the human needs to accept; for multiplayer, both must.
+        human_seat_count = sum(1 for s in old_game.seats if not s.is_cpu)
+        if len(old_game.rematch_ready) < human_seat_count:
+            emit('rematch_waiting', {'message': 'Waiting for opponent to accept rematch...'})
+            return
+        old_game.rematch_started = True
+        is_solo = old_game.is_solo
+        seats = [(s.user_id, s.username, s.is_cpu, s.cpu_difficulty) for s in old_game.seats]
+
+    # Ready — create a new game preserving seat types. The old game's lock is
+    # released first: two game locks are never held at once.
+    if not reserve_session_slot(app):
+        with locks.game_lock(code):
+            old_game.rematch_started = False
+        emit('error', {'message': 'The server is full right now. Try again shortly.'})
+        return
     from .game_manager import Seat
     new_game = create_game(start_score)
-    new_game.is_solo = old_game.is_solo
-    assign_prompt(new_game)
-
-    for s in old_game.seats:
-        new_game.seats.append(Seat(
-            user_id=s.user_id, username=s.username, score=start_score,
-            is_cpu=s.is_cpu, cpu_difficulty=s.cpu_difficulty,
-        ))
-
-    new_game.status = 'active'
-    start_turn_timer(new_game)
-
-    db_game = Game(code=new_game.code, status='active')
-    db.session.add(db_game)
-    db.session.commit()
+    with locks.game_lock(new_game.code):
+        new_game.is_solo = is_solo
+        assign_prompt(new_game)
+        for user_id, username, is_cpu, cpu_difficulty in seats:
+            new_game.add_seat(Seat(
+                user_id=user_id, username=username, score=start_score,
+                is_cpu=is_cpu, cpu_difficulty=cpu_difficulty,
+            ))
+        start_game(new_game, app)
+        touch(new_game)
+
+    save_new_game(new_game, app, 'active')
 
     socketio.emit('rematch_start', {'code': new_game.code}, room=code)
-    socketio.start_background_task(_expire_turn, new_game.code, new_game.turn_seq, app)
-    _maybe_trigger_cpu(new_game, app)
     _broadcast_lobby(app)
 
 
@@ -384,10 +554,17 @@ def on_disconnect():
         return
 
     app = current_app._get_current_object()
+    if remove_spectator(request.sid):
+        return
+    ticket = QUEUE.ticket(uid)
+    if ticket is not None and ticket.sid == request.sid:
+        QUEUE.leave(uid)
 
     for game in list(GAMES.values()):
-        seat_idx = game.seat_for_user(uid)
-        if seat_idx is not None and game.status == 'active':
+        with locks.game_lock(game.code):
+            seat_idx = game.seat_for_user(uid)
+            if seat_idx is None or game.status != 'active':
+                continue
             game.seats[seat_idx].connected = False
             seq = game.disconnect_seq.get(seat_idx, 0) + 1
             game.disconnect_seq[seat_idx] = seq
@@ -396,7 +573,7 @@ def on_disconnect():
             socketio.start_background_task(
                 _handle_disconnect_timeout, game.code, seat_idx, seq, uid, app
             )
-            break
+        break
 
 
 # ---------------------------------------------------------------------------
@@ -412,148 +589,37 @@ def _maybe_trigger_cpu(game, app) -> None:
         socketio.start_background_task(_cpu_take_turn, game.code, game.turn_seq, app)
 
 
-def _advance_turn(game) -> None:
-    start_turn_timer(game)
-    game.current_turn = (game.current_turn + 1) % 2
-    from flask import current_app
-    socketio.start_background_task(
-        _expire_turn, game.code, game.turn_seq,
-        current_app._get_current_object()
-    )
-
-
-def _expire_turn(code: str, captured_seq: int, app) -> None:
-    import gevent
-    gevent.sleep(60)
+def _expire_turn(code: str, captured_seq: int, app, delay: float = 60) -> None:
+    socketio.sleep(delay)
     with app.app_context():
         game = get_game(code)
-        if not game or game.status != 'active':
-            return
-        if game.turn_seq != captured_seq:
-            return  # A newer turn is running; this task is stale
-
-        seat = game.seats[game.current_turn]
-        if seat.is_cpu:
-            # CPU should never actually time out — stale guard covers this
-            return
-
-        seat.turns_taken += 1
-        seat.forfeit_count += 1
-        seat.history.append({'name': 'Timeout', 'result': 'X'})
-
-        game.current_turn = (game.current_turn + 1) % 2
-        start_turn_timer(game)
-
-        socketio.emit('turn_result', {
-            'outcome': 'timeout',
-            'message': "Time's up! Turn forfeited.",
-            'forfeited': True,
-        }, room=code)
-        socketio.emit('game_state', game.to_dict(), room=code)
-
-        socketio.start_background_task(_expire_turn, code, game.turn_seq, app)
-        _maybe_trigger_cpu(game, app)
+        if game:
+            with locks.game_lock(code):
+                _dispatch(game, _engine().timeout(game, captured_seq), app)
 
 
 def _cpu_take_turn(code: str, captured_seq: int, app) -> None:
-    import gevent
-    gevent.sleep(1.5)
+    socketio.sleep(1.5)
     with app.app_context():
         game = get_game(code)
-        if not game or game.status != 'active':
-            return
-        if game.turn_seq != captured_seq:
-            return
-
-        cpu_seat_idx = game.current_turn
-        seat = game.seats[cpu_seat_idx]
-        if not seat.is_cpu:
-            return
-
-        idx = get_player_index()
-        player = cpu_pick(seat.score, game.used_players, game.prompt, idx, seat.cpu_difficulty)
-        seat.turns_taken += 1
-
-        if player is None:
-            # No valid pick — CPU forfeits its turn
-            seat.forfeit_count += 1
-            seat.history.append({'name': '—', 'result': 'X'})
-            game.current_turn = (game.current_turn + 1) % 2
-            start_turn_timer(game)
-            socketio.emit('turn_result', {
-                'outcome': 'forfeit',
-                'message': f'{seat.username} has no valid pick — turn skipped.',
-                'forfeited': True,
-            }, room=code)
-            socketio.emit('game_state', game.to_dict(), room=code)
-            socketio.start_background_task(_expire_turn, code, game.turn_seq, app)
-            return
-
-        apps = player['apps']
-        new_score = seat.score - apps
-        game.used_players.add(player['name_key'])
-        seat.score = new_score
-        seat.history.append({'name': player['name'], 'result': apps})
-        msg = f"{seat.username} plays: {player['name']} (−{apps})"
-
-        if -20 <= new_score <= 0:
-            game.status = 'finished'
-            game.deadline_epoch = 0.0
-            socketio.emit('turn_result', {'outcome': Outcome.WIN, 'message': msg,
-                                          'forfeited': False}, room=code)
-            socketio.emit('game_over', {
-                'winner_seat': cpu_seat_idx,
-                'winner_username': seat.username,
-                'final_scores': [s.score for s in game.seats],
-            }, room=code)
-            socketio.emit('game_state', game.to_dict(), room=code)
-            _record_game_players(game, app)
-            _sync_game_db_bg(game)
-            _broadcast_lobby(app)
-            socketio.start_background_task(_cleanup_game, code, app)
-        else:
-            game.current_turn = (game.current_turn + 1) % 2
-            start_turn_timer(game)
-            socketio.emit('turn_result', {'outcome': Outcome.SCORED, 'message': msg,
-                                          'forfeited': False}, room=code)
-            socketio.emit('game_state', game.to_dict(), room=code)
-            socketio.start_background_task(_expire_turn, code, game.turn_seq, app)
+        if game:
+            with locks.game_lock(code):
+                _dispatch(game, _engine().cpu_move(game, captured_seq), app)
 
 
 def _handle_disconnect_timeout(code: str, seat_idx: int,
                                 captured_seq: int, uid: int, app) -> None:
-    import gevent
-    gevent.sleep(60)
+    socketio.sleep(60)
     with app.app_context():
         game = get_game(code)
-        if not game or game.status != 'active':
-            return
-        if game.disconnect_seq.get(seat_idx) != captured_seq:
-            return  # Player reconnected (seq was bumped in on_join_game)
-
-        if game.is_solo:
-            # Solo game — human left, just abandon; CPU cannot "win" by forfeit
-            game.status = 'abandoned'
-            _sync_game_db_bg(game)
-            _broadcast_lobby(app)
+        if not game:
             return
-
-        # Multiplayer — opponent wins (mirror on_leave_game so the win is
-        # actually credited: set winner score to 0 and mark finished, otherwise
-        # _record_game_players records won=False for everyone).
-        winner_seat = 1 - seat_idx
-        if winner_seat < len(game.seats):
-            game.status = 'finished'
-            game.seats[winner_seat].score = 0
-            socketio.emit('game_over', {
-                'winner_seat': winner_seat,
-                'winner_username': game.seats[winner_seat].username,
-                'final_scores': [s.score for s in game.seats],
-                'abandoned': True,
-            }, room=code)
-            _record_game_players(game, app)
-            _sync_game_db_bg(game)
-        _broadcast_lobby(app)
+        with locks.game_lock(code):
+            if game.status != 'active':
+                return
+            if game.disconnect_seq.get(seat_idx) != captured_seq:
+                return  # Player reconnected (seq was bumped in on_join_game)
+            _dispatch(game, _engine().leave(game, seat_idx), app)
 
 
 def _sync_game_db_bg(game) -> None:
@@ -561,10 +627,112 @@ def _sync_game_db_bg(game) -> None:
     socketio.start_background_task(_sync_game_db, game, current_app._get_current_object())
 
 
+def _maybe_flush_events(game, events: list, app) -> None:
+    """Write the event buffer when a turn ends, so a restart loses at most
+    the turn in progress, or once a full batch has accumulated."""
+    boundary = any(event[0] == engine.NEXT_TURN for event in events)
+    if boundary or len(game.pending_events) >= app.config['EVENT_FLUSH_BATCH']:
+        socketio.start_background_task(_sync_game_db, game, app)
+
+
+def resume_game(game, app) -> None:
+    """Re-arm timers for a session rebuilt from the DB at startup."""
+    if game.status != 'active':
+        return
+    if game.deadline_epoch <= time.time():
+        start_turn_timer(game)  # the deadline passed while we were down
+    remaining = game.deadline_epoch - time.time()
+    socketio.start_background_task(_expire_turn, game.code, game.turn_seq, app,
+                                   remaining)
+    _maybe_trigger_cpu(game, app)
+
+
+def reserve_session_slot(app) -> bool:
+    """Make room for one more session under MAX_LIVE_SESSIONS, evicting
+    idle waiting games if needed. Returns False if the cap can't be met."""
+    try:
+        evicted = make_room(app.config['MAX_LIVE_SESSIONS'],
+                            app.config['SESSION_EVICT_MIN_IDLE'])
+    except SessionLimitError:
+        app.logger.warning('Live session cap reached (%d)', len(GAMES))
+        return False
+    for game in evicted:
+        _evict_game(game, app)
+    if evicted:
+        _broadcast_lobby(app)
+    return True
+
+
+def _evict_game(game, app) -> None:
+    """Tell anyone still in the room and persist the row as abandoned.
+    ``game`` has already been removed from GAMES. A game that had already
+    ended was persisted then, so it is only dropped from memory."""
+    with locks.game_lock(game.code):
+        live = game.status not in ('finished', 'abandoned')
+        if live:
+            game.end('abandoned')
+    if not live:
+        socketio.close_room(game.code)
+        return
+    socketio.emit('error', {'message': 'This game was closed for inactivity.'},
+                  room=game.code)
+    socketio.close_room(game.code)
+    _sync_game_db(game, app)
+
+
+def _reap_idle_games(app) -> None:
+    """Background loop evicting sessions idle past their status TTL."""
+    while True:
+        socketio.sleep(app.config['REAPER_INTERVAL'])
+        with app.app_context():
+            expired = expired_games(app.config['SESSION_TTLS'])
+            for game in expired:
+                remove_game(game.code)
+                _evict_game(game, app)
+            if expired:
+                stats = memory_stats()
+                app.logger.info('Evicted %d idle games; %d live, ~%d KB',
+                                len(expired), stats['sessions'],
+                                stats['approx_bytes'] // 1024)
+                _broadcast_lobby(app)
+
+
+def _match_waiting(app) -> None:
+    """Background loop pairing queued players as their rating gaps widen."""
+    while True:
+        socketio.sleep(app.config['MATCH_SWEEP_INTERVAL'])
+        pairs = QUEUE.sweep()
+        if pairs:
+            with app.app_context():
+                for pair in pairs:
+                    _seat_match(pair, app)
+
+
+def _sync_directory(app) -> None:
+    """Sharded only: heartbeat this worker's directory rows, push lobby
+    changes made on other shards to the lobby sockets connected here, and
+    pick up player refreshes made on other shards."""
+    last = None
+    while True:
+        socketio.sleep(app.config['DIRECTORY_INTERVAL'])
+        with app.app_context():
+            try:
+                sharding.publish()
+                sharding.heartbeat()
+                sessions = sharding.lobby_sessions()
+                _catch_up_players(app)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Shard directory sync failed')
+                continue
+        if sessions != last:
+            socketio.emit('lobby_update', {'sessions': sessions}, room='lobby')
+            last = sessions
+
+
 def _cleanup_game(code: str, app) -> None:
-    import gevent
-    gevent.sleep(30)
+    socketio.sleep(30)
     with app.app_context():
         game = get_game(code)
         if game and game.status in ('finished', 'abandoned'):
-            GAMES.pop(code, None)
+            remove_game(code)
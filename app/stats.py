@@ -1,4 +1,6 @@
 """Compute user stats and achievements from DB — no denormalized counters."""
+from datetime import datetime
+
 from sqlalchemy import func
 from . import db
 from .models import User, Game, GamePlayer
@@ -35,13 +37,29 @@ def get_user_stats(user_id: int) -> dict:
 
 
 def get_recent_games(user_id: int, limit: int = 10) -> list:
-    # Join game_players with games and get opponent's username
+    return get_game_history(user_id, limit)[0]
+
+
+def encode_cursor(finished_at: datetime, game_id: int) -> str:
+    return f'{finished_at.isoformat()}_{game_id}'
+
+
+def decode_cursor(cursor: str):
+    """Parse a history cursor into (finished_at, game_id); ValueError if bad."""
+    ts, _, game_id = cursor.rpartition('_')
+    return datetime.fromisoformat(ts), int(game_id)
+
+
+def history_query(user_id: int, limit: int, before=None):
+    """Finished games for ``user_id``, newest first, keyset-paginated on
+    (finished_at, id). Served by ix_gp_user_game and ix_games_finished."""
     my_gp = db.aliased(GamePlayer)
     opp_gp = db.aliased(GamePlayer)
     opp_user = db.aliased(User)
 
-    rows = (
+    query = (
         db.session.query(
+            Game.id,
             Game.code,
             Game.finished_at,
             my_gp.won,
@@ -54,12 +72,19 @@ def get_recent_games(user_id: int, limit: int = 10) -> list:
         .outerjoin(opp_user, opp_user.id == opp_gp.user_id)
         .filter(my_gp.user_id == user_id)
         .filter(Game.status == 'finished')
-        .order_by(Game.finished_at.desc())
-        .limit(limit)
-        .all()
+        .filter(Game.finished_at.isnot(None))
     )
+    if before is not None:
+        query = query.filter(db.tuple_(Game.finished_at, Game.id) < before)
+    return query.order_by(Game.finished_at.desc(), Game.id.desc()).limit(limit)
+
 
-    return [
+def get_game_history(user_id: int, limit: int, before=None):
+    """Return (games, next_cursor); next_cursor is None on the last page."""
+    rows = history_query(user_id, limit + 1, before).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    games = [
         {
             'code': r.code,
             'date': r.finished_at.strftime('%d %b %Y %H:%M') if r.finished_at else '—',
@@ -70,6 +95,8 @@ def get_recent_games(user_id: int, limit: int = 10) -> list:
         }
         for r in rows
     ]
+    next_cursor = encode_cursor(rows[-1].finished_at, rows[-1].id) if more else None
+    return games, next_cursor
 
 
 def compute_achievements(stats: dict) -> list:
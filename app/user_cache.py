@@ -0,0 +1,73 @@
+"""Cached user lookups for routes and socket handlers.
+
+``get_user`` returns a ``CachedUser`` (id, username, is_admin) — a plain
+read-only record, not an ORM row. Lookups are memoised on ``flask.g`` for
+the rest of the request and kept in a small process-wide LRU. Call
+``invalidate`` after changing a user row so the next lookup re-reads it.
+The LRU is shared by every handler, so its reads and writes hold a lock;
+the DB query runs outside it.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import g, has_app_context
+
+from . import db
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    username: str
+    is_admin: bool
+
+
+_CACHE: 'OrderedDict[int, CachedUser]' = OrderedDict()
+_max_size = 1024
+_lock = threading.Lock()
+
+
+def configure(max_size: int) -> None:
+    """Set the LRU size and drop anything cached for a previous app."""
+    global _max_size
+    _max_size = max_size
+    clear()
+
+
+def get_user(uid: int) -> Optional[CachedUser]:
+    memo = g.setdefault('_users', {}) if has_app_context() else {}
+    if uid in memo:
+        return memo[uid]
+
+    with _lock:
+        user = _CACHE.get(uid)
+        if user is not None:
+            _CACHE.move_to_end(uid)
+    if user is None:
+        from .models import User
+        row = db.session.execute(
+            db.select(User.id, User.username, User.is_admin).where(User.id == uid)
+        ).first()
+        if row is not None:
+            user = CachedUser(row.id, row.username, bool(row.is_admin))
+            with _lock:
+                _CACHE[uid] = user
+                if len(_CACHE) > _max_size:
+                    _CACHE.popitem(last=False)
+
+    memo[uid] = user
+    return user
+
+
+def invalidate(uid: int) -> None:
+    with _lock:
+        _CACHE.pop(uid, None)
+    if has_app_context():
+        g.get('_users', {}).pop(uid, None)
+
+
+def clear() -> None:
+    with _lock:
+        _CACHE.clear()
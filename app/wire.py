@@ -0,0 +1,70 @@
+"""JSON wire encoding for Socket.IO payloads.
+
+Room broadcasts build their payload once and wrap it in ``RawJSON`` so the
+same encoded text is spliced into the packet for every recipient instead of
+being re-serialised. This module is passed to ``SocketIO(json=...)``.
+
+``encode`` uses the stdlib by default; ``set_encoder('orjson')`` swaps in a
+faster encoder when it is installed.
+"""
+import json as _json
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class RawJSON(str):
+    """A string holding already-encoded JSON, emitted verbatim."""
+    __slots__ = ()
+
+
+def _stdlib_dumps(payload) -> str:
+    return _json.dumps(payload, separators=(',', ':'))
+
+
+_dumps = _stdlib_dumps
+
+
+def set_encoder(name: str) -> str:
+    """Select the payload encoder ('json' or 'orjson'). Returns the name of
+    the encoder actually in use."""
+    global _dumps
+    if name == 'orjson':
+        try:
+            import orjson
+        except ImportError:
+            log.warning('orjson not installed; falling back to json')
+        else:
+            _dumps = lambda payload: orjson.dumps(payload).decode()  # noqa: E731
+            return 'orjson'
+    _dumps = _stdlib_dumps
+    return 'json'
+
+
+def encode(payload) -> RawJSON:
+    return RawJSON(_dumps(payload))
+
+
+def encode_object(fields: dict) -> RawJSON:
+    """Encode a dict whose values may already be ``RawJSON``; those are
+    spliced in verbatim, so a cached snapshot can ride inside a larger
+    message without being re-serialised."""
+    return RawJSON('{' + ','.join(
+        _json.dumps(k) + ':' + (v if isinstance(v, RawJSON) else _dumps(v))
+        for k, v in fields.items()
+    ) + '}')
+
+
+def dumps(obj, **kwargs) -> str:
+    if isinstance(obj, RawJSON):
+        return str(obj)
+    if isinstance(obj, list) and any(isinstance(o, RawJSON) for o in obj):
+        return '[' + ','.join(
+            str(o) if isinstance(o, RawJSON) else _json.dumps(o, **kwargs)
+            for o in obj
+        ) + ']'
+    return _json.dumps(obj, **kwargs)
+
+
+def loads(s, **kwargs):
+    return _json.loads(s, **kwargs)
@@ -0,0 +1,70 @@
+"""Broadcast cost for one game room at 1, 100 and 1000 spectators.
+
+Drives python-socketio's room fan-out with a no-op transport so only the
+server-side work (payload build, encode, per-recipient framing) is timed.
+
+    python benchmarks/bench_broadcast.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socketio  # noqa: E402
+
+from app import wire  # noqa: E402
+from app.game_logic import Prompt  # noqa: E402
+from app.game_manager import GameSession, Seat  # noqa: E402
+
+ROUNDS = 200
+
+
+def _make_game() -> GameSession:
+    game = GameSession(code='BENCH001', status='active')
+    game.prompt = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW',
+                         'Name a Forward who played for Arsenal', 40)
+    for name in ('alice', 'bob'):
+        seat = Seat(user_id=1, username=name, score=501)
+        for i in range(15):
+            seat.record(f'Player {i}', 20 + i)
+        game.seats.append(seat)
+    return game
+
+
+def _make_server(viewers: int):
+    server = socketio.Server(json=wire)
+    frames = [0]
+
+    def send(eio_sid, pkt):
+        pkt.encode()
+        frames[0] += 1
+
+    server._send_eio_packet = send
+    for i in range(viewers + 2):
+        sid = server.manager.connect(f'eio{i}', '/')
+        server.manager.enter_room(sid, '/', 'BENCH001')
+    return server, frames
+
+
+def bench(viewers: int, pre_encoded: bool) -> float:
+    server, _ = _make_server(viewers)
+    game = _make_game()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        game.turn_seq += 1  # every broadcast follows a state change
+        payload = game.encoded_state() if pre_encoded else game._build_dict()
+        server.emit('game_state', payload, room='BENCH001')
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    print(f'{"spectators":>10} {"dict payload":>14} {"pre-encoded":>14}')
+    for viewers in (1, 100, 1000):
+        plain = bench(viewers, pre_encoded=False)
+        raw = bench(viewers, pre_encoded=True)
+        print(f'{viewers:>10} {plain * 1e6:>11.1f} us {raw * 1e6:>11.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Headless GameEngine throughput: turns per second with no Flask, sockets
+or DB in the loop.
+
+Plays many two-seat games over the bundled player index. Each turn submits
+a name drawn from a fixed pool that mixes valid answers for the game's
+prompt with misses, so scoring, forfeit, bust and win paths all run.
+
+    python benchmarks/bench_engine.py [games]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dataset import iter_players  # noqa: E402
+from app.engine import GameEngine  # noqa: E402
+from app.game_logic import build_indexes, build_prompt_pool  # noqa: E402
+from app.game_manager import GameSession, Seat  # noqa: E402
+
+MAX_TURNS = 200
+
+
+def names_for(prompt, index, rng):
+    valid = [p['name'] for p in index.by_name_key.values()
+             if p['name_key'] in index.playable
+             and (prompt.club_key in p['clubs'].lower() or p['country'] == prompt.country)]
+    names = valid[:40] + ['Nobody Real', 'Not A Player']
+    rng.shuffle(names)
+    return names
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(1)
+    index = build_indexes(list(iter_players()))
+    pool = build_prompt_pool(index)
+    engine = GameEngine(index)
+    scripts = {id(p): names_for(p, index, rng) for p in pool}
+
+    turns = finished = 0
+    t0 = time.perf_counter()
+    for g in range(games):
+        game = GameSession(code=f'G{g}')
+        game.prompt = prompt = pool[g % len(pool)]
+        game.add_seat(Seat(user_id=1, username='a', score=501))
+        game.add_seat(Seat(user_id=2, username='b', score=501))
+        engine.start(game)
+        names = scripts[id(prompt)]
+        for t in range(MAX_TURNS):
+            engine.submit(game, game.current_turn, names[t % len(names)])
+            turns += 1
+            if game.status != 'active':
+                finished += 1
+                break
+    elapsed = time.perf_counter() - t0
+    print(f'{games} games, {finished} finished, {turns} turns in {elapsed:.2f} s')
+    print(f'{turns / elapsed:,.0f} turns/s')
+
+
+if __name__ == '__main__':
+    main()
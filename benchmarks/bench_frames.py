@@ -0,0 +1,94 @@
+"""Socket frames and bytes per game: legacy events vs combined game_update.
+
+Plays seeded CPU-vs-CPU games over the bundled players with GameEngine,
+turns each action into room emits with sockets._game_frames, and pushes
+them through python-socketio's room fan-out with a counting no-op
+transport (two players plus --spectators watchers).
+
+    legacy    turn_result + game_state per turn, + game_over at the end
+    combined  one game_update per action
+
+    python benchmarks/bench_frames.py
+    python benchmarks/bench_frames.py --games 500 --spectators 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socketio  # noqa: E402
+
+from app import wire  # noqa: E402
+from app.dataset import iter_players  # noqa: E402
+from app.engine import GameEngine  # noqa: E402
+from app.game_logic import build_indexes, build_prompt_pool, cpu_pick  # noqa: E402
+from app.game_manager import GameSession, Seat  # noqa: E402
+from app.sockets import _game_frames  # noqa: E402
+
+MAX_TURNS = 200
+
+
+def _make_server(viewers: int):
+    server = socketio.Server(json=wire)
+    counts = {'frames': 0, 'bytes': 0}
+
+    def send(eio_sid, pkt):
+        counts['frames'] += 1
+        counts['bytes'] += len(pkt.encode())
+
+    server._send_eio_packet = send
+    for i in range(viewers + 2):
+        sid = server.manager.connect(f'eio{i}', '/')
+        server.manager.enter_room(sid, '/', 'BENCH')
+    return server, counts
+
+
+def play(engine, prompt, server, legacy: bool) -> None:
+    game = GameSession(code='BENCH')
+    game.prompt = prompt
+    for i in range(2):
+        game.add_seat(Seat(user_id=None, username=f'CPU {i}', score=501,
+                           is_cpu=True, cpu_difficulty='easy'))
+    engine.start(game)
+    for _ in range(MAX_TURNS):
+        for event, payload in _game_frames(game, engine.cpu_move(game), legacy):
+            if not isinstance(payload, wire.RawJSON):
+                payload = wire.encode(payload)
+            server.emit(event, payload, room='BENCH')
+        if game.status != 'active':
+            return
+
+
+def bench(index, pool, games: int, viewers: int, legacy: bool):
+    server, counts = _make_server(viewers)
+    rng = random.Random(1)
+    engine = GameEngine(index, pick=partial(cpu_pick, rng=rng))
+    prompts = random.Random(2).choices(pool, k=games)
+    start = time.perf_counter()
+    for prompt in prompts:
+        play(engine, prompt, server, legacy)
+    elapsed = time.perf_counter() - start
+    return counts['frames'] / games, counts['bytes'] / games, elapsed / games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--spectators', type=int, default=0)
+    args = parser.parse_args()
+
+    index = build_indexes(list(iter_players()))
+    pool = sorted(build_prompt_pool(index), key=lambda p: p.key)
+    print(f'{args.games} games, {args.spectators + 2} recipients per room')
+    print(f'{"mode":<10}{"frames/game":>13}{"KB/game":>10}{"ms/game":>10}')
+    for name, legacy in (('legacy', True), ('combined', False)):
+        frames, size, elapsed = bench(index, pool, args.games, args.spectators, legacy)
+        print(f'{name:<10}{frames:>13.1f}{size / 1024:>10.1f}{elapsed * 1000:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Memory held by seat histories: list of dicts vs SeatHistory.
+
+Simulates GAMES full of mid-game sessions (two seats, TURNS turns each)
+drawing names from a realistic pool and measures retained allocations.
+
+    python benchmarks/bench_history_memory.py [games]
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.game_manager import SeatHistory  # noqa: E402
+
+TURNS = 20
+NAMES = [f'Player Number {i}' for i in range(5000)]
+
+
+def _turns(rng):
+    for _ in range(TURNS):
+        r = rng.random()
+        if r < 0.1:
+            yield 'Timeout', 'X'
+        elif r < 0.2:
+            yield rng.choice(NAMES), 'BUST'
+        else:
+            yield rng.choice(NAMES), rng.randrange(1, 181)
+
+
+def build_dicts(games, rng):
+    out = []
+    for _ in range(games * 2):
+        h = []
+        for name, result in _turns(rng):
+            h.append({'name': name, 'result': result})
+        out.append(h)
+    return out
+
+
+def build_compact(games, rng):
+    out = []
+    for _ in range(games * 2):
+        h = SeatHistory()
+        for name, result in _turns(rng):
+            h.append(name, result)
+        out.append(h)
+    return out
+
+
+def measure(builder, games):
+    tracemalloc.start()
+    kept = builder(games, random.Random(1))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    dicts = measure(build_dicts, games)
+    compact = measure(build_compact, games)
+    print(f'{games} games x 2 seats x {TURNS} turns')
+    print(f'  list of dicts: {dicts / games:8.0f} B/game')
+    print(f'  SeatHistory:   {compact / games:8.0f} B/game ({compact / dicts:.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Login lookup latency: lower(username) scan vs the indexed username_key.
+
+Builds a throwaway SQLite users table (1M rows by default) and times the
+query each version of ``routes.login`` runs, for hits and misses.
+
+    python benchmarks/bench_login.py [--users N] [--url postgresql://...]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+
+from app.models import User, username_key  # noqa: E402
+
+LOOKUPS = 200
+CHUNK = 50_000
+
+
+def _populate(engine, n: int) -> None:
+    User.__table__.create(engine)
+    with engine.begin() as conn:
+        for start in range(0, n, CHUNK):
+            rows = [{'username': f'User{i}', 'username_key': f'user{i}', 'is_admin': False}
+                    for i in range(start, min(start + CHUNK, n))]
+            conn.execute(User.__table__.insert(), rows)
+
+
+def _time(engine, query_for, names) -> float:
+    with engine.connect() as conn:
+        t0 = time.perf_counter()
+        for name in names:
+            conn.execute(query_for(name)).first()
+        return (time.perf_counter() - t0) / len(names) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--url', help='database URL (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = args.url or f'sqlite:///{os.path.join(tmpdir.name, "bench.db")}'
+    engine = create_engine(url)
+    User.__table__.drop(engine, checkfirst=True)
+
+    t0 = time.perf_counter()
+    _populate(engine, args.users)
+    print(f'{args.users:,} users inserted in {time.perf_counter() - t0:.1f}s')
+
+    rng = random.Random(1)
+    hits = [f'USER{rng.randrange(args.users)}' for _ in range(LOOKUPS)]
+    misses = [f'nobody{i}' for i in range(LOOKUPS)]
+
+    by_lower = lambda name: select(User.id).where(  # noqa: E731
+        func.lower(User.username) == name.lower())
+    by_key = lambda name: select(User.id).where(  # noqa: E731
+        User.username_key == username_key(name))
+
+    print(f'{"query":<22}{"hit µs":>12}{"miss µs":>12}')
+    for label, query_for, rounds in (('lower(username)', by_lower, 20),
+                                     ('username_key', by_key, LOOKUPS)):
+        hit = _time(engine, query_for, hits[:rounds])
+        miss = _time(engine, query_for, misses[:rounds])
+        print(f'{label:<22}{hit:>12.1f}{miss:>12.1f}')
+
+    User.__table__.drop(engine)
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Quick-match queue cost and behaviour with 10k players waiting.
+
+    ops        join (pair or enqueue) against a queue holding --depth
+               waiting players, vs a linear nearest-rating scan, and the
+               cost of one sweep over the full queue
+    simulate   Poisson arrivals at several rates on a fake clock with a
+               sweep every second: wait times, queue depth, rating gaps
+
+Ratings are drawn around 1500 the way app.matchmaking.skill_rating spreads
+them for players with some history.
+
+    python benchmarks/bench_matchmaking.py
+    python benchmarks/bench_matchmaking.py --depth 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.matchmaking import MatchQueue  # noqa: E402
+
+OPS = 10_000
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def rating(rng) -> int:
+    return max(1000, min(2000, round(rng.gauss(1500, 150))))
+
+
+def filled_queue(depth: int, rng):
+    """A queue holding ``depth`` players nobody has been paired with yet."""
+    clock = Clock()
+    queue = MatchQueue(base_gap=-1, gap_per_second=0, clock=clock)
+    for uid in range(depth):
+        queue.join(uid, f'u{uid}', rating(rng))
+    queue.base_gap, queue.gap_per_second = 50, 25
+    return queue, clock
+
+
+def linear_nearest(waiting: list, r: int):
+    return min(range(len(waiting)), key=lambda i: abs(waiting[i] - r), default=None)
+
+
+def bench_ops(depth: int) -> None:
+    rng = random.Random(1)
+    queue, _ = filled_queue(depth, rng)
+    arrivals = [rating(rng) for _ in range(OPS)]
+
+    # Time each join alone, then undo it so the queue stays at ``depth``
+    join = 0.0
+    for i, r in enumerate(arrivals):
+        uid = depth + i
+        t0 = time.perf_counter()
+        pair = queue.join(uid, 'x', r)
+        join += time.perf_counter() - t0
+        if pair is None:
+            queue.leave(uid)
+        else:
+            queue.base_gap = -1
+            queue.join(pair[0].user_id, 'x', pair[0].rating)
+            queue.base_gap = 50
+    join /= OPS
+
+    waiting = [t.rating for t in queue._tickets.values()]
+    start = time.perf_counter()
+    for r in arrivals[:200]:
+        linear_nearest(waiting, r)
+    linear = (time.perf_counter() - start) / 200
+
+    waiting = len(queue)
+    start = time.perf_counter()
+    pairs = queue.sweep()
+    sweep = time.perf_counter() - start
+
+    print(f'{waiting} waiting ({len(pairs)} pairs in the sweep)')
+    print(f'  join (bisect)      {join * 1e6:>9.1f} us')
+    print(f'  join (linear scan) {linear * 1e6:>9.1f} us')
+    print(f'  sweep              {sweep * 1e3:>9.2f} ms')
+
+
+def _pct(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0
+
+
+def simulate(rate: float, seconds: int = 600) -> None:
+    rng = random.Random(2)
+    clock = Clock()
+    queue = MatchQueue(clock=clock)
+    waits, gaps, peak = [], [], 0
+
+    def matched(pair):
+        for t in pair:
+            waits.append(clock.now - t.joined_at)
+        gaps.append(abs(pair[0].rating - pair[1].rating))
+
+    uid = 0
+    for second in range(seconds):
+        end = second + 1
+        while True:
+            clock.now += rng.expovariate(rate)
+            if clock.now >= end:
+                break
+            uid += 1
+            pair = queue.join(uid, 'x', rating(rng))
+            if pair:
+                matched(pair)
+        clock.now = end
+        for pair in queue.sweep():
+            matched(pair)
+        peak = max(peak, len(queue))
+
+    waits.sort()
+    gaps.sort()
+    print(f'{rate:>8g}/s {_pct(waits, 0.5):>8.1f} {_pct(waits, 0.9):>8.1f} '
+          f'{_pct(waits, 0.99):>8.1f} {peak:>7} {_pct(gaps, 0.5):>8} {_pct(gaps, 0.9):>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--depth', type=int, default=10_000)
+    args = parser.parse_args()
+
+    bench_ops(args.depth)
+    print()
+    print(f'{"arrivals":>10} {"wait p50":>8} {"p90":>8} {"p99":>8} {"depth":>7} '
+          f'{"gap p50":>8} {"p90":>8}')
+    for rate in (0.2, 2, 20, 200):
+        simulate(rate)
+
+
+if __name__ == '__main__':
+    main()
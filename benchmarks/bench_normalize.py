@@ -0,0 +1,64 @@
+"""Player-name normalisation: previous regex normaliser vs the cached
+transliterating one.
+
+    legacy  NFKD + ASCII-ignore + regex whitespace collapse, every call
+    cold    normalize_name_key with its LRU cleared before each pass
+    warm    normalize_name_key with the LRU already populated
+
+Inputs are the bundled dataset names (ASCII) plus an accented squad list
+repeated to the same length, mimicking repeated submissions and queries.
+
+    python benchmarks/bench_normalize.py
+"""
+import os
+import re
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dataset import iter_players  # noqa: E402
+from app.game_logic import normalize_name_key  # noqa: E402
+
+ROUNDS = 5
+ACCENTED = [
+    'Martin Ødegaard', 'Łukasz Fabiański', 'Pascal Groß', 'Gylfi Sigurðsson',
+    'Jan Åge Fjørtoft', 'Đorđe Petrović', 'N’Golo Kanté', 'Çağlar Söyüncü',
+    'Mesut Özil', 'Emiliano Martínez', 'Ørjan Håskjold Nyland', 'Aleksandar Mitrović',
+]
+
+
+def legacy_normalize(name: str) -> str:
+    nfkd = unicodedata.normalize('NFKD', name)
+    ascii_str = nfkd.encode('ASCII', 'ignore').decode('ASCII')
+    return re.sub(r'\s+', ' ', ascii_str).strip().lower()
+
+
+def best_of(fn, names, before=None):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        for n in names:
+            fn(n)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ascii_names = [p['name'] for p in iter_players()]
+    accented = (ACCENTED * (len(ascii_names) // len(ACCENTED) + 1))[:len(ascii_names)]
+    print(f'{len(ascii_names)} names per pass, best of {ROUNDS}')
+    print(f'{"corpus":<10}{"legacy ms":>12}{"cold ms":>10}{"warm ms":>10}')
+    for label, names in (('ascii', ascii_names), ('accented', accented)):
+        legacy = best_of(legacy_normalize, names)
+        cold = best_of(normalize_name_key, names, normalize_name_key.cache_clear)
+        normalize_name_key.cache_clear()
+        warm = best_of(normalize_name_key, names)
+        print(f'{label:<10}{legacy * 1000:>12.2f}{cold * 1000:>10.2f}{warm * 1000:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
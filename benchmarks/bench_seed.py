@@ -0,0 +1,80 @@
+"""First-boot player seeding: time and peak Python memory.
+
+    legacy  json.load of players_pl.json, ORM Player per record,
+            bulk_save_objects, then read every row back for build_indexes
+    packed  stream players_pl.jsonl, chunked Core executemany, and build
+            the index from the streamed records
+
+Each run uses a fresh in-memory SQLite database. Peak memory is measured
+with tracemalloc, so it covers Python allocations only.
+
+    python benchmarks/bench_seed.py
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from app import _seed_players, db  # noqa: E402
+from app.dataset import JSON_PATH  # noqa: E402
+from app.game_logic import build_indexes, clean_player_record  # noqa: E402
+from app.models import Player  # noqa: E402
+
+ROUNDS = 3
+
+
+def legacy():
+    with open(JSON_PATH, encoding='utf-8') as f:
+        raw_players = json.load(f)
+    rows = []
+    for raw in raw_players:
+        c = clean_player_record(raw)
+        rows.append(Player(name=c['name'], name_key=c['name_key'], country=c['country'],
+                           positions=c['positions'], clubs=c['clubs'], apps=c['apps']))
+    db.session.bulk_save_objects(rows)
+    db.session.commit()
+    players = [
+        {'name': p.name, 'name_key': p.name_key, 'country': p.country or '',
+         'positions': p.positions or '', 'clubs': p.clubs or '', 'apps': p.apps or 0}
+        for p in Player.query.all()
+    ]
+    return build_indexes(players)
+
+
+def packed():
+    return build_indexes(_seed_players())
+
+
+def measure(fn):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        idx = fn()
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert len(idx.by_name_key) > 0
+        db.session.remove()
+    return elapsed, peak
+
+
+def main():
+    print(f'{"path":<10}{"best ms":>10}{"peak MB":>10}')
+    for name, fn in (('legacy', legacy), ('packed', packed)):
+        runs = [measure(fn) for _ in range(ROUNDS)]
+        best = min(t for t, _ in runs)
+        peak = min(p for _, p in runs)
+        print(f'{name:<10}{best * 1000:>10.1f}{peak / 2**20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
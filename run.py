@@ -1,7 +1,10 @@
-from gevent import monkey
-monkey.patch_all()  # MUST be first
+import os
 
-from app import create_app, socketio
+if os.environ.get('SOCKETIO_ASYNC_MODE', 'gevent') == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()  # MUST be first
+
+from app import create_app, socketio  # noqa: E402
 
 app = create_app()
 
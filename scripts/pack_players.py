@@ -0,0 +1,26 @@
+"""
+Convert a player JSON array (scraper or admin-upload format) into the
+packed line-delimited dataset the app seeds from (see app/dataset.py).
+
+Usage:
+    python scripts/pack_players.py [data/players_pl.json] [data/players_pl.jsonl]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dataset import JSON_PATH, PACKED_PATH, iter_json, write_packed  # noqa: E402
+
+
+def main():
+    src = sys.argv[1] if len(sys.argv) > 1 else JSON_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else PACKED_PATH
+    n = write_packed(iter_json(src), dst)
+    print(f"Packed {n} players: {os.path.getsize(src):,} -> {os.path.getsize(dst):,} bytes")
+    print(f"Saved to {dst}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Staged build of data/players_pl.json from per-season FBref tables.
+
+    fetch      network only: download missing seasons into data/raw/<season>.csv
+    transform  offline: clean changed seasons into the season table, then
+               aggregate every season into the player dataset (JSON plus
+               the packed players_pl.jsonl the app seeds from)
+
+The season table (data/build/season_rows.csv) holds one cleaned row per
+(season, player, nation). A season is re-cleaned only when its raw file's
+hash differs from the one recorded in data/build/manifest.json; its rows
+are then replaced and the final per-player aggregation is recomputed with
+vectorised pandas operations.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from app.dataset import write_packed
+from app.game_logic import clean_player_record
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(ROOT, 'data', 'raw')
+BUILD_DIR = os.path.join(ROOT, 'data', 'build')
+OUT_PATH = os.path.join(ROOT, 'data', 'players_pl.json')
+
+RAW_COLUMNS = ['player', 'nation', 'team', 'apps', 'pos']
+SEASON_COLUMNS = ['season', 'player', 'nation', 'apps', 'clubs', 'positions']
+VALID_POSITIONS = ['GK', 'DF', 'MF', 'FW']
+
+# Unicode combining-mark blocks stripped after NFKD (accents, umlauts, …)
+_COMBINING = r'[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]'
+
+
+def season_label(start_year: int) -> str:
+    return f'{start_year}-{start_year + 1}'
+
+
+# ---------------------------------------------------------------------------
+# Fetch (network)
+# ---------------------------------------------------------------------------
+
+def fetch_seasons(seasons, raw_dir: str = RAW_DIR, refresh=()) -> list:
+    """Download each season not yet cached (or listed in ``refresh``) to
+    ``raw_dir/<season>.csv``. Returns the seasons written."""
+    import soccerdata as sd
+
+    os.makedirs(raw_dir, exist_ok=True)
+    written = []
+    for season in seasons:
+        path = os.path.join(raw_dir, f'{season}.csv')
+        if os.path.exists(path) and season not in refresh:
+            continue
+        print(f'Fetching {season}…')
+        fbref = sd.FBref(leagues='ENG-Premier League', seasons=[season])
+        flat = fbref.read_player_season_stats(stat_type='standard').reset_index()
+        desired = [('player', ''), ('nation', ''), ('team', ''),
+                   ('Playing Time', 'MP'), ('pos', '')]
+        missing = [c for c in desired if c not in flat.columns]
+        if missing:
+            raise RuntimeError(f'{season}: missing columns {missing}')
+        table = flat[desired].copy()
+        table.columns = RAW_COLUMNS
+        tmp = path + '.tmp'
+        table.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        written.append(season)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Transform (offline)
+# ---------------------------------------------------------------------------
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    return names.str.normalize('NFKD').str.replace(_COMBINING, '', regex=True)
+
+
+def _join_unique(exploded: pd.DataFrame, keys: list, column: str) -> pd.Series:
+    """Sorted, comma-joined distinct values of ``column`` per ``keys``."""
+    distinct = exploded.dropna(subset=[column]).drop_duplicates(keys + [column])
+    return distinct.sort_values(column).groupby(keys, sort=False)[column].agg(','.join)
+
+
+def clean_season(raw: pd.DataFrame, season: str) -> pd.DataFrame:
+    """One row per (player, nation) for a single raw season table."""
+    df = raw[raw['player'].fillna('').astype(str).str.strip() != ''].copy()
+    df['player'] = normalize_names(df['player'].astype(str).str.strip())
+    df['nation'] = df['nation'].fillna('').astype(str).str.split(' ').str[-1].str.upper()
+    df['team'] = df['team'].fillna('').astype(str).replace('nan', '')
+    df['apps'] = pd.to_numeric(df['apps'], errors='coerce').fillna(0).astype(int)
+    df['pos'] = df['pos'].fillna('').astype(str)
+
+    keys = ['player', 'nation']
+    out = df.groupby(keys, sort=False)['apps'].sum().to_frame()
+
+    teams = df.loc[df['team'] != '', keys + ['team']]
+    out['clubs'] = _join_unique(teams, keys, 'team')
+
+    pos = df[keys + ['pos']].assign(pos=df['pos'].str.split(',')).explode('pos')
+    pos['pos'] = pos['pos'].str.strip().str[:2].str.upper()
+    pos = pos[pos['pos'].isin(VALID_POSITIONS)]
+    out['positions'] = _join_unique(pos, keys, 'pos')
+
+    out = out.fillna({'clubs': '', 'positions': ''}).reset_index()
+    out.insert(0, 'season', season)
+    return out[SEASON_COLUMNS]
+
+
+def aggregate(season_rows: pd.DataFrame) -> pd.DataFrame:
+    """Combine cleaned season rows into one row per (player, nation)."""
+    keys = ['player', 'nation']
+    out = season_rows.groupby(keys, sort=False)['apps'].sum().to_frame()
+    for column in ('clubs', 'positions'):
+        parts = season_rows[keys + [column]].assign(
+            **{column: season_rows[column].str.split(',')}).explode(column)
+        parts = parts[parts[column].fillna('') != '']
+        out[column] = _join_unique(parts, keys, column)
+    out = out.fillna({'clubs': '', 'positions': ''}).reset_index()
+    out = out[(out['player'] != '') & (out['apps'] > 0)]
+    return out.sort_values('player', kind='stable').reset_index(drop=True)
+
+
+def to_records(players: pd.DataFrame) -> list:
+    records = players.rename(columns={'player': 'name', 'nation': 'country'})
+    records = records.assign(name_key=records['name'].str.lower(),
+                             apps=records['apps'].astype(int))
+    return records[['name', 'name_key', 'country', 'positions', 'clubs', 'apps']] \
+        .to_dict('records')
+
+
+def read_raw_season(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def transform(raw_dir: str = RAW_DIR, build_dir: str = BUILD_DIR,
+              out_path: str = OUT_PATH) -> dict:
+    """Rebuild ``out_path`` from the raw season cache, re-cleaning only
+    seasons that are new or changed. Returns {'changed': [...], 'removed':
+    [...], 'players': n}."""
+    os.makedirs(build_dir, exist_ok=True)
+    manifest_path = os.path.join(build_dir, 'manifest.json')
+    rows_path = os.path.join(build_dir, 'season_rows.csv')
+
+    manifest = {}
+    season_rows = pd.DataFrame(columns=SEASON_COLUMNS)
+    if os.path.exists(manifest_path) and os.path.exists(rows_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        season_rows = pd.read_csv(rows_path, dtype={'season': str}, keep_default_na=False)
+
+    current = {
+        fname[:-4]: _file_hash(os.path.join(raw_dir, fname))
+        for fname in sorted(os.listdir(raw_dir)) if fname.endswith('.csv')
+    }
+    changed = [s for s, digest in current.items() if manifest.get(s) != digest]
+    removed = [s for s in manifest if s not in current]
+
+    if changed or removed:
+        fresh = [clean_season(read_raw_season(os.path.join(raw_dir, f'{s}.csv')), s)
+                 for s in changed]
+        kept = season_rows[~season_rows['season'].isin(changed + removed)]
+        season_rows = pd.concat([kept, *fresh], ignore_index=True)
+        season_rows.to_csv(rows_path, index=False)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=0, sort_keys=True)
+
+    season_rows['apps'] = season_rows['apps'].astype(int)
+    players = to_records(aggregate(season_rows))
+    tmp = out_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(players, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, out_path)
+    write_packed(map(clean_player_record, players), os.path.splitext(out_path)[0] + '.jsonl')
+    return {'changed': changed, 'removed': removed, 'players': len(players)}
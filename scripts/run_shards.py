@@ -0,0 +1,204 @@
+"""
+Run a sharded deployment locally: N game workers behind one router.
+
+Each worker is the app on its own port with SHARD_ID=i and SHARD_COUNT=N,
+all sharing one database and SECRET_KEY. The router listens on --port and
+forwards every connection to a worker chosen by app.sharding.route_key:
+
+    /game/<code>, /socket.io/?code=, /api/players/search?code=
+                                 the worker owning <code> on the hash ring
+    /socket.io/ without a code   the worker owning the lobby key (lobby,
+                                 quick match)
+    anything else                round robin (so new games spread out)
+
+Plain HTTP requests are forwarded with ``Connection: close`` so each one is
+routed on its own; WebSocket upgrades are piped through untouched, which
+keeps a game's socket on its owner for its whole life.
+
+Shard 0 is started first and must be accepting connections before the
+rest start, so only one worker creates the tables and seeds the database.
+
+Usage:
+    cd /path/to/repo
+    python scripts/run_shards.py --shards 4 --port 8000
+    DATABASE_URL=postgresql://... SECRET_KEY=... python scripts/run_shards.py
+"""
+
+import os
+
+if os.environ.get('SOCKETIO_ASYNC_MODE', 'gevent') == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()  # MUST be first
+
+import argparse  # noqa: E402
+import itertools  # noqa: E402
+import secrets  # noqa: E402
+import signal  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import gevent  # noqa: E402
+import gevent.socket  # noqa: E402
+from gevent.server import StreamServer  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.sharding import HashRing, route_key  # noqa: E402
+
+HOST = '127.0.0.1'
+MAX_HEAD = 64 * 1024     # bytes of request line + headers the router will buffer
+READY_TIMEOUT = 60       # seconds to wait for a worker to accept connections
+
+
+# ---------------------------------------------------------------------------
+# Router
+# ---------------------------------------------------------------------------
+
+def _read_head(sock):
+    """Read up to the end of the request headers: (head, bytes after it),
+    or (None, b'') if the client went away or sent too much."""
+    buf = b''
+    while b'\r\n\r\n' not in buf:
+        chunk = sock.recv(65536)
+        if not chunk or len(buf) > MAX_HEAD:
+            return None, b''
+        buf += chunk
+    head, _, rest = buf.partition(b'\r\n\r\n')
+    return head, rest
+
+
+def _pipe(src, dst) -> None:
+    try:
+        while True:
+            data = src.recv(65536)
+            if not data:
+                break
+            dst.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            dst.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class Router:
+    def __init__(self, backends: list):
+        self.backends = backends            # (host, port), indexed by shard id
+        self.ring = HashRing(range(len(backends)))
+        self._next = itertools.count()
+
+    def pick(self, target: str) -> int:
+        key = route_key(target)
+        if key is None:
+            return next(self._next) % len(self.backends)
+        return self.ring.node_for(key)
+
+    def rewrite(self, head: bytes, address) -> tuple:
+        """(shard, head to send upstream) for one request head."""
+        request, *headers = head.decode('latin-1').split('\r\n')
+        target = request.split(' ')[1] if request.count(' ') >= 2 else '/'
+        if not any(h.lower().startswith('upgrade:') for h in headers):
+            headers = [h for h in headers
+                       if not h.lower().startswith(('connection:', 'keep-alive:'))]
+            headers.append('Connection: close')
+        headers.append(f'X-Forwarded-For: {address[0]}')
+        return self.pick(target), '\r\n'.join([request] + headers).encode('latin-1') + b'\r\n\r\n'
+
+    def handle(self, client, address) -> None:
+        upstream = None
+        try:
+            head, rest = _read_head(client)
+            if head is None:
+                return
+            shard, head = self.rewrite(head, address)
+            upstream = gevent.socket.create_connection(self.backends[shard])
+            upstream.sendall(head + rest)
+            sending = gevent.spawn(_pipe, client, upstream)
+            _pipe(upstream, client)     # until the worker closes its side
+            sending.kill()
+        except OSError:
+            pass
+        finally:
+            if upstream is not None:
+                upstream.close()
+            client.close()
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+def run_worker(port: int) -> None:
+    from app import create_app, socketio
+    app = create_app()
+    socketio.run(app, host=HOST, port=port, log_output=False)
+
+
+def _wait_ready(proc, port: int) -> None:
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f'worker on port {port} exited with {proc.returncode}')
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f'worker on port {port} did not start')
+
+
+def start_workers(shards: int, base_port: int) -> list:
+    env = dict(os.environ, SHARD_COUNT=str(shards))
+    env.setdefault('SECRET_KEY', secrets.token_hex(32))
+    procs = []
+    for shard in range(shards):
+        port = base_port + shard
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', '--port', str(port)],
+            env=dict(env, SHARD_ID=str(shard)),
+        )
+        procs.append(proc)
+        if shard == 0:
+            _wait_ready(proc, port)  # shard 0 creates and seeds the database
+    for shard, proc in enumerate(procs):
+        _wait_ready(proc, base_port + shard)
+    return procs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--shards', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8000, help='router port')
+    parser.add_argument('--base-port', type=int, default=8100,
+                        help='shard i listens on base-port + i')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.port)
+        return
+
+    procs = start_workers(args.shards, args.base_port)
+    router = Router([(HOST, args.base_port + i) for i in range(args.shards)])
+    server = StreamServer((HOST, args.port), router.handle)
+    server.start()  # listening before we announce it
+    gevent.signal_handler(signal.SIGTERM, server.stop)
+    print(f'router on http://{HOST}:{args.port} -> {args.shards} shards '
+          f'on ports {args.base_port}-{args.base_port + args.shards - 1}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Monte Carlo balance simulator for the prompt pool.
+
+Plays CPU-vs-CPU games headlessly with app.engine.GameEngine over the
+bundled player index (or a synthetic one), spread across a process pool,
+and reports per prompt:
+
+    turns      distribution of total turns to finish (p10 / p50 / p90)
+    forfeit    share of turns that scored nothing (no pick)
+    first      share of finished games won by the seat that moved first
+    stalled    share of games still running after --max-turns
+
+Every game's RNG is derived from (--seed, prompt key, chunk), so a report
+is reproducible whatever the process count or pool order. --weights writes
+{prompt key: weight} for the app's PROMPT_WEIGHTS_FILE: prompts that stall
+too often get 0 (pruned), slow ones are down-weighted.
+
+Usage:
+    cd /path/to/repo
+    python scripts/simulate.py --games 2000 --seed 1
+    python scripts/simulate.py --synthetic 20000 --start-score 301 --out sim.json
+    python scripts/simulate.py --games 5000 --weights data/prompt_weights.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.engine import GameEngine  # noqa: E402
+from app.game_logic import (VALID_POSITIONS, build_indexes,  # noqa: E402
+                            build_prompt_pool, cpu_pick)
+from app.game_manager import GameSession, Seat  # noqa: E402
+
+CHUNK = 250          # games per task
+MAX_STALL = 0.2      # prune prompts stalling in more games than this
+
+_CLUBS = [f'Club {i:02d}' for i in range(24)]
+_COUNTRIES = ['ENG'] * 8 + ['FRA', 'ESP', 'NED', 'IRL', 'SCO', 'WAL', 'BRA', 'ARG']
+
+
+def synthetic_players(n: int, seed: int) -> list:
+    """A deterministic stand-in dataset with a realistic long-tailed apps
+    distribution, for tuning without the real data."""
+    rng = random.Random(f'players:{seed}')
+    players = []
+    for i in range(n):
+        positions = sorted(set(rng.sample(sorted(VALID_POSITIONS), rng.choice((1, 1, 2)))))
+        clubs = sorted(set(rng.choice(_CLUBS) for _ in range(rng.randint(1, 3))))
+        players.append({
+            'name': f'Player {i}', 'name_key': f'player {i}',
+            'country': rng.choice(_COUNTRIES), 'positions': ','.join(positions),
+            'clubs': ','.join(clubs), 'apps': min(600, int(rng.expovariate(1 / 70)) + 1),
+        })
+    return players
+
+
+def load_pool(synthetic: int, seed: int, min_answers: int):
+    if synthetic:
+        players = synthetic_players(synthetic, seed)
+    else:
+        from app.dataset import iter_players
+        players = list(iter_players())
+    index = build_indexes(players)
+    return index, build_prompt_pool(index, min_answers)
+
+
+def play(engine: GameEngine, prompt, start_score: int, difficulties, max_turns: int):
+    """Play one game. Returns (turns, winner seat or None, forfeited turns)."""
+    game = GameSession(code='SIM')
+    game.prompt = prompt
+    for i, difficulty in enumerate(difficulties):
+        game.add_seat(Seat(user_id=None, username=f'CPU {i}', score=start_score,
+                           is_cpu=True, cpu_difficulty=difficulty))
+    engine.start(game)
+    for turn in range(1, max_turns + 1):
+        engine.cpu_move(game)
+        if game.status != 'active':
+            winner = 0 if game.seats[0].score <= 0 else 1
+            return turn, winner, sum(s.forfeit_count for s in game.seats)
+    return max_turns, None, sum(s.forfeit_count for s in game.seats)
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+_worker = {}
+
+
+def _init_worker(synthetic: int, seed: int, min_answers: int) -> None:
+    _worker['index'], _worker['pool'] = load_pool(synthetic, seed, min_answers)
+
+
+def _run_chunk(task):
+    """Play one chunk of games for one prompt; returns mergeable counts."""
+    prompt_i, chunk_i, games, start_score, difficulties, max_turns, seed = task
+    prompt = _worker['pool'][prompt_i]
+    rng = random.Random(f'{seed}:{prompt.key}:{chunk_i}')
+    engine = GameEngine(_worker['index'], pick=partial(cpu_pick, rng=rng))
+    turns, first_wins, finished, forfeits, total_turns = Counter(), 0, 0, 0, 0
+    for g in range(games):
+        # Alternate who moves first so unequal strategies don't skew 'first'
+        order = difficulties if g % 2 == 0 else difficulties[::-1]
+        n, winner, lost = play(engine, prompt, start_score, order, max_turns)
+        total_turns += n
+        forfeits += lost
+        if winner is not None:
+            finished += 1
+            turns[n] += 1
+            first_wins += winner == 0
+    return prompt_i, turns, first_wins, finished, forfeits, total_turns
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def _percentile(counts: Counter, q: float):
+    total = sum(counts.values())
+    if not total:
+        return None
+    target, seen = q * total, 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= target:
+            return value
+
+
+def simulate(games: int, seed: int = 0, start_score: int = 501,
+             difficulties=('easy', 'easy'), synthetic: int = 0,
+             min_answers: int = 30, max_turns: int = 400, processes: int = None) -> dict:
+    """Run ``games`` games per prompt and return the report dict."""
+    _init_worker(synthetic, seed, min_answers)
+    pool = _worker['pool']
+    tasks = [
+        (p, c, min(CHUNK, games - c * CHUNK), start_score, tuple(difficulties),
+         max_turns, seed)
+        for p in range(len(pool)) for c in range((games + CHUNK - 1) // CHUNK)
+    ]
+    if processes == 1:
+        results = map(_run_chunk, tasks)
+    else:
+        import multiprocessing
+        mp_pool = multiprocessing.Pool(processes, _init_worker,
+                                       (synthetic, seed, min_answers))
+        results = mp_pool.imap_unordered(_run_chunk, tasks)
+
+    merged = [[Counter(), 0, 0, 0, 0] for _ in pool]
+    try:
+        for prompt_i, turns, first_wins, finished, forfeits, total_turns in results:
+            m = merged[prompt_i]
+            m[0].update(turns)
+            m[1] += first_wins
+            m[2] += finished
+            m[3] += forfeits
+            m[4] += total_turns
+    finally:
+        if processes != 1:
+            mp_pool.close()
+            mp_pool.join()
+
+    prompts = []
+    for prompt, (turns, first_wins, finished, forfeits, total_turns) in zip(pool, merged):
+        prompts.append({
+            'key': prompt.key,
+            'text': prompt.text,
+            'answer_count': prompt.answer_count,
+            'games': games,
+            'turns': {'p10': _percentile(turns, 0.1), 'p50': _percentile(turns, 0.5),
+                      'p90': _percentile(turns, 0.9)},
+            'forfeit_rate': round(forfeits / total_turns, 4) if total_turns else 0.0,
+            'first_mover_win_rate': round(first_wins / finished, 4) if finished else None,
+            'stall_rate': round(1 - finished / games, 4),
+        })
+    prompts.sort(key=lambda p: p['key'])
+    return {
+        'seed': seed, 'start_score': start_score, 'difficulties': list(difficulties),
+        'synthetic': synthetic, 'min_answers': min_answers, 'max_turns': max_turns,
+        'prompts': prompts,
+    }
+
+
+def suggest_weights(report: dict, max_stall: float = MAX_STALL) -> dict:
+    """{prompt key: weight}. Prompts stalling more than ``max_stall`` get 0;
+    the rest are scaled down by how much slower than the pool median they
+    finish, and by their stall rate."""
+    medians = sorted(p['turns']['p50'] for p in report['prompts']
+                     if p['turns']['p50'] is not None)
+    target = medians[len(medians) // 2] if medians else 1
+    weights = {}
+    for p in report['prompts']:
+        median = p['turns']['p50']
+        if median is None or p['stall_rate'] > max_stall:
+            weights[p['key']] = 0.0
+        else:
+            weights[p['key']] = round(min(1.0, target / median) * (1 - p['stall_rate']), 3)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=1000, help='games per prompt')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-score', type=int, default=501)
+    parser.add_argument('--cpu', nargs=2, default=['easy', 'easy'],
+                        choices=['easy', 'hard'], metavar=('SEAT0', 'SEAT1'))
+    parser.add_argument('--synthetic', type=int, default=0, metavar='N',
+                        help='use N synthetic players instead of the bundled dataset')
+    parser.add_argument('--min-answers', type=int, default=30)
+    parser.add_argument('--max-turns', type=int, default=400)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--out', help='write the full JSON report here')
+    parser.add_argument('--weights', help='write suggested prompt weights here')
+    args = parser.parse_args()
+
+    report = simulate(args.games, args.seed, args.start_score, args.cpu,
+                      args.synthetic, args.min_answers, args.max_turns, args.processes)
+
+    rows = sorted(report['prompts'], key=lambda p: (p['stall_rate'], p['turns']['p50'] or 0),
+                  reverse=True)
+    print(f'{"p10":>5}{"p50":>5}{"p90":>5}{"forfeit":>9}{"first":>7}{"stall":>7}  prompt')
+    for p in rows:
+        t = p['turns']
+        first = p['first_mover_win_rate']
+        print(f'{t["p10"] or "-":>5}{t["p50"] or "-":>5}{t["p90"] or "-":>5}'
+              f'{p["forfeit_rate"]:>9.1%}{"-" if first is None else f"{first:.0%}":>7}'
+              f'{p["stall_rate"]:>7.1%}  {p["text"]}')
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+    if args.weights:
+        weights = suggest_weights(report)
+        with open(args.weights, 'w', encoding='utf-8') as f:
+            json.dump(weights, f, indent=1, sort_keys=True)
+        pruned = sum(1 for w in weights.values() if w == 0)
+        print(f'Wrote {len(weights)} weights ({pruned} pruned) to {args.weights}')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,8 @@
     const CODE        = init.code;
     const MY_USER_ID  = init.myUserId;
     const MY_USERNAME = init.myUsername;
+    const SPECTATE    = !!init.spectate;
+    const NAMES_URL   = init.namesUrl;
 
     // ── DOM refs ─────────────────────────────────────────────
     const side0El       = document.getElementById('side-0');
@@ -19,6 +21,7 @@
     const timerEl       = document.getElementById('timer-pill');
     const statusEl      = document.getElementById('session-status');
     const promptEl      = document.getElementById('prompt-box');
+    const hintEl        = document.getElementById('prompt-hint');
     const messageEl     = document.getElementById('message-box');
     const feedEl        = document.getElementById('turn-feed');
     const inputEl       = document.getElementById('player_name');
@@ -40,14 +43,20 @@
     let currentDeadline = 0;
     let gameOver      = false;
     let bannerTimeout = null;
+    let spectating    = SPECTATE;
+    let nameDict      = null; // [[name, key], …] once the dictionary has loaded
+    let usedKeys      = new Set();
 
     // ── Socket ───────────────────────────────────────────────
-    const socket = io({ transports: ['websocket', 'polling'] });
+    // ?code= lets a sharded deployment's router pin this connection to the
+    // worker that owns the game
+    const socket = io({ transports: ['websocket', 'polling'], query: { code: CODE } });
 
-    socket.on('connect',       () => { setStatus('Connected', '#4ade80'); socket.emit('join_game', { code: CODE }); });
+    socket.on('connect',       () => { setStatus('Connected', '#4ade80'); socket.emit('join_game', { code: CODE, spectate: SPECTATE }); });
     socket.on('connect_error', () => setStatus('Reconnecting…', '#facc15'));
     socket.on('disconnect',    () => { setStatus('Disconnected', '#f87171'); stopCountdown(); });
     socket.on('game_state',    renderState);
+    socket.on('game_update',   onGameUpdate);
     socket.on('turn_result',   onTurnResult);
     socket.on('game_over',     onGameOver);
     socket.on('opponent_disconnected', () => showMessage('Opponent disconnected. Waiting 60 s…', 'info'));
@@ -55,15 +64,25 @@
     socket.on('rematch_waiting', d => showMessage(d.message, 'info'));
     socket.on('rematch_start',   d => { window.location.href = '/game/' + d.code; });
     socket.on('error',           d => showMessage(d.message, 'error'));
+    socket.on('spectate_full',   d => {
+        showMessage(d.message, 'error');
+        setTimeout(() => { window.location.href = '/lobby'; }, 2000);
+    });
 
     // ── renderState ──────────────────────────────────────────
     function renderState(state) {
+        updateUsedKeys(state);
+
         // Determine my seat on first state
         if (mySeat === null) {
             for (const p of state.players) {
                 if (p.username === MY_USERNAME) { mySeat = p.seat; break; }
             }
         }
+        if (mySeat === null && state.status === 'active') {
+            spectating = true;
+            rematchBtn.hidden = true;
+        }
 
         // Status
         const statusMap = { waiting: 'Waiting for opponent…', active: 'In progress', finished: 'Finished', abandoned: 'Abandoned' };
@@ -71,6 +90,14 @@
 
         // Prompt
         promptEl.textContent = state.prompt ? state.prompt.text : 'Waiting for prompt…';
+        if (state.answers_left != null) {
+            let hint = `${state.answers_left} valid answer${state.answers_left === 1 ? '' : 's'} left`;
+            if (state.finishing_answers) hint += ` · ${state.finishing_answers} would finish`;
+            hintEl.textContent = hint;
+            hintEl.hidden = false;
+        } else {
+            hintEl.hidden = true;
+        }
 
         // Scoreboard sides
         const sides   = [side0El, side1El];
@@ -104,6 +131,8 @@
                     labelEls[i].innerHTML = '<span class="sb-cpu-thinking">Thinking</span>';
                 } else if (p.seat === mySeat) {
                     labelEls[i].textContent = 'Your turn';
+                } else if (spectating) {
+                    labelEls[i].textContent = 'Throwing';
                 } else {
                     labelEls[i].textContent = "Opponent's turn";
                 }
@@ -235,6 +264,15 @@
     }
 
     // ── Event handlers ───────────────────────────────────────
+    // One frame per action: the turn outcome (if any), the new state and,
+    // when the game ended, the result. The separate events below are only
+    // sent by servers running with LEGACY_SOCKET_EVENTS.
+    function onGameUpdate(data) {
+        if (data.turn) onTurnResult(data.turn);
+        renderState(data.state);
+        if (data.game_over) onGameOver(data.game_over);
+    }
+
     function onTurnResult(data) {
         const type = data.forfeited ? 'error' : 'success';
         showMessage(data.message, type);
@@ -251,8 +289,13 @@
         const myWon = data.winner_seat === mySeat;
 
         winWinnerName.textContent = data.winner_username;
-        winWins.textContent = myWon ? 'You win!' + abandoned : 'Better luck next time' + abandoned;
-        winWins.style.color = myWon ? 'var(--success)' : 'var(--danger)';
+        if (spectating) {
+            winWins.textContent = 'wins!' + abandoned;
+            winWins.style.color = 'var(--text)';
+        } else {
+            winWins.textContent = myWon ? 'You win!' + abandoned : 'Better luck next time' + abandoned;
+            winWins.style.color = myWon ? 'var(--success)' : 'var(--danger)';
+        }
 
         // Score blocks
         winScoresRow.innerHTML = '';
@@ -298,31 +341,84 @@
     // ── Autocomplete ─────────────────────────────────────────
     let acSelected = -1;
 
+    // The name dictionary lives at an immutable, versioned URL, so the
+    // browser fetches it once and serves it from cache after that. Until it
+    // arrives (or if it fails) suggestions come from the server search.
+    if (NAMES_URL) {
+        fetch(NAMES_URL)
+            .then(r => r.ok ? r.json() : Promise.reject(r.status))
+            .then(names => { nameDict = names.map(n => [n, nameKey(n)]); })
+            .catch(() => {});
+    }
+
+    // Mirrors game_logic._TRANSLIT / normalize_name_key
+    const TRANSLIT = {
+        'Ø': 'O', 'ø': 'o', 'Ł': 'L', 'ł': 'l', 'Đ': 'D', 'đ': 'd', 'Ð': 'D', 'ð': 'd',
+        'Þ': 'Th', 'þ': 'th', 'Æ': 'AE', 'æ': 'ae', 'Œ': 'OE', 'œ': 'oe', 'ß': 'ss',
+        'ẞ': 'SS', 'Ħ': 'H', 'ħ': 'h', 'Ŧ': 'T', 'ŧ': 't', 'Ŋ': 'N', 'ŋ': 'n',
+        'ı': 'i', 'ĸ': 'k', 'ſ': 's', 'Ŀ': 'L', 'ŀ': 'l', 'Ĳ': 'IJ', 'ĳ': 'ij',
+        'Ə': 'E', 'ə': 'e', 'Ɖ': 'D', 'ɖ': 'd', 'Ƒ': 'F', 'ƒ': 'f',
+        '‘': "'", '’': "'", 'ʼ': "'", '`': "'", '´': "'",
+        '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-',
+    };
+    const TRANSLIT_RE = new RegExp('[' + Object.keys(TRANSLIT).join('') + ']', 'g');
+
+    function nameKey(s) {
+        return s.normalize('NFKD').replace(TRANSLIT_RE, c => TRANSLIT[c])
+            .replace(/[^\x00-\x7F]/g, '')
+            .split(/[\s\x1c-\x1f]+/).filter(Boolean).join(' ').toLowerCase();   // str.split()
+    }
+
+    // Names that scored are used up for the rest of the game
+    function updateUsedKeys(state) {
+        usedKeys = new Set();
+        for (const p of state.players) {
+            if (!p) continue;
+            for (const h of p.history) {
+                if (typeof h.result === 'number') usedKeys.add(nameKey(h.name));
+            }
+        }
+    }
+
+    function localSearch(q) {
+        const results = [];
+        for (const [name, key] of nameDict) {
+            if (key.includes(q) && !usedKeys.has(key)) {
+                results.push(name);
+                if (results.length === 5) break;
+            }
+        }
+        return results;
+    }
+
     inputEl.addEventListener('input', () => {
         acSelected = -1;
         const q = inputEl.value.trim();
         if (q.length < 2) { hideDropdown(); return; }
+        if (nameDict) { showSuggestions(localSearch(nameKey(q))); return; }
         fetch(`/api/players/search?q=${encodeURIComponent(q)}&code=${encodeURIComponent(CODE)}`)
             .then(r => r.json())
-            .then(names => {
-                if (!names.length) { hideDropdown(); return; }
-                dropEl.innerHTML = '';
-                names.forEach(name => {
-                    const item = document.createElement('div');
-                    item.className = 'autocomplete-item';
-                    item.textContent = name;
-                    item.addEventListener('mousedown', e => {
-                        e.preventDefault();
-                        inputEl.value = name;
-                        hideDropdown();
-                    });
-                    dropEl.appendChild(item);
-                });
-                dropEl.style.display = 'block';
-            })
+            .then(showSuggestions)
             .catch(hideDropdown);
     });
 
+    function showSuggestions(names) {
+        if (!names.length) { hideDropdown(); return; }
+        dropEl.innerHTML = '';
+        names.forEach(name => {
+            const item = document.createElement('div');
+            item.className = 'autocomplete-item';
+            item.textContent = name;
+            item.addEventListener('mousedown', e => {
+                e.preventDefault();
+                inputEl.value = name;
+                hideDropdown();
+            });
+            dropEl.appendChild(item);
+        });
+        dropEl.style.display = 'block';
+    }
+
     inputEl.addEventListener('keydown', e => {
         const items = dropEl.querySelectorAll('.autocomplete-item');
         if (e.key === 'ArrowDown') {
@@ -17,22 +17,55 @@
 
         list.innerHTML = sessions.map(s => {
             const joinable = s.status === 'waiting' && s.player_count < 2;
+            const watching = s.spectator_count ? ` &middot; ${s.spectator_count} watching` : '';
             return `<div class="session-item">
                 <div>
                     <div class="session-id">${esc(s.code)}</div>
-                    <div class="session-details">Host: ${esc(s.host)} &middot; ${s.player_count}/2 players</div>
+                    <div class="session-details">Host: ${esc(s.host)} &middot; ${s.player_count}/2 players${watching}</div>
                 </div>
                 <div style="display:flex;align-items:center;gap:10px">
                     ${joinable
                         ? `<span style="font-size:0.8rem;color:var(--text-dim)"><span class="status-dot ready"></span>Open</span>
                            <a href="/game/${esc(s.code)}" class="btn btn-teal" style="padding:8px 16px;font-size:0.8rem">Join</a>`
-                        : `<span style="font-size:0.8rem;color:var(--text-faint)"><span class="status-dot full"></span>Full</span>`
+                        : `<span style="font-size:0.8rem;color:var(--text-faint)"><span class="status-dot full"></span>Full</span>
+                           <a href="/game/${esc(s.code)}?spectate=1" class="btn btn-ghost" style="padding:8px 16px;font-size:0.8rem">Watch</a>`
                     }
                 </div>
             </div>`;
         }).join('');
     });
 
+    // ── Quick match ──────────────────────────────────────────
+    const qmBtn    = document.getElementById('quick-match-btn');
+    const qmStatus = document.getElementById('quick-match-status');
+    let searching  = false;
+
+    function setSearching(on, text) {
+        searching = on;
+        qmBtn.textContent = on ? 'Cancel' : 'Quick Match';
+        qmStatus.textContent = text || '';
+        qmStatus.hidden = !text;
+    }
+
+    if (qmBtn) {
+        qmBtn.addEventListener('click', () => {
+            if (searching) {
+                socket.emit('cancel_quick_match');
+                setSearching(false);
+            } else {
+                socket.emit('quick_match');
+                setSearching(true, 'Finding an opponent…');
+            }
+        });
+    }
+
+    socket.on('quick_match_waiting', d => {
+        setSearching(true, `Finding an opponent… (${d.depth} waiting)`);
+    });
+    socket.on('match_found', d => { window.location.href = '/game/' + d.code; });
+    socket.on('error', d => { if (searching) setSearching(false, d.message); });
+    socket.on('disconnect', () => { if (searching) setSearching(false); });
+
     function esc(s) {
         return String(s)
             .replace(/&/g, '&amp;').replace(/</g, '&lt;')
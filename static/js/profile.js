@@ -0,0 +1,50 @@
+(function () {
+    'use strict';
+
+    const feed = document.getElementById('recent-feed');
+    const sentinel = document.getElementById('recent-sentinel');
+    if (!feed || !sentinel) return;
+
+    let cursor = feed.dataset.nextCursor;
+    let loading = false;
+
+    // Fetch the next page of match history whenever the end of the feed
+    // scrolls into view; stop once the API reports no further cursor.
+    const observer = new IntersectionObserver((entries) => {
+        if (entries.some(e => e.isIntersecting)) loadMore();
+    }, { rootMargin: '200px' });
+
+    if (cursor) observer.observe(sentinel);
+
+    function loadMore() {
+        if (loading || !cursor) return;
+        loading = true;
+        fetch(`${feed.dataset.url}?cursor=${encodeURIComponent(cursor)}`)
+            .then(r => r.ok ? r.json() : Promise.reject(r.status))
+            .then(data => {
+                feed.insertAdjacentHTML('beforeend', data.games.map(row).join(''));
+                cursor = data.next_cursor;
+                observer.unobserve(sentinel);
+                // Re-observing fires again at once if the sentinel is still visible
+                if (cursor) observer.observe(sentinel);
+            })
+            .catch(() => observer.disconnect())
+            .finally(() => { loading = false; });
+    }
+
+    function row(g) {
+        const result = g.won ? 'win' : 'loss';
+        return `<div class="recent-row">
+            <span class="recent-result ${result}">${g.won ? 'WIN' : 'LOSS'}</span>
+            <span class="recent-opp">vs ${esc(g.opponent)}</span>
+            <span class="recent-score">${esc(g.final_score)}</span>
+            <span class="recent-meta">${esc(g.date)}</span>
+        </div>`;
+    }
+
+    function esc(s) {
+        return String(s)
+            .replace(/&/g, '&amp;').replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+    }
+})();
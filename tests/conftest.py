@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    return create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True})
+
+
+@pytest.fixture
+def login(app):
+    def _login(username):
+        client = app.test_client()
+        client.post('/login', data={'username': username})
+        return client
+    return _login
+
+
+@pytest.fixture(autouse=True)
+def _clear_games():
+    yield
+    from app import user_cache
+    from app.game_manager import GAMES, remove_game
+    from app.matchmaking import QUEUE
+    for code in list(GAMES):
+        remove_game(code)
+    QUEUE.clear()
+    user_cache.clear()
@@ -0,0 +1,59 @@
+"""Tests for fingerprinted, precompressed static assets."""
+import gzip
+import re
+
+import pytest
+
+
+@pytest.fixture
+def css_url(app):
+    with app.test_request_context():
+        from flask import url_for
+        return url_for('static', filename='css/style.css')
+
+
+def test_url_for_yields_fingerprinted_name(app, css_url):
+    assert re.fullmatch(r'/static/css/style\.[0-9a-f]{10}\.css', css_url)
+    assert app.extensions['assets']['css/style.css'].path in css_url
+
+
+def test_gzip_negotiation_and_cache_headers(app, css_url):
+    with open(f'{app.static_folder}/css/style.css', 'rb') as f:
+        original = f.read()
+    client = app.test_client()
+
+    zipped = client.get(css_url, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert zipped.status_code == 200
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert zipped.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert zipped.mimetype == 'text/css'
+    assert gzip.decompress(zipped.data) == original
+    assert len(zipped.data) < len(original)
+
+    plain = client.get(css_url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == original
+    assert plain.headers['ETag'] != zipped.headers['ETag']
+
+    cached = client.get(css_url, headers={'If-None-Match': plain.headers['ETag']})
+    assert cached.status_code == 304
+    cached = client.get(css_url, headers={'If-None-Match': zipped.headers['ETag'],
+                                          'Accept-Encoding': 'gzip'})
+    assert cached.status_code == 304
+    mixed = client.get(css_url, headers={'If-None-Match': plain.headers['ETag'],
+                                         'Accept-Encoding': 'gzip'})
+    assert mixed.status_code == 200
+
+
+def test_unhashed_name_still_served(app):
+    r = app.test_client().get('/static/css/style.css')
+    assert r.status_code == 200
+    assert 'immutable' not in r.headers.get('Cache-Control', '')
+    r.close()
+
+
+def test_templates_reference_hashed_assets(login):
+    html = login('assets_user').get('/lobby').get_data(as_text=True)
+    assert re.search(r'/static/js/lobby\.[0-9a-f]{10}\.js', html)
+    assert re.search(r'/static/css/style\.[0-9a-f]{10}\.css', html)
@@ -0,0 +1,41 @@
+"""Tests for the packed player dataset and first-boot seeding."""
+import pytest
+
+from app import _seed_players, db
+from app.dataset import (JSON_PATH, PACKED_PATH, iter_json, iter_packed,
+                         iter_players, write_packed)
+from app.models import Player
+
+
+def test_round_trip(tmp_path):
+    records = [{'name': 'Martin Ødegaard', 'country': 'NOR', 'positions': 'MF',
+                'clubs': 'Arsenal', 'apps': 150},
+               {'name': 'Ian Wright', 'country': 'ENG', 'positions': 'FW',
+                'clubs': 'Arsenal,West Ham', 'apps': 221}]
+    path = str(tmp_path / 'p.jsonl')
+    assert write_packed(records, path) == 2
+    back = list(iter_packed(path))
+    assert [{k: r[k] for k in records[0]} for r in back] == records
+    assert back[1]['name_key'] == 'ian wright'
+
+
+def test_rejects_unknown_format(tmp_path):
+    path = tmp_path / 'p.jsonl'
+    path.write_text('{"format":"players/99","columns":[]}\n')
+    with pytest.raises(ValueError):
+        list(iter_packed(str(path)))
+
+
+def test_bundled_packed_file_matches_json():
+    assert list(iter_packed(PACKED_PATH)) == list(iter_json(JSON_PATH))
+
+
+def test_seed_inserts_and_returns_every_record(app):
+    with app.app_context():
+        Player.query.delete()
+        players = _seed_players()
+        assert db.session.query(Player).count() == len(players) > 0
+        first = db.session.query(Player).order_by(Player.id).first()
+        assert first.name == players[0]['name']
+        assert first.updated_at is not None
+        assert players == list(iter_players())
@@ -0,0 +1,142 @@
+"""Tests for the cooperative DB driver path and pool metrics."""
+import socket
+import threading
+import time
+
+import gevent
+import pytest
+from psycopg2 import extensions
+from sqlalchemy import event, text
+
+from app import create_app, db, metrics, socketio
+from app.db_pool import (InstrumentedQueuePool, gevent_wait_callback,
+                         make_psycopg2_cooperative)
+from app.game_manager import GAMES, remove_game
+
+SLOW = 0.3
+
+
+class FakePgConn:
+    """Reports POLL_READ until its socket becomes readable, like psycopg2
+    does while a query is in flight."""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def poll(self):
+        self.sock.setblocking(False)
+        try:
+            self.sock.recv(1)
+            return extensions.POLL_OK
+        except BlockingIOError:
+            return extensions.POLL_READ
+
+
+def test_wait_callback_yields_to_other_greenlets():
+    server_side, client_side = socket.socketpair()
+    ticks = []
+
+    def other_handler():
+        while len(ticks) < 5:
+            ticks.append(time.monotonic())
+            gevent.sleep(0.01)
+        server_side.send(b'x')  # the "query" completes
+
+    other = gevent.spawn(other_handler)
+    gevent_wait_callback(FakePgConn(client_side), timeout=2)
+    other.join()
+    assert len(ticks) == 5
+    server_side.close()
+    client_side.close()
+
+
+def pg_sleep(seconds):
+    """Stand-in for a slow query on a psycopg2 connection: the "server"
+    answers on a socket after ``seconds``. With a wait callback installed,
+    psycopg2 hands the connection to it; without one it blocks in recv."""
+    server_side, client_side = socket.socketpair()
+    reply = threading.Timer(seconds, server_side.send, (b'x',))
+    reply.start()
+    try:
+        wait = extensions.get_wait_callback()
+        if wait is None:
+            client_side.recv(1)
+        else:
+            wait(FakePgConn(client_side))
+    finally:
+        reply.join()
+        server_side.close()
+        client_side.close()
+    return 1
+
+
+@pytest.fixture(params=['cooperative', 'blocking'])
+def slow_app(request, tmp_path):
+    """A file-backed SQLite app whose pg_sleep() waits like a psycopg2
+    query, with db_pool's wait callback installed or not."""
+    for code in list(GAMES):
+        remove_game(code)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "slow.db"}',
+                      'TESTING': True})
+    if request.param == 'cooperative':
+        assert make_psycopg2_cooperative()
+        assert extensions.get_wait_callback() is gevent_wait_callback
+    with app.app_context():
+        @event.listens_for(db.engine, 'connect')
+        def _register(dbapi_conn, record):
+            dbapi_conn.create_function('pg_sleep', 1, pg_sleep)
+        db.engine.dispose()
+    yield request.param, app
+    extensions.set_wait_callback(None)
+
+
+def test_slow_query_does_not_freeze_socket_handlers(slow_app):
+    mode, app = slow_app
+    client = app.test_client()
+    client.post('/login', data={'username': 'slowpoke'})
+    client.post('/game/create')
+    code = next(iter(GAMES))
+    sio = socketio.test_client(app, flask_test_client=client)
+    sio.emit('join_game', {'code': code})
+    sio.get_received()
+
+    def slow_query():
+        with app.app_context():
+            db.session.execute(text('SELECT pg_sleep(:s)'), {'s': SLOW})
+
+    t0 = time.monotonic()
+    slow = gevent.spawn(slow_query)
+    gevent.sleep(0)  # let the query start
+    in_use = metrics.snapshot()['gauges'].get('db_pool.in_use')
+    sio.emit('request_state', {'code': code})
+    latency = time.monotonic() - t0
+    assert [m['name'] for m in sio.get_received()] == ['game_state']
+    slow.join()
+    sio.disconnect()
+
+    if mode == 'cooperative':
+        assert latency < SLOW / 2
+        assert in_use >= 1
+    else:
+        assert latency >= SLOW
+
+
+def test_pool_metrics_endpoint(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "m.db"}',
+                      'TESTING': True, 'ADMIN_USERNAME': 'metrics_admin'})
+    with app.app_context():
+        assert isinstance(db.engine.pool, InstrumentedQueuePool)
+        assert db.engine.pool.size() == app.config['DB_POOL_SIZE']
+    admin = app.test_client()
+    admin.post('/login', data={'username': 'metrics_admin'})
+    data = admin.get('/admin/metrics').get_json()
+    assert data['db_pool']['class'] == 'InstrumentedQueuePool'
+    assert data['timings']['db_pool.checkout_wait']['count'] > 0
+    assert 'db_pool.in_use' in data['gauges']
+
+    user = app.test_client()
+    user.post('/login', data={'username': 'metrics_user'})
+    assert user.get('/admin/metrics').status_code == 403
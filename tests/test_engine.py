@@ -0,0 +1,149 @@
+"""Tests for the headless GameEngine — no Flask app involved."""
+import json
+
+import pytest
+
+from app import engine, event_log
+from app.engine import GameEngine, MoveError
+from app.game_logic import AnswerCounter, Outcome, Prompt, build_indexes
+from app.game_manager import GameSession, Seat
+
+PROMPT = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW', 'Name an Arsenal forward', 4)
+
+
+def player(name, apps, clubs='Arsenal', positions='FW'):
+    return {'name': name, 'name_key': name.lower(), 'country': 'ENG',
+            'positions': positions, 'clubs': clubs, 'apps': apps}
+
+
+INDEX = build_indexes([
+    player('Thierry Henry', 60), player('Ian Wright', 90), player('Olivier Giroud', 40),
+    player('Dennis Bergkamp', 179), player('Tony Adams', 50, positions='DF'),
+])
+
+
+def new_game(score=100, cpu=False):
+    game = GameSession(code='TEST')
+    game.prompt = PROMPT
+    game.add_seat(Seat(user_id=1, username='alice', score=score))
+    game.add_seat(Seat(user_id=None if cpu else 2, username='bob', score=score,
+                       is_cpu=cpu, cpu_difficulty='hard' if cpu else None))
+    game.is_solo = cpu
+    return game
+
+
+@pytest.fixture
+def eng():
+    return GameEngine(INDEX)
+
+
+def test_start_opens_first_turn(eng):
+    game = new_game()
+    assert eng.start(game) == [(engine.NEXT_TURN, 0, 1)]
+    assert game.status == 'active'
+
+
+def test_scoring_turn_passes_play(eng):
+    game = new_game()
+    eng.start(game)
+    events = eng.submit(game, 0, 'thierry henry')
+    assert [e[0] for e in events] == [engine.TURN, engine.NEXT_TURN]
+    assert events[0][2:5] == (Outcome.SCORED, 'thierry henry', 60)
+    assert events[1] == (engine.NEXT_TURN, 1, game.turn_seq)
+    assert game.seats[0].score == 40 and 'thierry henry' in game.used_players
+
+
+@pytest.mark.parametrize('name,outcome', [
+    ('Nobody', Outcome.NOT_FOUND),
+    ('Tony Adams', Outcome.NOT_MATCHING),
+    ('Ian Wright', Outcome.BUST),
+    ('Dennis Bergkamp', Outcome.INVALID_DART_SCORE),
+])
+def test_forfeits_keep_score(eng, name, outcome):
+    game = new_game(score=60)
+    eng.start(game)
+    events = eng.submit(game, 0, name)
+    assert events[0][2] == outcome
+    assert game.seats[0].score == 60 and game.seats[0].forfeit_count == 1
+    assert game.current_turn == 1
+
+
+def test_win_ends_game(eng):
+    game = new_game(score=30)
+    eng.start(game)
+    events = eng.submit(game, 0, 'Olivier Giroud')
+    assert events[-1] == (engine.GAME_OVER, 0, False)
+    assert game.status == 'finished' and game.seats[0].score == -10
+    assert game.deadline_epoch == 0.0
+
+
+def test_illegal_moves_raise(eng):
+    game = new_game()
+    with pytest.raises(MoveError):
+        eng.submit(game, 0, 'Thierry Henry')  # not started
+    eng.start(game)
+    with pytest.raises(MoveError):
+        eng.submit(game, 1, 'Thierry Henry')
+
+
+def test_stale_timeout_is_ignored(eng):
+    game = new_game()
+    eng.start(game)
+    stale = game.turn_seq
+    eng.submit(game, 0, 'Nobody')
+    assert eng.timeout(game, stale) == []
+    events = eng.timeout(game, game.turn_seq)
+    assert events[0][1:3] == (1, Outcome.TIMEOUT)
+    assert game.seats[1].forfeit_count == 1 and game.current_turn == 0
+
+
+def test_cpu_plays_only_its_own_turn(eng):
+    game = new_game(score=60, cpu=True)
+    eng.start(game)
+    assert eng.cpu_move(game) == []
+    eng.submit(game, 0, 'Nobody')
+    events = eng.cpu_move(game, game.turn_seq)
+    assert events[0][2:4] == (Outcome.WIN, 'Thierry Henry')
+    assert events[1] == (engine.GAME_OVER, 1, False)
+
+
+def test_leave_credits_opponent_or_abandons(eng):
+    game = new_game()
+    eng.start(game)
+    assert eng.leave(game, 0) == [(engine.GAME_OVER, 1, True)]
+    assert game.seats[1].score == 0 and game.status == 'finished'
+
+    solo = new_game(cpu=True)
+    eng.start(solo)
+    assert eng.leave(solo, 0) == [(engine.ABANDONED,)]
+    assert solo.status == 'abandoned'
+
+
+def test_log_replays_to_same_state(eng):
+    game = new_game(score=100)
+    eng.start(game)
+    for seat, name in ((0, 'Thierry Henry'), (1, 'Nobody'), (0, 'Ian Wright'),
+                       (1, 'Ian Wright'), (0, 'Olivier Giroud')):
+        eng.submit(game, seat, name)
+    assert game.status == 'finished'
+    _, events = game.take_pending_events()
+    rebuilt = event_log.replay(game.code, event_log.iter_events(
+        [event_log.encode_batch(events)]))
+    rebuilt.prompt = game.prompt
+    assert json.loads(json.dumps(rebuilt.to_dict())) == json.loads(json.dumps(game.to_dict()))
+
+
+def test_answer_hints_track_used_players(eng):
+    game = new_game(score=50)
+    game.answers = AnswerCounter.for_prompt(INDEX, PROMPT)
+    assert game.to_dict()['answers_left'] is None  # not started yet
+    eng.start(game)
+    state = game.to_dict()
+    # Henry 60, Wright 90, Giroud 40 are playable; Henry alone finishes 50
+    assert (state['answers_left'], state['finishing_answers']) == (3, 1)
+    eng.submit(game, 0, 'Olivier Giroud')   # 50 -> 10
+    state = game.to_dict()
+    assert (state['answers_left'], state['finishing_answers']) == (2, 1)
+    eng.submit(game, 1, 'Thierry Henry')    # wins from 50
+    assert game.status == 'finished' and game.answers.total == 1
+    assert game.to_dict()['finishing_answers'] is None
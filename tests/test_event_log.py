@@ -0,0 +1,123 @@
+"""Tests for the per-game event log and replay."""
+import json
+
+import gevent
+
+from app import event_log, socketio
+from app.game_logic import Outcome, Prompt
+from app.game_manager import GAMES, Seat, create_game, start_turn_timer
+
+
+def wire_equal(a, b):
+    return json.loads(json.dumps(a)) == json.loads(json.dumps(b))
+
+
+def play_scripted_game():
+    game = create_game()
+    game.prompt = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW', 'Name one', 40)
+    game.log(event_log.PROMPT, {'type': 'club_position', 'club': 'Arsenal',
+                                'club_key': 'arsenal', 'country': '', 'position': 'FW',
+                                'text': 'Name one', 'answer_count': 40})
+    game.add_seat(Seat(user_id=1, username='alice', score=100))
+    game.add_seat(Seat(user_id=2, username='bob', score=100))
+    game.status = 'active'
+    start_turn_timer(game)
+
+    def turn(seat_idx, name, result, key=None, win=False):
+        seat = game.seats[seat_idx]
+        seat.turns_taken += 1
+        if result in ('X', 'BUST'):
+            seat.forfeit_count += 1
+        else:
+            game.used_players.add(key)
+            seat.score -= result
+        seat.record(name, result)
+        game.log(event_log.SUBMIT, seat_idx, Outcome.SCORED, name, result, key)
+        if not win:
+            game.current_turn = 1 - seat_idx
+            start_turn_timer(game)
+
+    turn(0, 'Thierry Henry', 60, 'thierry henry')
+    turn(1, 'Nobody', 'X')
+    turn(0, 'Ian Wright', 'BUST', 'ian wright')
+    turn(1, 'Dennis Bergkamp', 90, 'dennis bergkamp')
+    turn(0, 'Olivier Giroud', 40, 'olivier giroud', win=True)
+    game.end('finished')
+    return game
+
+
+class TestReplay:
+    def test_replay_matches_live_snapshot(self):
+        game = play_scripted_game()
+        _, events = game.take_pending_events()
+        encoded = event_log.encode_batch(events)
+        rebuilt = event_log.replay(game.code, event_log.iter_events([encoded]))
+        assert wire_equal(rebuilt.to_dict(), game.to_dict())
+        assert rebuilt.used_players == game.used_players
+        assert GAMES[game.code] is game  # replay never registers a session
+
+    def test_batches_are_sequenced(self):
+        game = play_scripted_game()
+        first, a = game.take_pending_events()
+        game.log(event_log.LEAVE, 0)
+        second, b = game.take_pending_events()
+        assert (first, second) == (0, len(a))
+        assert len(b) == 1 and game.pending_events == []
+
+    def test_log_does_not_invalidate_snapshot(self):
+        game = play_scripted_game()
+        encoded = game.encoded_state()
+        game.take_pending_events()
+        assert game.encoded_state() is encoded
+
+
+class TestFlush:
+    def test_log_is_durable_at_each_turn_boundary(self, app, login):
+        from app.models import Game, GameEventBatch
+        assert app.config['EVENT_FLUSH_BATCH'] > 3
+        alice, bob = login('alice'), login('bob')
+        code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+        sa = socketio.test_client(app, flask_test_client=alice)
+        sb = socketio.test_client(app, flask_test_client=bob)
+        sa.emit('join_game', {'code': code})
+        sb.emit('join_game', {'code': code})
+        gevent.sleep(0.05)  # the start-of-game flush
+        sa.emit('submit_player', {'code': code, 'name': 'Nobody Real'})
+        gevent.sleep(0.05)
+        game = GAMES[code]
+        assert game.pending_events == []
+        with app.app_context():
+            game_id = Game.query.filter_by(code=code).one().id
+            stored = sum(b.count for b in GameEventBatch.query.filter_by(game_id=game_id))
+        assert stored == game.events_flushed
+        sa.disconnect()
+        sb.disconnect()
+
+
+class TestReplayEndpoint:
+    def test_unfinished_game_has_no_replay(self, app, login):
+        alice = login('alice')
+        code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+        assert alice.get(f'/game/{code}/replay').status_code == 404
+
+    def test_streams_finished_game(self, app, login):
+        alice, bob = login('alice'), login('bob')
+        code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+        sa = socketio.test_client(app, flask_test_client=alice)
+        sb = socketio.test_client(app, flask_test_client=bob)
+        sa.emit('join_game', {'code': code})
+        sb.emit('join_game', {'code': code})
+        sa.emit('submit_player', {'code': code, 'name': 'Nobody Real'})
+        sb.emit('leave_game', {'code': code})
+        gevent.sleep(0.05)  # let the background flush run
+        game = GAMES[code]
+
+        r = alice.get(f'/game/{code}/replay')
+        assert r.status_code == 200
+        assert r.mimetype == 'application/x-ndjson'
+        events = list(event_log.iter_events([r.get_data(as_text=True)]))
+        assert [e[0] for e in events][:4] == ['c', 'p', 'j', 'j']
+        assert events[-1] == ['e', 'finished', [s.score for s in game.seats]]
+        rebuilt = event_log.replay(code, events)
+        assert wire_equal(rebuilt.to_dict(), game.to_dict())
+        sa.disconnect()
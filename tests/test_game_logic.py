@@ -1,18 +1,25 @@
 """Tests for pure game logic functions."""
 import pytest
 import sys, os
+from functools import lru_cache
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from app.dataset import iter_players
 from app.game_logic import (
     VALID_DART_SCORES,
+    AnswerCounter,
     Outcome,
     Prompt,
+    analyse_prompt,
     build_indexes,
+    build_name_dictionary,
     build_prompt_pool,
     clean_player_record,
     evaluate_submission,
     matches_prompt,
     normalize_name_key,
+    weight_by_winnability,
+    winnable_scores,
 )
 
 
@@ -267,3 +274,120 @@ class TestPromptPool:
         pool = build_prompt_pool(idx, min_answers=5)
         country_club_prompts = [p for p in pool if p.type == 'country_club']
         assert len(country_club_prompts) > 0
+
+
+class TestNameDictionary:
+    def test_round_trip_sorted(self):
+        import gzip, json
+        idx = make_index([make_player('Zola'), make_player('Ødegaard'), make_player('Adams')])
+        version, body = build_name_dictionary(idx)
+        assert json.loads(gzip.decompress(body)) == ['Adams', 'Zola', 'Ødegaard']
+        assert len(version) == 16
+
+    def test_version_tracks_content(self):
+        a = build_name_dictionary(make_index([make_player('Adams')]))
+        b = build_name_dictionary(make_index([make_player('Adams')]))
+        c = build_name_dictionary(make_index([make_player('Adams'), make_player('Bould')]))
+        assert a == b          # deterministic, including the gzip header
+        assert a[0] != c[0]
+
+
+@lru_cache(maxsize=None)
+def _bundled_index():
+    return build_indexes(list(iter_players()))
+
+
+class TestNormalizeNameKey:
+    @pytest.mark.parametrize('name,key', [
+        ('Martin Ødegaard', 'martin odegaard'),
+        ('Łukasz Fabiański', 'lukasz fabianski'),
+        ('Pascal Groß', 'pascal gross'),
+        ('Gylfi Sigurðsson', 'gylfi sigurdsson'),
+        ('Jan Åge Fjørtoft', 'jan age fjortoft'),
+        ('Ørjan Håskjold Nyland', 'orjan haskjold nyland'),
+        ('Đorđe Petrović', 'dorde petrovic'),
+        ('N’Golo Kanté', "n'golo kante"),
+        ('Çağlar Söyüncü', 'caglar soyuncu'),
+        ('Mesut Özil', 'mesut ozil'),
+        ('Emiliano Martínez', 'emiliano martinez'),
+        ('Aleksandar Mitrović', 'aleksandar mitrovic'),
+        ('Brede Hangeland', 'brede hangeland'),
+        ('  Harry   Kane ', 'harry kane'),
+    ])
+    def test_squad_names(self, name, key):
+        assert normalize_name_key(name) == key
+
+    def test_punctuation_folds_with_or_without_accents(self):
+        assert normalize_name_key("N`Golo Kante") == normalize_name_key("N`Golo Kanté") == "n'golo kante"
+
+    @pytest.mark.parametrize('name', [
+        'Martin Ødegaard', 'Łukasz Fabiański', 'Øyvind Leonhardsen', 'Egil Østenstad',
+        'Đorđe Petrović', 'Ole Gunnar Solskjær', 'Gylfi Sigurðsson', 'Pascal Groß',
+    ])
+    def test_bundled_index_finds_diacritic_spellings(self, name):
+        idx = _bundled_index()
+        assert normalize_name_key(name) in idx.by_name_key
+
+    def test_index_rederives_stale_keys(self):
+        stale = dict(make_player('Martin Ødegaard'), name_key='martin degaard')
+        idx = build_indexes([stale])
+        assert list(idx.by_name_key) == ['martin odegaard']
+        assert idx.by_name_key['martin odegaard']['name_key'] == 'martin odegaard'
+        assert stale['name_key'] == 'martin degaard'
+
+
+class TestWinnability:
+    PROMPT = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW', 'x', 5)
+
+    def scores(self, bits, limit=120):
+        return [s for s in range(limit + 1) if bits >> s & 1]
+
+    def test_window_reachable_by_subset_sums(self):
+        # Subset sums 0, 5, 30, 35: each finishes scores up to 20 below it
+        bits = winnable_scores([5, 30], 100)
+        assert self.scores(bits) == list(range(1, 6)) + list(range(10, 36))
+
+    def test_used_answers_are_excluded(self):
+        idx = make_index([make_player('A', clubs='Arsenal', positions='FW', apps=5),
+                          make_player('B', clubs='Arsenal', positions='FW', apps=30)])
+        full = analyse_prompt(idx, self.PROMPT, 100)
+        assert full.winnable == winnable_scores([5, 30], 100)
+        assert analyse_prompt(idx, self.PROMPT, 100, used={'a'}).winnable == \
+            winnable_scores([30], 100)
+        assert analyse_prompt(idx, self.PROMPT, 100) is full  # cached on the index
+
+    def test_depleted_endgame_drives_pruning(self):
+        # Only low-apps answers: they go early, leaving nothing to finish with
+        thin = [make_player(f'T{i}', clubs='Arsenal', positions='FW', apps=30 + i)
+                for i in range(8)]
+        # Plenty of answers all along the apps range
+        deep = [make_player(f'D{i}', clubs='Arsenal', positions='MF', apps=1 + i % 60)
+                for i in range(120)]
+        idx = make_index(thin + deep)
+        thin_prompt = self.PROMPT
+        deep_prompt = Prompt('club_position', 'Arsenal', 'arsenal', '', 'MF', 'y', 120)
+        assert analyse_prompt(idx, thin_prompt, 200).endgame < 0.2
+        assert analyse_prompt(idx, deep_prompt, 200).endgame == 1.0
+
+        kept = weight_by_winnability([thin_prompt, deep_prompt], idx, 200, 0.2)
+        assert kept == [deep_prompt] and deep_prompt.weight == 1.0
+
+
+class TestAnswerCounter:
+    def test_counts_and_finishing_window(self):
+        counter = AnswerCounter([5, 30, 30, 45, 180])
+        assert counter.total == 5
+        assert counter.finishing(30) == 3      # 30, 30, 45 land in 0..-15
+        assert counter.finishing(10) == 2      # 45 would bust past -20
+        assert counter.finishing(0) == 0
+        counter.remove(30)
+        counter.remove(7)                      # not an answer: ignored
+        assert counter.total == 4 and counter.finishing(30) == 2
+
+    def test_for_prompt_skips_used_and_unplayable(self):
+        idx = make_index([make_player('A', positions='FW', apps=40),
+                          make_player('B', positions='FW', apps=179),
+                          make_player('C', positions='FW', apps=60)])
+        prompt = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW', 'x', 3)
+        assert AnswerCounter.for_prompt(idx, prompt).total == 2
+        assert AnswerCounter.for_prompt(idx, prompt, used={'a'}).total == 1
@@ -0,0 +1,277 @@
+"""Tests for in-memory session management."""
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app import wire
+from app.game_manager import (GAMES, Seat, SeatHistory, SessionLimitError,
+                              add_spectator, create_game, estimate_session_bytes,
+                              expired_games, last_activity, lobby_sessions,
+                              make_room, memory_stats, remove_game,
+                              remove_spectator, touch)
+
+
+def make_active_game():
+    game = create_game()
+    game.seats.append(Seat(user_id=1, username='alice', score=501))
+    game.seats.append(Seat(user_id=2, username='bob', score=501))
+    game.status = 'active'
+    return game
+
+
+# ---------------------------------------------------------------------------
+# Spectators
+# ---------------------------------------------------------------------------
+
+class TestSpectators:
+    def teardown_method(self):
+        for code in list(GAMES):
+            remove_game(code)
+
+    def test_spectators_excluded_from_seats(self):
+        game = make_active_game()
+        assert add_spectator(game, 'sid-1', limit=10)
+        assert game.seat_for_user(3) is None
+        assert len(game.seats) == 2
+
+    def test_cap_rejects_overflow(self):
+        game = make_active_game()
+        assert add_spectator(game, 'sid-1', limit=2)
+        assert add_spectator(game, 'sid-2', limit=2)
+        assert not add_spectator(game, 'sid-3', limit=2)
+        assert game.spectators == {'sid-1', 'sid-2'}
+
+    def test_rejoin_does_not_count_twice(self):
+        game = make_active_game()
+        assert add_spectator(game, 'sid-1', limit=1)
+        assert add_spectator(game, 'sid-1', limit=1)
+
+    def test_moving_to_another_game(self):
+        first, second = make_active_game(), make_active_game()
+        add_spectator(first, 'sid-1', limit=10)
+        add_spectator(second, 'sid-1', limit=10)
+        assert 'sid-1' not in first.spectators
+        assert 'sid-1' in second.spectators
+
+    def test_lobby_counts(self):
+        game = make_active_game()
+        add_spectator(game, 'sid-1', limit=10)
+        add_spectator(game, 'sid-2', limit=10)
+        remove_spectator('sid-1')
+        entry = next(s for s in lobby_sessions() if s['code'] == game.code)
+        assert entry['spectator_count'] == 1
+
+    def test_remove_game_releases_spectators(self):
+        game = make_active_game()
+        add_spectator(game, 'sid-1', limit=10)
+        remove_game(game.code)
+        assert remove_spectator('sid-1') is None
+
+
+# ---------------------------------------------------------------------------
+# Wire encoding
+# ---------------------------------------------------------------------------
+
+class TestWire:
+    def test_raw_payload_spliced_verbatim(self):
+        raw = wire.encode({'a': [1, 2]})
+        assert wire.dumps(['game_state', raw], separators=(',', ':')) == \
+            '["game_state",{"a":[1,2]}]'
+
+    def test_round_trip(self):
+        raw = wire.encode({'score': 501, 'name': 'Ødegaard'})
+        assert wire.loads(wire.dumps(['e', raw])) == ['e', {'score': 501, 'name': 'Ødegaard'}]
+
+
+# ---------------------------------------------------------------------------
+# Cached snapshots
+# ---------------------------------------------------------------------------
+
+class TestSnapshotCache:
+    def teardown_method(self):
+        for code in list(GAMES):
+            remove_game(code)
+
+    def test_unchanged_game_reuses_snapshot(self):
+        game = make_active_game()
+        assert game.to_dict() is game.to_dict()
+        assert game.encoded_state() is game.encoded_state()
+
+    def test_encoded_matches_dict(self):
+        game = make_active_game()
+        game.seats[0].record('Harry Kane', 50)
+        assert wire.loads(game.encoded_state()) == wire.loads(wire.encode(game.to_dict()))
+
+    def test_seat_score_invalidates(self):
+        game = make_active_game()
+        game.encoded_state()
+        game.seats[0].score -= 60
+        assert game.to_dict()['players'][0]['score'] == 441
+        assert wire.loads(game.encoded_state())['players'][0]['score'] == 441
+
+    def test_history_record_invalidates(self):
+        game = make_active_game()
+        game.encoded_state()
+        game.seats[1].record('Timeout', 'X')
+        assert wire.loads(game.encoded_state())['players'][1]['history'] == \
+            [{'name': 'Timeout', 'result': 'X'}]
+
+    def test_connected_flag_invalidates(self):
+        game = make_active_game()
+        game.to_dict()
+        game.seats[1].connected = False
+        assert game.to_dict()['players'][1]['connected'] is False
+
+    def test_turn_status_and_timer_invalidate(self):
+        game = make_active_game()
+        game.encoded_state()
+        game.current_turn = 1
+        game.turn_seq += 1
+        game.status = 'finished'
+        state = wire.loads(game.encoded_state())
+        assert (state['turn_seat'], state['turn_seq'], state['status']) == (1, 1, 'finished')
+
+    def test_prompt_invalidates(self):
+        from app.game_logic import Prompt
+        game = make_active_game()
+        assert game.to_dict()['prompt'] is None
+        game.prompt = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW', 'Name one', 40)
+        assert game.to_dict()['prompt']['text'] == 'Name one'
+
+    def test_seat_added_invalidates(self):
+        game = create_game()
+        assert game.to_dict()['players'] == []
+        game.seats.append(Seat(user_id=1, username='alice', score=501))
+        assert [p['username'] for p in game.to_dict()['players']] == ['alice']
+
+    def test_spectators_do_not_invalidate(self):
+        game = make_active_game()
+        encoded = game.encoded_state()
+        add_spectator(game, 'sid-1', limit=10)
+        assert game.encoded_state() is encoded
+
+
+# ---------------------------------------------------------------------------
+# Compact seat history
+# ---------------------------------------------------------------------------
+
+class TestSeatHistory:
+    def test_wire_format(self):
+        h = SeatHistory()
+        h.append('Harry Kane', 50)
+        h.append('Ryan Giggs', 'BUST')
+        h.append('Nobody Here', 'X')
+        h.append('Timeout', 'X')
+        h.append('—', 'X')
+        assert list(h) == [
+            {'name': 'Harry Kane', 'result': 50},
+            {'name': 'Ryan Giggs', 'result': 'BUST'},
+            {'name': 'Nobody Here', 'result': 'X'},
+            {'name': 'Timeout', 'result': 'X'},
+            {'name': '—', 'result': 'X'},
+        ]
+
+    def test_zero_points_is_not_a_miss(self):
+        h = SeatHistory()
+        h.append('Sub Keeper', 0)
+        assert h.to_wire() == ({'name': 'Sub Keeper', 'result': 0},)
+
+    def test_incremental_materialisation(self):
+        h = SeatHistory()
+        h.append('Harry Kane', 50)
+        first = h.to_wire()
+        h.append('Ryan Giggs', 60)
+        second = h.to_wire()
+        assert second[0] is first[0]
+        assert len(second) == 2
+        assert h.to_wire() is second      # unchanged length: no new tuple
+        assert h._entries[0] is first[0]  # entries built once, then appended to
+
+    def test_free_text_names_not_interned(self):
+        from app import game_manager
+        before = len(game_manager._NAMES)
+        SeatHistory().append('a typo nobody else made', 'X')
+        assert len(game_manager._NAMES) == before
+
+    def test_known_player_forfeit_shares_name(self):
+        a, b = SeatHistory(), SeatHistory()
+        a.append('Harry Kane', 50)
+        b.append('Harry Kane', 'X')
+        assert b.to_wire() == ({'name': 'Harry Kane', 'result': 'X'},)
+        assert b._extra is None
+
+
+# ---------------------------------------------------------------------------
+# Idle eviction
+# ---------------------------------------------------------------------------
+
+class TestIdleEviction:
+    TTLS = {'waiting': 100, 'active': 200, 'finished': 10}
+
+    def test_only_idle_games_expire(self):
+        stale, fresh = create_game(), create_game()
+        touch(stale, now=1000)
+        touch(fresh, now=1090)
+        assert expired_games(self.TTLS, now=1150) == [stale]
+        assert fresh.code in GAMES
+
+    def test_ttl_follows_status(self):
+        game = make_active_game()
+        touch(game, now=1000)
+        assert expired_games(self.TTLS, now=1150) == []
+        assert expired_games(self.TTLS, now=1250) == [game]
+
+    def test_stale_bucket_is_refiled(self):
+        game = create_game()
+        touch(game, now=1000)
+        game.status = 'active'  # changed without a touch
+        assert expired_games(self.TTLS, now=1150) == []
+        assert last_activity(game) == 1150
+
+    def test_make_room_evicts_oldest_idle_waiting(self):
+        old, newer = create_game(), create_game()
+        active = make_active_game()
+        touch(old, now=1000)
+        touch(newer, now=1010)
+        touch(active, now=900)
+        evicted = make_room(limit=3, min_idle=60, now=1100)
+        assert evicted == [old]
+        assert old.status == 'waiting' and old.code not in GAMES   # ended by the caller
+        assert active.code in GAMES
+
+    def test_make_room_raises_when_nothing_idle(self):
+        game = create_game()
+        touch(game, now=1000)
+        with pytest.raises(SessionLimitError):
+            make_room(limit=1, min_idle=60, now=1010)
+        assert game.code in GAMES
+
+    def test_memory_estimate_grows_with_history(self):
+        game = make_active_game()
+        before = estimate_session_bytes(game)
+        for i in range(50):
+            game.seats[0].record(f'Player {i}', 'X')
+        game.encoded_state()
+        assert estimate_session_bytes(game) > before
+        assert memory_stats()['sessions'] == len(GAMES)
+
+
+# ---------------------------------------------------------------------------
+# Prompt weights
+# ---------------------------------------------------------------------------
+
+def test_assign_prompt_follows_weights():
+    from app.game_logic import Prompt
+    from app.game_manager import (assign_prompt, get_player_index, get_prompt_pool,
+                                  set_player_index)
+    rare = Prompt('club_position', 'Arsenal', 'arsenal', '', 'GK', 'rare', 40, weight=0.0)
+    common = Prompt('club_position', 'Arsenal', 'arsenal', '', 'FW', 'common', 40)
+    saved = get_player_index(), get_prompt_pool()
+    set_player_index(saved[0], [rare, common])
+    try:
+        game = create_game()
+        for _ in range(50):
+            assign_prompt(game)
+            assert game.prompt is common
+    finally:
+        set_player_index(*saved)
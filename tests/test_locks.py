@@ -0,0 +1,105 @@
+"""Threaded stress test: one game hammered from many real threads with
+SOCKETIO_ASYNC_MODE=threading, which turns the game locks on."""
+import random
+import sys
+import threading
+
+import pytest
+
+from app import create_app, locks, rate_limit, socketio
+from app.game_logic import playable_answers, prompt_answers
+from app.game_manager import GAMES, get_player_index
+
+THREADS = 8
+ACTIONS = 200
+
+
+@pytest.fixture
+def threaded_app(tmp_path, monkeypatch):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "t.db"}',
+                      'TESTING': True, 'SOCKETIO_ASYNC_MODE': 'threading'})
+    monkeypatch.setattr(rate_limit, 'allow', lambda action, key: True)
+    yield app
+    # Hand the shared SocketIO object back to a default (gevent, unlocked) app
+    create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True})
+
+
+def test_locks_follow_async_mode():
+    assert locks.wanted('auto', 'threading') and not locks.wanted('0', 'threading')
+    assert locks.wanted('1', 'gevent')
+    assert locks.game_lock('ABCD') is locks.game_lock('ABCD')
+
+
+def test_one_game_many_threads(threaded_app):
+    app = threaded_app
+    assert socketio.server.async_mode == 'threading' and locks.enabled()
+
+    users = []
+    for name in ('alice', 'bob'):
+        client = app.test_client()
+        client.post('/login', data={'username': name})
+        users.append(client)
+    code = users[0].post('/game/create').headers['Location'].rsplit('/', 1)[1]
+    clients = [socketio.test_client(app, flask_test_client=users[i % 2])
+               for i in range(THREADS)]
+    for c in clients[:2]:
+        c.emit('join_game', {'code': code})
+    game = GAMES[code]
+    assert game.status == 'active'
+
+    answers = [p['name'] for p in prompt_answers(get_player_index(), game.prompt).values()]
+    names = answers + ['Nobody Real', 'Thierry Henry', 'Ian Wright']
+    start = threading.Barrier(THREADS)
+    errors = []
+
+    def hammer(i):
+        rng = random.Random(i)
+        client = clients[i]
+        try:
+            start.wait()
+            for _ in range(ACTIONS):
+                roll = rng.random()
+                if roll < 0.8:
+                    client.emit('submit_player', {'code': code, 'name': rng.choice(names)})
+                elif roll < 0.9:
+                    client.emit('request_state', {'code': code})
+                else:
+                    client.emit('join_game', {'code': code})
+        except Exception as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(i,)) for i in range(THREADS)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+    # Scores: every seat's score is the start minus the points in its history
+    seats = game.seats
+    scored = []
+    for seat in seats:
+        points = [e['result'] for e in seat.history if isinstance(e['result'], int)]
+        assert seat.score == app.config['START_SCORE'] - sum(points)
+        assert seat.turns_taken == len(seat.history)
+        scored += [e['name'] for e in seat.history if isinstance(e['result'], int)]
+
+    # Turn ownership: seats alternate, seat 0 first; a win keeps the turn
+    t0, t1 = seats[0].turns_taken, seats[1].turns_taken
+    assert t0 + t1 > 0 and t0 - t1 in (0, 1)
+    if game.status == 'active':
+        assert game.current_turn == (t0 + t1) % 2
+    else:
+        assert game.status == 'finished' and seats[game.current_turn].score <= 0
+
+    # Used players: each accepted answer once, and exactly those are used
+    assert len(scored) == len(set(scored)) == len(game.used_players)
+    playable = len(playable_answers(get_player_index(), game.prompt)[1])
+    assert game.answers.total == playable - len(game.used_players)
+    for c in clients:
+        c.disconnect()
@@ -0,0 +1,117 @@
+"""Tests for the quick-match queue and its socket event."""
+from app import socketio
+from app.game_manager import GAMES, Seat, create_game
+from app.matchmaking import QUEUE, MatchQueue, _SkipList, skill_rating
+from app.models import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_queue():
+    clock = FakeClock()
+    return MatchQueue(base_gap=50, gap_per_second=10, max_gap=300, clock=clock), clock
+
+
+def test_skill_rating_is_smoothed():
+    assert skill_rating(0, 0) == 1500
+    assert skill_rating(10, 10) > skill_rating(1, 1) > 1500 > skill_rating(0, 3)
+    assert 1000 <= skill_rating(0, 10_000) and skill_rating(10_000, 10_000) <= 2000
+
+
+def test_pairs_nearest_within_gap():
+    queue, _ = make_queue()
+    assert queue.join(1, 'a', 1500) is None
+    assert queue.join(2, 'b', 1700) is None      # 200 apart: too far for now
+    waiting, arriving = queue.join(3, 'c', 1530)
+    assert (waiting.user_id, arriving.user_id) == (1, 3)
+    assert len(queue) == 1 and 2 in queue
+
+
+def test_gap_widens_with_wait():
+    queue, clock = make_queue()
+    queue.join(1, 'a', 1500)
+    queue.join(2, 'b', 1600)
+    assert queue.sweep() == []
+    clock.now += 6                                # gap 50 + 60 >= 100
+    [(first, second)] = queue.sweep()
+    assert (first.user_id, second.user_id) == (1, 2)
+    assert len(queue) == 0
+
+
+def test_max_gap_caps_widening():
+    queue, clock = make_queue()
+    queue.join(1, 'a', 1000)
+    queue.join(2, 'b', 2000)
+    clock.now += 3600
+    assert queue.sweep() == [] and queue.stats() == {'depth': 2, 'longest_wait': 3600}
+
+
+def test_rejoin_and_leave():
+    queue, _ = make_queue()
+    queue.join(1, 'a', 1500)
+    queue.join(1, 'a', 1800)                      # replaces the first ticket
+    assert len(queue) == 1 and queue.ticket(1).rating == 1800
+    assert queue.leave(1).rating == 1800
+    assert queue.leave(1) is None and len(queue) == 0
+
+
+def test_skip_list_matches_a_sorted_list():
+    import random
+    rng = random.Random(7)
+    keys, ref = _SkipList(), []
+    for _ in range(2000):
+        key = (rng.randrange(1000, 2000), rng.randrange(100))
+        if key in ref:
+            keys.remove(key)
+            ref.remove(key)
+        else:
+            keys.insert(key)
+            ref.append(key)
+        ref.sort()
+        probe = (rng.randrange(1000, 2000), 50)
+        below = [k for k in ref if k < probe]
+        above = [k for k in ref if k >= probe]
+        assert keys.around(probe) == (below[-1] if below else None, above[0] if above else None)
+    assert list(keys) == ref and len(keys) == len(ref)
+
+
+def test_quick_match_seats_both_players(app, login, monkeypatch):
+    # Earlier tests leave alice and bob with different records
+    monkeypatch.setattr(QUEUE, 'base_gap', 1000)
+    sa = socketio.test_client(app, flask_test_client=login('alice'))
+    sb = socketio.test_client(app, flask_test_client=login('bob'))
+    sa.emit('quick_match')
+    assert [m['name'] for m in sa.get_received()] == ['quick_match_waiting']
+    sb.emit('quick_match')
+    codes = {m['args'][0]['code'] for c in (sa, sb) for m in c.get_received()
+             if m['name'] == 'match_found'}
+    assert len(codes) == 1
+    game = GAMES[codes.pop()]
+    assert game.status == 'active'
+    assert [s.username for s in game.seats] == ['alice', 'bob']
+    sa.disconnect()
+    sb.disconnect()
+
+
+
+def test_disconnect_leaves_queue_and_still_drops_the_seat(app, login):
+    with app.app_context():
+        alice = User.query.filter_by(username='alice').first().id
+    sa = socketio.test_client(app, flask_test_client=login('alice'))
+    sa.emit('quick_match')
+    assert QUEUE.ticket(alice) is not None
+
+    # Seated elsewhere (another tab) while this socket still holds the ticket
+    game = create_game(501)
+    game.add_seat(Seat(user_id=alice, username='alice', score=501))
+    game.add_seat(Seat(user_id=-1, username='bob', score=501))
+    game.status = 'active'
+    sa.disconnect()
+    assert QUEUE.ticket(alice) is None
+    assert game.seats[0].connected is False
@@ -0,0 +1,64 @@
+"""Tests for upgrading databases created before later schema changes."""
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app, db
+from app.models import User
+
+
+def make_legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            username VARCHAR(32) NOT NULL UNIQUE,
+            created_at DATETIME,
+            is_admin BOOLEAN
+        );
+        INSERT INTO users (id, username, is_admin) VALUES
+            (1, 'Bob', 0), (2, 'alice', 0), (3, 'bob', 0);
+    """)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def legacy_app(tmp_path):
+    path = tmp_path / 'legacy.db'
+    make_legacy_db(path)
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'TESTING': True})
+
+
+def test_username_key_is_backfilled(legacy_app):
+    with legacy_app.app_context():
+        keys = dict(db.session.query(User.id, User.username_key))
+    assert keys == {1: 'bob', 2: 'alice', 3: 'bob#3'}
+
+
+def test_login_matches_case_insensitively(legacy_app):
+    client = legacy_app.test_client()
+    client.post('/login', data={'username': 'BOB'})
+    with client.session_transaction() as sess:
+        assert sess['user_id'] == 1
+    with legacy_app.app_context():
+        assert User.query.count() == 3
+
+
+def test_case_variants_cannot_be_inserted(legacy_app):
+    with legacy_app.app_context():
+        db.session.add(User(username='ALICE'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+
+def test_schema_upgrade_is_idempotent(tmp_path):
+    path = tmp_path / 'legacy.db'
+    make_legacy_db(path)
+    url = f'sqlite:///{path}'
+    create_app({'SQLALCHEMY_DATABASE_URI': url, 'TESTING': True})
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url, 'TESTING': True})
+    with app.app_context():
+        assert User.query.filter_by(username_key='alice').one().id == 2
@@ -0,0 +1,50 @@
+"""Tests for running CPU-bound work off the gevent hub."""
+import time
+
+import gevent
+import pytest
+
+from app import offload
+from app.game_logic import build_indexes
+from app.game_manager import Seat, create_game, start_turn_timer
+from app.sockets import _expire_turn
+
+TURN_DELAY = 0.1
+
+
+def big_player_list(n=300_000):
+    return [{'name': f'P{i}', 'name_key': f'p{i}', 'country': ('ENG', 'FRA', 'ESP')[i % 3],
+             'positions': ('GK', 'DF', 'MF', 'FW')[i % 4],
+             'clubs': f'Club{i % 40},Club{i * 7 % 40}', 'apps': i % 200}
+            for i in range(n)]
+
+
+def test_result_and_errors_come_back():
+    assert offload.run(sum, [1, 2, 3]) == 6
+    with pytest.raises(ZeroDivisionError):
+        offload.run(divmod, 1, 0)
+
+
+def test_turn_timer_fires_on_time_during_rebuild(app):
+    game = create_game()
+    game.seats = [Seat(user_id=1, username='a', score=501),
+                  Seat(user_id=2, username='b', score=501)]
+    game.status = 'active'
+    start_turn_timer(game)
+
+    players = big_player_list()
+    fired = []
+
+    def timer():
+        _expire_turn(game.code, game.turn_seq, app, delay=TURN_DELAY)
+        fired.append(time.monotonic())
+
+    t0 = time.monotonic()
+    gevent.spawn(timer)
+    idx = offload.run(build_indexes, players)
+    rebuild = time.monotonic() - t0
+
+    assert len(idx.by_name_key) == len(players)
+    assert rebuild > 2 * TURN_DELAY  # the timer was due mid-rebuild
+    assert fired and fired[0] - t0 < 2 * TURN_DELAY
+    assert game.seats[0].forfeit_count == 1
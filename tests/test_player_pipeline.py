@@ -0,0 +1,87 @@
+"""Tests for the offline stages of the player data pipeline."""
+import json
+import os
+import shutil
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from scripts import player_pipeline as pipeline  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'seasons')
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    raw = tmp_path / 'raw'
+    shutil.copytree(FIXTURES, raw)
+    return raw, tmp_path / 'build', tmp_path / 'players.json'
+
+
+def run(dirs):
+    raw, build, out = dirs
+    result = pipeline.transform(str(raw), str(build), str(out))
+    with open(out, encoding='utf-8') as f:
+        return result, {p['name']: p for p in json.load(f)}
+
+
+def test_clean_season_vectorised():
+    raw = pipeline.read_raw_season(os.path.join(FIXTURES, '2020-2021.csv'))
+    season = pipeline.clean_season(raw, '2020-2021').set_index('player')
+    bale = season.loc['Gareth Bale']
+    assert (bale['apps'], bale['clubs'], bale['positions']) == (22, 'Real Madrid,Tottenham', 'FW,MF')
+    assert season.loc['Jordan Ayew', 'nation'] == 'GHA'
+
+
+def test_transform_aggregates_all_seasons(dirs):
+    result, players = run(dirs)
+    assert sorted(result['changed']) == ['2019-2020', '2020-2021']
+    assert players['Mesut Ozil'] == {'name': 'Mesut Ozil', 'name_key': 'mesut ozil',
+                                     'country': 'GER', 'positions': 'MF',
+                                     'clubs': 'Arsenal', 'apps': 18}
+    assert players['Harry Kane']['apps'] == 64
+    assert players['Jordan Ayew']['positions'] == 'FW,MF'
+    assert 'Danny Drinkwater' not in players  # no appearances
+    assert list(players) == sorted(players)
+
+
+def test_only_changed_seasons_are_recleaned(dirs, monkeypatch):
+    raw, _, _ = dirs
+    run(dirs)
+
+    cleaned = []
+    original = pipeline.clean_season
+    monkeypatch.setattr(pipeline, 'clean_season',
+                        lambda df, season: cleaned.append(season) or original(df, season))
+
+    result, _ = run(dirs)
+    assert result['changed'] == [] and cleaned == []
+
+    with open(raw / '2020-2021.csv', 'a', encoding='utf-8') as f:
+        f.write('Harry Kane,eng ENG,Tottenham,1,FW\n')
+    (raw / '2021-2022.csv').write_text(
+        'player,nation,team,apps,pos\nBen White,eng ENG,Arsenal,32,DF\n', encoding='utf-8')
+    result, players = run(dirs)
+    assert sorted(cleaned) == ['2020-2021', '2021-2022']
+    assert players['Harry Kane']['apps'] == 65
+    assert players['Ben White']['clubs'] == 'Arsenal'
+    assert players['Mesut Ozil']['apps'] == 18   # untouched season kept
+
+
+def test_removed_season_drops_out(dirs):
+    raw, _, _ = dirs
+    run(dirs)
+    os.remove(raw / '2019-2020.csv')
+    result, players = run(dirs)
+    assert result['removed'] == ['2019-2020']
+    assert 'Mesut Ozil' not in players
+    assert players['Harry Kane']['apps'] == 35
+
+
+def test_output_loads_into_the_app_cleaner(dirs):
+    from app.game_logic import clean_player_record
+    _, players = run(dirs)
+    cleaned = clean_player_record(players['Gareth Bale'])
+    assert cleaned['positions'] == 'FW,MF'
+    assert cleaned['clubs'] == 'Real Madrid,Tottenham'
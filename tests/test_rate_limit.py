@@ -0,0 +1,87 @@
+"""Tests for token-bucket rate limiting and send-queue backpressure."""
+import gevent
+from gevent.queue import Queue
+
+from app import metrics, rate_limit
+from app.rate_limit import TokenBucketLimiter, limit_send_queues
+
+
+class TestTokenBucket:
+    def test_burst_then_refill(self):
+        limiter = TokenBucketLimiter(rate=2, burst=3)
+        assert [limiter.allow('u', now=0) for _ in range(4)] == [True, True, True, False]
+        assert limiter.allow('u', now=0.5)       # one token back after 0.5 s
+        assert not limiter.allow('u', now=0.5)
+
+    def test_refill_caps_at_burst(self):
+        limiter = TokenBucketLimiter(rate=10, burst=2)
+        limiter.allow('u', now=0)
+        assert [limiter.allow('u', now=100) for _ in range(3)] == [True, True, False]
+
+    def test_keys_are_independent_and_bounded(self):
+        limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+        assert limiter.allow('a', now=0) and limiter.allow('b', now=0)
+        assert not limiter.allow('a', now=0)     # a is now most recent
+        limiter.allow('c', now=0)                # evicts b
+        assert len(limiter) == 2
+        assert limiter.allow('b', now=0)         # fresh bucket
+
+
+def test_search_rejected_before_lookup(app, login):
+    client = login('rl_search')
+    burst = app.config['RATE_LIMITS']['player_search'][1]
+    codes = [client.get('/api/players/search?q=ha').status_code for _ in range(burst + 2)]
+    assert codes[:burst] == [200] * burst
+    assert codes[burst:] == [429, 429]
+    assert metrics.snapshot()['counters']['rate_limit.rejected.player_search'] >= 2
+
+
+def test_submit_flood_is_refused(app, login):
+    from app import socketio
+    client = login('rl_submit')
+    sio = socketio.test_client(app, flask_test_client=client)
+    burst = app.config['RATE_LIMITS']['submit_player'][1]
+    for _ in range(burst + 1):
+        sio.emit('submit_player', {'code': 'NOPE', 'name': 'x'})
+    messages = [m['args'][0]['message'] for m in sio.get_received() if m['name'] == 'error']
+    assert messages[:burst] == ['Game not active.'] * burst
+    assert messages[burst] == 'Too many submissions — slow down.'
+    sio.disconnect()
+
+
+def test_configure_replaces_limits(app):
+    rate_limit.configure({'x': (1, 1)}, 10)
+    try:
+        assert rate_limit.allow('x', 1) and not rate_limit.allow('x', 1)
+        assert rate_limit.allow('unlimited', 1)
+    finally:
+        rate_limit.configure(app.config['RATE_LIMITS'], app.config['RATE_LIMIT_MAX_KEYS'])
+
+
+class FakeEio:
+    def __init__(self):
+        self.sockets = {'slow': type('S', (), {'queue': Queue()})()}
+        self.sent, self.disconnected = [], []
+
+    def send_packet(self, sid, pkt):
+        self.sent.append(pkt)
+        if sid in self.sockets:
+            self.sockets[sid].queue.put(pkt)
+
+    def disconnect(self, sid):
+        self.disconnected.append(sid)
+
+    def start_background_task(self, fn, *args):
+        return gevent.spawn(fn, *args)
+
+
+def test_slow_consumer_is_disconnected_once():
+    eio = FakeEio()
+    limit_send_queues(eio, max_queued=3)
+    for i in range(6):
+        eio.send_packet('slow', i)
+    gevent.sleep(0)
+    assert eio.sent == [0, 1, 2]
+    assert eio.disconnected == ['slow']
+    eio.send_packet('gone', 'x')  # unknown sids pass through to engineio
+    assert eio.sent[-1] == 'x'
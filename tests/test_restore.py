@@ -0,0 +1,125 @@
+"""Tests for rebuilding live games from the DB at startup."""
+import time
+
+import gevent
+import pytest
+
+from app import create_app, db, socketio
+from app.game_manager import GAMES, remove_game
+from app.models import Game
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f'sqlite:///{tmp_path / "darts.db"}'
+
+
+def boot(db_url):
+    for code in list(GAMES):
+        remove_game(code)
+    # Default EVENT_FLUSH_BATCH: restores must not depend on a small batch
+    return create_app({'SQLALCHEMY_DATABASE_URI': db_url, 'TESTING': True})
+
+
+def login(app, username):
+    client = app.test_client()
+    client.post('/login', data={'username': username})
+    return client
+
+
+def test_active_game_survives_restart(db_url):
+    app = boot(db_url)
+    alice, bob = login(app, 'alice'), login(app, 'bob')
+    code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+    sa = socketio.test_client(app, flask_test_client=alice)
+    sb = socketio.test_client(app, flask_test_client=bob)
+    sa.emit('join_game', {'code': code})
+    sb.emit('join_game', {'code': code})
+    gevent.sleep(0.05)  # let the background flushes run
+    for name in ('Nobody Real', 'Still Nobody', 'No One'):
+        (sa if GAMES[code].current_turn == 0 else sb).emit(
+            'submit_player', {'code': code, 'name': name})
+        gevent.sleep(0.05)
+    assert GAMES[code].turn_seq == 4
+    before = GAMES[code].to_dict()
+
+    app = boot(db_url)
+    game = GAMES[code]
+    after = game.to_dict()
+    for key in ('status', 'turn_seat', 'turn_seq', 'deadline_epoch', 'prompt'):
+        assert after[key] == before[key]
+    assert [(p['username'], p['score'], list(p['history'])) for p in after['players']] == \
+        [(p['username'], p['score'], list(p['history'])) for p in before['players']]
+    assert not any(p['connected'] for p in after['players'])
+    assert game.deadline_epoch > time.time()
+
+    # The restored session keeps playing and logging from where it left off
+    bob = login(app, 'bob')
+    sb = socketio.test_client(app, flask_test_client=bob)
+    sb.emit('join_game', {'code': code})
+    assert game.seats[1].connected
+    sb.emit('submit_player', {'code': code, 'name': 'Still Nobody'})
+    assert game.seats[1].forfeit_count == 2
+    assert game.current_turn == 0
+
+
+def test_waiting_game_survives_restart(db_url):
+    app = boot(db_url)
+    alice = login(app, 'alice')
+    code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+    sa = socketio.test_client(app, flask_test_client=alice)
+    sa.emit('join_game', {'code': code})
+    gevent.sleep(0.05)
+    prompt = GAMES[code].prompt.text
+
+    app = boot(db_url)
+    game = GAMES[code]
+    assert game.status == 'waiting' and game.prompt.text == prompt
+    assert [s.username for s in game.seats] == ['alice']
+
+    # The opponent can still join and start it
+    bob = login(app, 'bob')
+    sb = socketio.test_client(app, flask_test_client=bob)
+    sb.emit('join_game', {'code': code})
+    assert game.status == 'active'
+    gevent.sleep(0.05)
+    with app.app_context():
+        assert Game.query.filter_by(code=code).one().status == 'active'
+
+
+def test_unjoined_game_survives_restart(db_url):
+    app = boot(db_url)
+    code = login(app, 'alice').post('/game/create').headers['Location'].rsplit('/', 1)[1]
+
+    boot(db_url)
+    assert GAMES[code].status == 'waiting' and GAMES[code].seats == []
+
+
+def test_game_without_log_is_abandoned(db_url):
+    app = boot(db_url)
+    with app.app_context():
+        db.session.add(Game(code='LEGACY01', status='active', state_json={'players': []}))
+        db.session.commit()
+
+    app = boot(db_url)
+    assert 'LEGACY01' not in GAMES
+    with app.app_context():
+        assert Game.query.filter_by(code='LEGACY01').one().status == 'abandoned'
+
+
+def test_expired_deadline_rearms_a_full_turn(monkeypatch):
+    from app import game_manager, sockets
+    from app.game_manager import Seat, create_game
+    monkeypatch.setattr(game_manager, 'TURN_SECONDS', 5)
+    armed = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: armed.append(args))
+    game = create_game(501)
+    game.add_seat(Seat(user_id=1, username='a', score=501))
+    game.add_seat(Seat(user_id=2, username='b', score=501))
+    game.status = 'active'
+    game.deadline_epoch = time.time() - 30     # ran out while the server was down
+    seq = game.turn_seq
+    sockets.resume_game(game, app=None)
+    [(task, code, turn_seq, _, remaining)] = armed
+    assert (task, code, turn_seq) == (sockets._expire_turn, game.code, seq + 1)
+    assert 4 < remaining <= 5
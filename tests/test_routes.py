@@ -0,0 +1,40 @@
+"""Tests for HTTP routes not covered elsewhere."""
+import gzip
+import json
+
+from app.game_manager import GAMES, get_name_dictionary
+
+
+def test_name_dictionary_is_cacheable(login):
+    client = login('names_user')
+    version, body = get_name_dictionary()
+    url = f'/api/players/names/{version}.json'
+
+    r = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert r.status_code == 200
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert r.headers['ETag'] == f'"{version}-gz"'
+    assert 'immutable' in r.headers['Cache-Control']
+    names = json.loads(gzip.decompress(r.data))
+    assert names and names == sorted(names)
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert json.loads(plain.data) == names
+    assert plain.headers['ETag'] == f'"{version}"'
+
+    again = client.get(url, headers={'If-None-Match': f'"{version}"'})
+    assert again.status_code == 304
+    other = client.get(url, headers={'If-None-Match': f'"{version}"',
+                                     'Accept-Encoding': 'gzip'})
+    assert other.status_code == 200     # the identity ETag doesn't validate gzip
+
+    assert client.get('/api/players/names/stale.json').status_code == 404
+
+
+def test_game_page_links_current_dictionary(login):
+    client = login('names_host')
+    client.post('/game/create')
+    code = next(iter(GAMES))
+    html = client.get(f'/game/{code}').get_data(as_text=True)
+    assert f'/api/players/names/{get_name_dictionary()[0]}.json' in html
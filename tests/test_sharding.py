@@ -0,0 +1,341 @@
+"""Tests for consistent-hash sharding: the ring, request routing, the
+directory, and an end-to-end run of scripts/run_shards.py with two shards."""
+import http.cookiejar
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from app import db, sharding
+from app.game_manager import (create_game, get_name_dictionary, remove_game,
+                              set_name_dictionary, Seat)
+from app.models import ShardGame, ShardState
+from app.sharding import LOBBY_KEY, HashRing, route_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAMES_E2E = 4
+ROUNDS = 3
+
+
+@pytest.fixture
+def sharded():
+    sharding.configure(0, 2)
+    yield
+    sharding.configure(0, 0)
+
+
+def test_ring_moves_few_keys_when_a_node_joins():
+    keys = [f'K{i:07d}' for i in range(4000)]
+    before = HashRing(range(4))
+    after = HashRing(range(5))
+    moved = [k for k in keys if before.node_for(k) != after.node_for(k)]
+    assert all(after.node_for(k) == 4 for k in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3        # ~1/5, not a reshuffle
+    assert HashRing(range(4)).node_for('ABCD1234') == before.node_for('ABCD1234')
+
+
+def test_route_key():
+    assert route_key('/game/ab12cd34') == 'AB12CD34'
+    assert route_key('/game/AB12CD34/replay') == 'AB12CD34'
+    assert route_key('/socket.io/?EIO=4&transport=websocket&code=ab12cd34') == 'AB12CD34'
+    assert route_key('/socket.io/?EIO=4&transport=polling') == LOBBY_KEY
+    assert route_key('/api/players/search?q=hen&code=AB12CD34') == 'AB12CD34'
+    assert route_key('/api/players/search?q=hen') is None
+    assert route_key('/game/create') is None
+    assert route_key('/lobby') is None
+
+
+def test_workers_mint_only_owned_codes(sharded):
+    ring = HashRing(range(2))
+    codes = [create_game(501).code for _ in range(20)]
+    assert all(ring.node_for(c) == 0 for c in codes)
+    sharding.configure(1, 2)
+    assert ring.node_for(create_game(501).code) == 1
+
+
+def test_directory_publishes_live_games(app, sharded):
+    with app.app_context():
+        game = create_game(501)
+        game.add_seat(Seat(user_id=41, username='remote', score=501))
+        sharding.publish()
+        assert sharding.user_game_code(41) == game.code
+        assert [s['code'] for s in sharding.lobby_sessions()] == [game.code]
+
+        # Another shard's row counts too, until it stops heartbeating
+        db.session.add(ShardGame(code='ZZZZ0001', shard=1, status='active', host='far',
+                                 player_count=2, spectator_count=0, user0=42, user1=43,
+                                 updated_at=time.time()))
+        db.session.commit()
+        assert sharding.user_game_code(43) == 'ZZZZ0001'
+        db.session.execute(db.update(ShardGame).where(ShardGame.shard == 1)
+                           .values(updated_at=0))
+        db.session.commit()
+        assert sharding.user_game_code(43) is None
+
+        remove_game(game.code)
+        sharding.publish()
+        assert sharding.lobby_sessions() == []
+        db.session.execute(db.delete(ShardGame))
+        db.session.commit()
+
+
+@pytest.fixture
+def refreshed_elsewhere(app, sharded):
+    """Restore the indexes and shared state a simulated refresh touched."""
+    import app as app_module
+    from app import _rebuild_indexes
+    built = app_module._players_version
+    yield
+    app_module._players_version = built
+    with app.app_context():
+        db.session.execute(db.delete(ShardState))
+        db.session.commit()
+        _rebuild_indexes(app)
+
+
+def test_player_refresh_reaches_a_stale_shard(app, login, refreshed_elsewhere):
+    client = login('refresher')
+    current = get_name_dictionary()
+    with app.app_context():
+        sharding.set_players_version('refresh-1')     # refreshed on another shard
+        sharding.set_players_version('refresh-2')     # (an update, not a second insert)
+    set_name_dictionary('behind', b'')                # this shard hasn't caught up
+    assert client.get(f'/api/players/names/{current[0]}.json').status_code == 200
+    assert get_name_dictionary() == current
+
+
+def test_refresh_changing_only_apps_reaches_other_shards(app, refreshed_elsewhere):
+    from app import _catch_up_players
+    from app.game_manager import get_player_index
+    from app.models import Player
+    with app.app_context():
+        player = Player.query.filter_by(name='Martin Ødegaard').one()
+        apps = player.apps
+        player.apps = apps + 1                         # the other shard's upload
+        db.session.commit()
+        sharding.set_players_version('apps-only')
+        names = get_name_dictionary()[0]
+        try:
+            assert _catch_up_players(app)
+            assert get_player_index().by_name_key['martin odegaard']['apps'] == apps + 1
+            assert get_name_dictionary()[0] == names   # same names, same URL
+            assert not _catch_up_players(app)          # caught up: no second rebuild
+        finally:
+            player.apps = apps
+            db.session.commit()
+
+
+def test_lobby_broadcast_survives_directory_errors(app, sharded, monkeypatch):
+    from app.sockets import _broadcast_lobby
+
+    def fail():
+        raise RuntimeError('directory down')
+    monkeypatch.setattr(sharding, 'publish', fail)
+    _broadcast_lobby(app)       # logged, not raised into the game flow
+
+
+# ---------------------------------------------------------------------------
+# End to end: launcher + router + two workers
+# ---------------------------------------------------------------------------
+
+class User:
+    """An HTTP session through the router."""
+
+    def __init__(self, base: str, name: str):
+        self.base = base
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+        self.post('/login', f'username={name}')
+
+    def post(self, path: str, body: str = ''):
+        with self.opener.open(self.base + path, data=body.encode(), timeout=10) as r:
+            return r.url, r.read().decode()
+
+    def get(self, path: str):
+        with self.opener.open(self.base + path, timeout=10) as r:
+            return r.read().decode()
+
+    def cookie(self) -> str:
+        return '; '.join(f'{c.name}={c.value}' for c in self.jar)
+
+
+class Socket:
+    """A bare Engine.IO v4 / Socket.IO v5 client: one blocking WebSocket
+    driven with wsproto, reading frames only when asked for one."""
+
+    def __init__(self, port: int, code: str, user: User):
+        from wsproto import ConnectionType, WSConnection
+        from wsproto.events import Request
+        self.sock = socket.create_connection(('127.0.0.1', port), timeout=10)
+        self.ws = WSConnection(ConnectionType.CLIENT)
+        self.messages, self.partial = [], ''
+        self.sock.sendall(self.ws.send(Request(
+            host=f'127.0.0.1:{port}',
+            target=f'/socket.io/?EIO=4&transport=websocket&code={code}',
+            extra_headers=[(b'cookie', user.cookie().encode())])))
+        self.wait(lambda pkt: pkt.startswith('0'))      # engine.io open
+        self.send('40')
+        self.wait(lambda pkt: pkt.startswith('40'))     # socket.io connect
+
+    def _receive(self, deadline: float) -> str:
+        from wsproto.events import Ping, RejectConnection, TextMessage
+        while not self.messages:
+            self.sock.settimeout(max(0.01, deadline - time.monotonic()))
+            data = self.sock.recv(65536)
+            if not data:
+                raise AssertionError('the server closed the socket')
+            self.ws.receive_data(data)
+            for event in self.ws.events():
+                if isinstance(event, RejectConnection):
+                    raise AssertionError(f'upgrade rejected: {event.status_code}')
+                if isinstance(event, Ping):
+                    self.sock.sendall(self.ws.send(event.response()))
+                elif isinstance(event, TextMessage):
+                    self.partial += event.data
+                    if event.message_finished:
+                        self.messages.append(self.partial)
+                        self.partial = ''
+        return self.messages.pop(0)
+
+    def wait(self, match, timeout: float = 10) -> str:
+        deadline = time.monotonic() + timeout
+        while True:
+            pkt = self._receive(deadline)
+            if pkt == '2':
+                self.send('3')
+            elif match(pkt):
+                return pkt
+
+    def send(self, text: str) -> None:
+        from wsproto.events import Message
+        self.sock.sendall(self.ws.send(Message(data=text)))
+
+    def emit(self, event: str, data: dict) -> None:
+        self.send('42' + json.dumps([event, data]))
+
+    def event(self, name: str, check=lambda data: True) -> dict:
+        def match(pkt):
+            if not pkt.startswith('42'):
+                return False
+            event, data = json.loads(pkt[2:])
+            return event == name and check(data)
+        return json.loads(self.wait(match)[2:])[1]
+
+    def close(self) -> None:
+        from wsproto.events import CloseConnection
+        try:
+            self.sock.sendall(self.ws.send(CloseConnection(code=1000)))
+        except Exception:
+            pass
+        self.sock.close()
+
+
+def _port_free(port: int) -> bool:
+    with socket.socket() as s:
+        try:
+            s.bind(('127.0.0.1', port))
+        except OSError:
+            return False
+    return True
+
+
+def _free_ports(n: int) -> int:
+    """First of ``n`` consecutive free ports."""
+    while True:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            first = s.getsockname()[1]
+        if all(_port_free(first + i) for i in range(n)):
+            return first
+
+
+@pytest.fixture
+def cluster(tmp_path):
+    port = _free_ports(3)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp_path / "shards.db"}',
+               SUBMIT_RATE='100', DIRECTORY_INTERVAL='0.5')
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'scripts', 'run_shards.py'), '--shards', '2',
+         '--port', str(port), '--base-port', str(port + 1)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        start_new_session=True, text=True)
+    try:
+        assert proc.stdout.readline().startswith('router on'), 'launcher did not start'
+        yield port
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _play(port: int, code: str, host: User, guest: User, results: dict) -> None:
+    sockets = [Socket(port, code, host), Socket(port, code, guest)]
+    try:
+        for s in sockets:
+            s.emit('join_game', {'code': code})
+            s.event('game_state')
+        for _ in range(ROUNDS):
+            for s in sockets:
+                s.emit('submit_player', {'code': code, 'name': 'Nobody Real'})
+                for watcher in sockets:     # both seats see every turn
+                    update = watcher.event('game_update', lambda d: 'turn' in d)
+                    assert update['turn']['forfeited']
+        results[code] = sockets
+    except Exception as e:  # surfaced by the main thread
+        results[code] = e
+        for s in sockets:
+            s.close()
+
+
+def test_concurrent_games_across_shards(cluster):
+    port = cluster
+    base = f'http://127.0.0.1:{port}'
+    users = [User(base, f'shard{i}') for i in range(GAMES_E2E * 2)]
+
+    # Creates are round-robined, and each worker mints codes it owns
+    codes = []
+    for host in users[::2]:
+        url, _ = host.post('/game/create')
+        codes.append(url.rsplit('/', 1)[1])
+    ring = HashRing(range(2))
+    assert {ring.node_for(c) for c in codes} == {0, 1}
+
+    # Every game's sockets reach its owner; play them all at once
+    results = {}
+    threads = [threading.Thread(target=_play, args=(port, code, users[2 * i], users[2 * i + 1], results))
+               for i, code in enumerate(codes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    errors = {c: r for c, r in results.items() if isinstance(r, Exception)}
+    assert not errors and len(results) == GAMES_E2E
+
+    # Cross-shard lookups go through the directory: whichever worker takes
+    # the request knows where each player is seated, and every lobby lists
+    # every game
+    for i, code in enumerate(codes):
+        for _ in range(2):
+            url, _ = users[2 * i + 1].post('/game/create')
+            assert url.endswith(f'/game/{code}')
+    for _ in range(2):
+        page = users[0].get('/lobby')
+        assert all(code in page for code in codes)
+
+    # Leaving ends each game on its owner
+    for code in codes:
+        host_socket, guest_socket = results[code]
+        host_socket.emit('leave_game', {'code': code})
+        over = guest_socket.event('game_update', lambda d: 'game_over' in d)
+        assert over['game_over']['winner_seat'] == 1
+        host_socket.close()
+        guest_socket.close()
@@ -0,0 +1,46 @@
+"""Tests for the Monte Carlo prompt-pool simulator and prompt weighting."""
+import json
+
+from app.game_logic import Prompt, apply_prompt_weights
+from scripts import simulate
+
+SMALL = dict(synthetic=2000, min_answers=80)
+
+
+def test_report_is_reproducible_across_process_counts():
+    inline = simulate.simulate(12, seed=3, processes=1, **SMALL)
+    pooled = simulate.simulate(12, seed=3, processes=2, **SMALL)
+    assert json.dumps(inline) == json.dumps(pooled)
+    assert json.dumps(inline) != json.dumps(simulate.simulate(12, seed=4, processes=1, **SMALL))
+
+
+def test_report_fields():
+    report = simulate.simulate(10, seed=1, processes=1, max_turns=60, **SMALL)
+    assert report['prompts']
+    for p in report['prompts']:
+        assert p['games'] == 10
+        assert 0 <= p['stall_rate'] <= 1 and 0 <= p['forfeit_rate'] <= 1
+        if p['stall_rate'] < 1:
+            t = p['turns']
+            assert t['p10'] <= t['p50'] <= t['p90'] <= 60
+            assert 0 <= p['first_mover_win_rate'] <= 1
+
+
+def test_suggested_weights_prune_stalling_prompts():
+    def row(key, p50, stall):
+        return {'key': key, 'turns': {'p50': p50}, 'stall_rate': stall}
+    report = {'prompts': [row('a', 20, 0.0), row('b', 40, 0.1), row('c', 30, 0.5),
+                          row('d', None, 1.0)]}
+    weights = simulate.suggest_weights(report)
+    assert weights['a'] == 1.0
+    assert 0 < weights['b'] < 1
+    assert weights['c'] == weights['d'] == 0.0
+
+
+def test_apply_prompt_weights():
+    pool = [Prompt('club_position', 'Arsenal', 'arsenal', '', pos, pos, 40)
+            for pos in ('GK', 'DF', 'FW')]
+    keys = [p.key for p in pool]
+    weighted = apply_prompt_weights(pool, {keys[0]: 0.25, keys[1]: 0})
+    assert [p.key for p in weighted] == [keys[0], keys[2]]
+    assert [p.weight for p in weighted] == [0.25, 1.0]
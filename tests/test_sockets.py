@@ -0,0 +1,105 @@
+"""Tests for the per-action socket frames sent to a game room."""
+from app import socketio
+from app.game_manager import GAMES
+
+
+def _start_game(app, login, host='alice', guest='bob'):
+    alice, bob = login(host), login(guest)
+    code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+    sa = socketio.test_client(app, flask_test_client=alice)
+    sb = socketio.test_client(app, flask_test_client=bob)
+    sa.emit('join_game', {'code': code})
+    sb.emit('join_game', {'code': code})
+    sa.get_received()
+    sb.get_received()
+    return code, sa, sb
+
+
+def test_one_game_update_per_action(app, login):
+    code, sa, sb = _start_game(app, login)
+    sa.emit('submit_player', {'code': code, 'name': 'Nobody Real'})
+    for client in (sa, sb):
+        received = client.get_received()
+        assert [m['name'] for m in received] == ['game_update']
+        update = received[0]['args'][0]
+        assert update['turn']['outcome'] == 'not_found' and update['turn']['forfeited']
+        assert update['state']['turn_seat'] == 1
+        assert 'game_over' not in update
+
+    sb.emit('leave_game', {'code': code})
+    update = next(m['args'][0] for m in sa.get_received() if m['name'] == 'game_update')
+    assert 'turn' not in update
+    assert update['state']['status'] == 'finished'
+    assert update['game_over'] == {'winner_seat': 0, 'winner_username': 'alice',
+                                   'final_scores': [s.score for s in GAMES[code].seats],
+                                   'abandoned': True}
+    sa.disconnect()
+
+
+def test_legacy_events_behind_flag(app, login, monkeypatch):
+    monkeypatch.setitem(app.config, 'LEGACY_SOCKET_EVENTS', True)
+    code, sa, sb = _start_game(app, login)
+    sa.emit('submit_player', {'code': code, 'name': 'Nobody Real'})
+    assert [m['name'] for m in sb.get_received()] == ['turn_result', 'game_state']
+    sb.emit('leave_game', {'code': code})
+    assert 'game_over' in [m['name'] for m in sa.get_received()]
+    sa.disconnect()
+
+
+def test_spectator_switching_games_leaves_old_room(app, login):
+    first, sa, _ = _start_game(app, login)
+    second, sc, _ = _start_game(app, login, 'carol', 'dave')
+    viewer = socketio.test_client(app, flask_test_client=login('erin'))
+    viewer.emit('join_game', {'code': first, 'spectate': True})
+    viewer.emit('join_game', {'code': second, 'spectate': True})
+    viewer.get_received()
+    assert GAMES[first].spectators == set()
+
+    sa.emit('submit_player', {'code': first, 'name': 'Nobody Real'})
+    assert viewer.get_received() == []
+    sc.emit('submit_player', {'code': second, 'name': 'Nobody Real'})
+    assert [m['name'] for m in viewer.get_received()] == ['game_update']
+    viewer.disconnect()
+
+
+def test_cap_eviction_abandons_the_row(app, login, monkeypatch):
+    from app.game_manager import touch
+    from app.models import Game
+    from app.sockets import reserve_session_slot
+    alice = login('alice')
+    code = alice.post('/game/create').headers['Location'].rsplit('/', 1)[1]
+    sa = socketio.test_client(app, flask_test_client=alice)
+    sa.emit('join_game', {'code': code})
+    sa.get_received()
+    touch(GAMES[code], now=0)
+    monkeypatch.setitem(app.config, 'MAX_LIVE_SESSIONS', len(GAMES))
+    assert reserve_session_slot(app)
+    assert code not in GAMES
+    assert any(m['name'] == 'error' for m in sa.get_received())
+    with app.app_context():
+        row = Game.query.filter_by(code=code).one()
+        assert row.status == 'abandoned' and row.finished_at is not None
+    sa.disconnect()
+
+
+def test_evicting_finished_game_keeps_its_row(app, login):
+    import gevent
+    from app.game_manager import remove_game
+    from app.models import Game
+    from app.sockets import _evict_game
+    code, sa, sb = _start_game(app, login)
+    sb.emit('leave_game', {'code': code})
+    gevent.sleep(0.05)  # let the end-of-game sync run
+    sa.get_received()
+    with app.app_context():
+        finished_at = Game.query.filter_by(code=code).one().finished_at
+    assert finished_at is not None
+
+    game = GAMES[code]
+    remove_game(code)
+    _evict_game(game, app)
+    assert sa.get_received() == []
+    with app.app_context():
+        row = Game.query.filter_by(code=code).one()
+        assert (row.status, row.finished_at) == ('finished', finished_at)
+    sa.disconnect()
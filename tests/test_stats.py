@@ -0,0 +1,68 @@
+"""Tests for match history pagination and its query plan."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Game, GamePlayer, User
+from app.stats import history_query
+
+
+@pytest.fixture(scope='module')
+def history(app):
+    """A user with 25 finished games (two sharing a finish time) plus noise."""
+    with app.app_context():
+        me, opp = User(username='hist_me'), User(username='hist_opp')
+        db.session.add_all([me, opp])
+        db.session.flush()
+        base = datetime(2026, 1, 1)
+        for i in range(25):
+            finished = base + timedelta(minutes=i if i != 24 else 23)
+            game = Game(code=f'H{i:07d}', status='finished', finished_at=finished)
+            db.session.add(game)
+            db.session.flush()
+            db.session.add_all([
+                GamePlayer(game_id=game.id, user_id=me.id, seat=0, final_score=i, won=i % 2 == 0),
+                GamePlayer(game_id=game.id, user_id=opp.id, seat=1, final_score=50),
+            ])
+        db.session.add(Game(code='HACTIVE1', status='active'))
+        db.session.commit()
+        return me.id
+
+
+def test_pages_cover_every_game_once(login, history):
+    client = login('hist_me')
+    codes, cursor, pages = [], None, 0
+    while True:
+        url = f'/api/users/{history}/games?limit=10'
+        if cursor:
+            url += f'&cursor={cursor}'
+        data = client.get(url).get_json()
+        codes += [g['code'] for g in data['games']]
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert pages == 3
+    assert len(codes) == len(set(codes)) == 25
+    assert codes[:2] == ['H0000024', 'H0000023']  # tie on finished_at, id desc
+    assert data['games'][-1]['opponent'] == 'hist_opp'
+
+
+def test_bad_cursor_and_unknown_user(login, history):
+    client = login('hist_me')
+    assert client.get(f'/api/users/{history}/games?cursor=nope').status_code == 400
+    assert client.get('/api/users/999999/games').status_code == 404
+
+
+def _plan(query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql))]
+
+
+@pytest.mark.parametrize('before', [None, (datetime(2026, 1, 1, 0, 10), 10)])
+def test_history_query_uses_indexes(app, before):
+    with app.app_context():
+        plan = _plan(history_query(1, 10, before))
+    assert all(step.startswith('SEARCH') for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
@@ -0,0 +1,84 @@
+"""Tests for the request-scoped and LRU user cache."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db, socketio, user_cache
+from app.game_manager import GAMES
+from app.models import User
+
+
+@contextmanager
+def count_user_queries(app):
+    queries = []
+
+    def before(conn, cursor, statement, params, context, executemany):
+        if 'FROM users' in statement:
+            queries.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, 'before_cursor_execute', before)
+
+
+def test_lru_evicts_least_recently_used(app, login):
+    for name in ('cache_a', 'cache_b', 'cache_c'):
+        login(name)
+    with app.app_context():
+        ids = [u.id for u in User.query.filter(User.username.like('cache_%'))
+               .order_by(User.id)]
+    user_cache.configure(2)
+    try:
+        with app.app_context():
+            user_cache.get_user(ids[0])
+            user_cache.get_user(ids[1])
+        with app.app_context():
+            user_cache.get_user(ids[0])  # refresh a; b is now oldest
+            user_cache.get_user(ids[2])
+        assert list(user_cache._CACHE) == [ids[0], ids[2]]
+    finally:
+        user_cache.configure(app.config['USER_CACHE_SIZE'])
+
+
+def test_views_hit_the_db_once_per_user(app, login):
+    client = login('cache_views')
+    client.get('/lobby')  # warm
+    with count_user_queries(app) as queries:
+        client.get('/lobby')
+        client.get('/profile')
+    assert queries == []
+
+    user_cache.clear()
+    with count_user_queries(app) as queries:
+        client.get('/lobby')  # login_required + view share one lookup
+    assert len(queries) == 1
+
+
+def test_invalidate_rereads_the_row(app, login):
+    login('cache_inval')
+    with app.app_context():
+        user = User.query.filter_by(username='cache_inval').one()
+        assert not user_cache.get_user(user.id).is_admin
+        user.is_admin = True
+        db.session.commit()
+        assert not user_cache.get_user(user.id).is_admin
+        user_cache.invalidate(user.id)
+        assert user_cache.get_user(user.id).is_admin
+
+
+def test_socket_join_makes_no_user_queries(app, login):
+    client = login('cache_sock')
+    client.post('/game/create')
+    code = next(iter(GAMES))
+    sio = socketio.test_client(app, flask_test_client=client)
+    assert sio.is_connected()
+    user_cache.clear()
+    with count_user_queries(app) as queries:
+        sio.emit('join_game', {'code': code})
+    assert queries == []
+    assert any(m['name'] == 'game_state' for m in sio.get_received())
+    sio.disconnect()
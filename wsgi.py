@@ -1,5 +1,8 @@
-from gevent import monkey
-monkey.patch_all()  # MUST be first
+import os
+
+if os.environ.get('SOCKETIO_ASYNC_MODE', 'gevent') == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()  # MUST be first
 
 from app import create_app, socketio  # noqa: E402
 